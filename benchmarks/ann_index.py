@@ -0,0 +1,76 @@
+"""
+Recall@k, latency and memory of each vector index type against the flat baseline.
+
+Uses clustered synthetic vectors so it runs offline at any catalog size:
+
+    python -m benchmarks.ann_index --rows 100000 --dim 256 --queries 200
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+def _clustered_vectors(rows: int, dim: int, seed: int, latent_dim: int = 24) -> np.ndarray:
+    """Normalized vectors with low intrinsic dimension, clustered like listings of similar kinds.
+
+    Points are drawn around a few hundred centers in a small latent space and
+    projected to ``dim``, as real text embeddings occupy a low-dimensional
+    manifold of their space.
+    """
+    rng = np.random.default_rng(0)
+    projection = rng.normal(size=(latent_dim, dim)).astype(np.float32)
+    centers = rng.normal(size=(256, latent_dim)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    latent = centers[rng.integers(0, len(centers), rows)]
+    latent += rng.normal(scale=0.5, size=(rows, latent_dim)).astype(np.float32)
+    vectors = latent @ projection
+    vectors += rng.normal(scale=0.05, size=(rows, dim)).astype(np.float32)
+    return np.ascontiguousarray(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--types", default="flat,sq,ivf,ivfsq,ivfpq,hnsw,hnswsq")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    from src.vector_index import build_index, factory_string, index_bytes
+
+    vectors = _clustered_vectors(args.rows, args.dim, seed=0)
+    queries = _clustered_vectors(args.queries, args.dim, seed=1)
+    truth = None
+
+    print(f"{args.rows} vectors, dim {args.dim}, recall@{args.k} over {args.queries} queries")
+    print(f"{'type':<8}{'factory':<18}{'build (s)':>10}{'MB':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}{'recall':>8}")
+    for index_type in args.types.split(","):
+        start = time.perf_counter()
+        index = build_index(vectors, index_type)
+        build_seconds = time.perf_counter() - start
+
+        latencies = []
+        found = []
+        for query in queries:
+            start = time.perf_counter()
+            _, ids = index.search(query.reshape(1, -1), args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append(ids[0])
+        found = np.array(found)
+        if truth is None:
+            truth = found
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, truth)])
+        latencies.sort()
+        print(f"{index_type:<8}{factory_string(index_type, args.rows, args.dim):<18}"
+              f"{build_seconds:>10.2f}{index_bytes(index) / 1e6:>9.1f}"
+              f"{np.median(latencies):>10.3f}{latencies[int(len(latencies) * 0.95) - 1]:>10.3f}"
+              f"{recall:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
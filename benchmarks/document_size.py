@@ -0,0 +1,106 @@
+"""
+Measures retrieval document size: prompt tokens per retrieved listing and the
+resident memory of the FAISS docstore.
+
+Compares the previous layout (indented text plus the full row as metadata on
+every document) against the compact rendering with a property-id side table:
+
+    python -m benchmarks.document_size --rows 20000
+"""
+
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+QUESTIONS = [
+    "I'm travelling to Barcelona in July, which properties do you have available?",
+    "Can I bring my dog?",
+    "Is there anything with a pool for 6 guests?",
+    "What time is check-in at the loft?",
+    "How much is the cleaning fee and deposit?",
+]
+
+
+def _legacy_text(prop) -> str:
+    """The rendering the index used before compact documents."""
+    return f"""
+            Property: {prop['name']}
+            Location: {prop['location']}
+            Price: ${prop['price']} per night
+            Status: {prop['status']}
+            Property Type: {prop['property_type']}
+            Maximum Guests: {prop['max_guests']}
+            Number of Bedrooms: {prop['number_of_bedrooms']}
+            Number of Bathrooms: {prop['number_of_bathrooms']}
+            Square Meters: {prop['square_meters']}
+            Pet Friendly: {prop['pet_friendly']}
+            Check-in Time: {prop['check_in_time']}
+            Check-out Time: {prop['check_out_time']}
+            Minimum Stay: {prop['minimum_stay']} nights
+            Cleaning Fee: ${prop['cleaning_fee']}
+            Security Deposit: ${prop['security_deposit']}
+            Amenities: {', '.join(prop['amenities'])}
+            Available months: {', '.join(prop['available_months'])}
+            """
+
+
+def _traced(build):
+    """Build something and report the memory it keeps allocated, in MB."""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from benchmarks.synthetic import write_catalog
+
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["PROPERTIES_FILE"] = write_catalog(os.path.join(workdir, "properties.csv"), args.rows)
+
+        from langchain.schema import Document
+
+        from src.context_builder import count_tokens
+        from src.data_loader import PropertyDataLoader
+        from src.property_documents import PropertyTable, relevant_fields, render_property_text
+
+        rows = PropertyDataLoader().get_all_properties().to_list()
+        sample = rows[:args.k]
+
+        print(f"{'question':<48}{'before':>8}{'after':>8}{'saved':>8}")
+        total_before = total_after = 0
+        for question in QUESTIONS:
+            before = sum(count_tokens(_legacy_text(prop)) for prop in sample)
+            after = sum(
+                count_tokens(render_property_text(prop, relevant_fields(question), "compact"))
+                for prop in sample
+            )
+            total_before += before
+            total_after += after
+            print(f"{question[:46]:<48}{before:>8}{after:>8}{1 - after / before:>8.0%}")
+        print(f"Context tokens for {args.k} listings per turn: {total_before / len(QUESTIONS):.0f} -> "
+              f"{total_after / len(QUESTIONS):.0f} ({1 - total_after / total_before:.0%} fewer)")
+
+        _, legacy_mb = _traced(lambda: {
+            str(prop['property_id']): Document(page_content=_legacy_text(prop), metadata=dict(prop))
+            for prop in rows
+        })
+        _, compact_mb = _traced(lambda: (
+            {str(prop['property_id']): Document(page_content="", metadata={'property_id': str(prop['property_id'])})
+             for prop in rows},
+            PropertyTable(rows)
+        ))
+        print(f"Docstore for {args.rows} listings: {legacy_mb:.1f} MB -> {compact_mb:.1f} MB "
+              f"({1 - compact_mb / legacy_mb:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Load benchmark for the async ChatEngine.
+
+Drives N simulated guest sessions concurrently against a local fake LLM and
+deterministic fake embeddings, so it runs offline and measures the serving
+overhead rather than the model:
+
+    python -m benchmarks.engine_load --sessions 200 --turns 3 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+QUESTIONS = [
+    "I'm travelling to Barcelona in July, which properties do you have available?",
+    "What's the price of the second one?",
+    "Can I bring my dog?",
+    "Is there anything with a pool for 6 guests?",
+]
+
+
+def _configure_environment(workdir: str) -> None:
+    """Point every on-disk artifact at a scratch directory before importing src."""
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ["PROPERTY_INDEX_DIR"] = os.path.join(workdir, "property_index")
+    os.environ["SESSIONS_DIR"] = os.path.join(workdir, "sessions")
+    os.environ["CONVERSATION_STORE_PATH"] = os.path.join(workdir, "conversations.sqlite")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embedding_cache.sqlite")
+    os.environ.setdefault("MAX_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("MAX_TOKENS_PER_MINUTE", "1000000000")
+    os.environ.setdefault("EMBEDDING_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("SESSION_REQUESTS_PER_MINUTE", "1000000")
+
+
+async def _run_session(engine, session_id: str, turns: int, latencies: list) -> None:
+    for turn in range(turns):
+        start = time.perf_counter()
+        await engine.aget_response(session_id, QUESTIONS[turn % len(QUESTIONS)])
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(sessions: int, turns: int, latency: float) -> None:
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+
+    from src.chatbot import PropertyChatbot
+    from src.engine import ChatEngine
+    from src.fakes import FakeChatModel
+    from src.metrics import metrics
+
+    chatbot = PropertyChatbot(
+        llm=FakeChatModel(latency=latency),
+        embeddings=DeterministicFakeEmbedding(size=256)
+    )
+    engine = ChatEngine(chatbot)
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _run_session(engine, f"bench-{i}", turns, latencies) for i in range(sessions)
+    ])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total_turns = len(latencies)
+    print(f"Sessions: {sessions}  Turns/session: {turns}  Simulated LLM latency: {latency:.3f}s")
+    print(f"Total turns: {total_turns} in {elapsed:.2f}s ({total_turns / elapsed:.1f} turns/s)")
+    print(f"Latency p50: {statistics.median(latencies) * 1000:.1f}ms  "
+          f"p95: {latencies[int(0.95 * (total_turns - 1))] * 1000:.1f}ms")
+    for name, timing in sorted(metrics.snapshot()['timings'].items()):
+        if name.startswith("rate_limiter_wait_seconds") or name.startswith("llm_call_seconds"):
+            print(f"{name}: {timing['sum']:.2f}s total over {timing['count']} calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="seconds the fake LLM takes per call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_environment(workdir)
+        asyncio.run(run(args.sessions, args.turns, args.latency))
+
+
+if __name__ == "__main__":
+    main()
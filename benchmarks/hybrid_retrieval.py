@@ -0,0 +1,85 @@
+"""
+Hybrid (BM25 + vector) retrieval against vector-only search, fully offline.
+
+Builds the property index for a synthetic catalog with the hashing embedding
+backend, then asks for listings by exact tokens (names, amenities, cities) and
+reports how often the target listing is retrieved at each k, plus the latency
+of the lexical search alone:
+
+    python -m benchmarks.hybrid_retrieval --rows 20000 --queries 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+TEMPLATES = [
+    "Tell me about the {name}",
+    "Is the {name} still available?",
+    "Does the {name} have {amenity}?",
+    "How much is the {name} in {location} per night?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--max-k", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from benchmarks.synthetic import generate_rows, write_catalog
+
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["EMBEDDING_PROVIDER"] = "hashing"
+        os.environ["PROPERTIES_FILE"] = write_catalog(os.path.join(workdir, "properties.csv"), args.rows)
+        os.environ["PROPERTY_INDEX_DIR"] = os.path.join(workdir, "property_index")
+
+        from src.config import settings
+        from src.data_loader import PropertyDataLoader
+        from src.embeddings import build_embeddings
+        from src.property_index import PropertyIndex
+
+        loader = PropertyDataLoader()
+        index = PropertyIndex(build_embeddings())
+        index.sync(loader.get_all_properties())
+
+        rng = random.Random(11)
+        rows = generate_rows(args.rows)
+        queries = []
+        for i in range(args.queries):
+            row = rng.choice(rows)
+            question = TEMPLATES[i % len(TEMPLATES)].format(
+                name=row["name"], location=row["location"],
+                amenity=rng.choice(row["amenities"].split(","))
+            )
+            queries.append((question, str(row["property_id"])))
+
+        embeddings = [index.embeddings.embed_query(question) for question, _ in queries]
+        print(f"{'k':>3} {'vector recall':>14} {'hybrid recall':>14}")
+        for k in range(1, args.max_k + 1):
+            hits = {"vector": 0, "hybrid": 0}
+            for (question, target), embedding in zip(queries, embeddings):
+                for mode, query in (("vector", None), ("hybrid", question)):
+                    docs = index.search(embedding, k=k, query=query)
+                    hits[mode] += any(doc.metadata['property_id'] == target for doc in docs)
+            print(f"{k:>3} {hits['vector'] / len(queries):>14.3f} {hits['hybrid'] / len(queries):>14.3f}")
+
+        index.lexical.search(queries[0][0], settings.hybrid_fetch_k)
+        latencies = []
+        for question, _ in queries:
+            start = time.perf_counter()
+            index.lexical.search(question, settings.hybrid_fetch_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"Lexical search over {args.rows} listings: p50 {statistics.median(latencies):.3f}ms  "
+              f"p95 {p95:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
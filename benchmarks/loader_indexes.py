@@ -0,0 +1,83 @@
+"""
+Microbenchmark for PropertyDataLoader lookups on a large synthetic catalog.
+
+Compares the precomputed bitmap indexes against the previous per-call pandas
+scans that materialized ``to_dict('records')`` on every query:
+
+    python -m benchmarks.loader_indexes --rows 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_catalog
+
+
+def _time(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _scan_queries(df):
+    """The full-scan implementations the loader used before indexing."""
+    return {
+        "by_location": lambda: df[df['location'].str.lower() == "barcelona"].to_dict('records'),
+        "by_price_range": lambda: df[(df['price'] >= 100) & (df['price'] <= 150)].to_dict('records'),
+        "by_amenity": lambda: df[
+            df['amenities'].apply(lambda x: "jacuzzi" in [a.lower() for a in x])
+        ].to_dict('records'),
+        "combined": lambda: df[
+            (df['location'].str.lower() == "barcelona")
+            & df['available_months'].apply(lambda x: "July" in x)
+            & (df['max_guests'] >= 4)
+            & (df['pet_friendly'] == "yes")
+            & (df['status'] == "available")
+        ]['property_id'].tolist(),
+    }
+
+
+def _indexed_queries(loader):
+    return {
+        "by_location": lambda: loader.get_properties_by_location("Barcelona"),
+        "by_price_range": lambda: loader.get_properties_by_price_range(100, 150),
+        "by_amenity": lambda: loader.get_properties_by_amenity("jacuzzi"),
+        "combined": lambda: loader.find_property_ids(
+            location="Barcelona", months=["July"], min_guests=4,
+            pet_friendly=True, status="available"
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["PROPERTIES_FILE"] = write_catalog(os.path.join(workdir, "properties.csv"), args.rows)
+
+        from src.data_loader import PropertyDataLoader
+
+        start = time.perf_counter()
+        loader = PropertyDataLoader()
+        print(f"Loaded and indexed {args.rows} listings in {time.perf_counter() - start:.2f}s")
+
+        scans = _scan_queries(loader.properties_df)
+        indexed = _indexed_queries(loader)
+        print(f"{'query':<16}{'scan (ms)':>12}{'indexed (ms)':>14}{'speedup':>10}{'rows':>8}")
+        for name in scans:
+            scan_ms = _time(scans[name], args.repeat)
+            indexed_ms = _time(indexed[name], args.repeat)
+            rows = len(indexed[name]())
+            print(f"{name:<16}{scan_ms:>12.2f}{indexed_ms:>14.3f}{scan_ms / indexed_ms:>9.0f}x{rows:>8}")
+
+
+if __name__ == "__main__":
+    main()
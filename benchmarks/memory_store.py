@@ -0,0 +1,66 @@
+"""
+Microbenchmark for conversation memory persistence.
+
+Measures the cost of saving one message and of loading a session as the
+history grows, and loading across many sessions:
+
+    python -m benchmarks.memory_store --messages 5000 --sessions 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def _per_call_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["CONVERSATION_STORE_PATH"] = os.path.join(workdir, "conversations.sqlite")
+        os.environ["SESSIONS_DIR"] = os.path.join(workdir, "sessions")
+
+        from src.memory import ConversationMemory
+
+        memory = ConversationMemory("long-conversation")
+        checkpoints = sorted({0, args.messages // 10, args.messages // 2, args.messages})
+        print(f"{'history':>8}{'add (ms)':>12}{'load (ms)':>12}")
+        for target in checkpoints:
+            while memory.message_count < target:
+                memory.add_message("user", "Anything in Barcelona for 4 guests in July with a pool?")
+            add_ms = _per_call_ms(
+                lambda: memory.add_message("assistant", "The Cozy Studio is a good match."), args.repeat
+            )
+            memory.store.flush()
+            load_ms = _per_call_ms(lambda: ConversationMemory("long-conversation"), args.repeat)
+            print(f"{memory.message_count:>8}{add_ms:>12.3f}{load_ms:>12.3f}")
+
+        start = time.perf_counter()
+        for i in range(args.sessions):
+            session = ConversationMemory(f"guest-{i}")
+            session.add_message("user", "Is the loft pet friendly?")
+            session.add_message("assistant", "Yes, pets are welcome.")
+        memory.store.flush()
+        created = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(args.sessions):
+            ConversationMemory(f"guest-{i}").get_context()
+        loaded = time.perf_counter() - start
+        print(f"{args.sessions} sessions: created in {created:.2f}s, "
+              f"loaded in {loaded:.2f}s ({loaded / args.sessions * 1000:.3f}ms each)")
+
+
+if __name__ == "__main__":
+    main()
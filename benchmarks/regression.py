@@ -0,0 +1,255 @@
+"""
+Performance regression suite over the fake LLM and embedding backends, fully offline.
+
+Trains on a synthetic conversation corpus, builds the property index for a
+synthetic catalog, then replays the user turns of data/training/conversations.json
+and scripted catalog sessions through ``get_response`` and, concurrently,
+through the ChatEngine. Reports latency, LLM calls, tokens and embedding calls
+per turn, and throughput, and compares them with benchmarks/baseline.json.
+It exits non-zero when a count per turn, which is deterministic on the fake
+backends, is more than --count-tolerance worse:
+
+    python -m benchmarks.regression
+    python -m benchmarks.regression --update-baseline
+
+Timings depend on the machine and its load, so they are only reported. Pass
+--gate-timings to also fail on them, against a baseline recorded on the
+machine that runs the check.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.router import SCRIPT, percentile
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Metric -> whether higher values are better
+METRICS = {
+    'training_examples_per_second': True,
+    'index_cold_seconds': False,
+    'index_warm_seconds': False,
+    'turn_p50_ms': False,
+    'turn_p95_ms': False,
+    'llm_calls_per_turn': False,
+    'tokens_per_turn': False,
+    'embedding_calls_per_turn': False,
+    'turns_per_second': True,
+    'engine_turns_per_second': True,
+}
+
+# Metrics that do not depend on the machine, so the check fails on them
+COUNT_METRICS = ('llm_calls_per_turn', 'tokens_per_turn', 'embedding_calls_per_turn')
+
+
+def build_sessions(rows, sessions: int, training_file: str):
+    """Get the questions of each session: training conversations, then scripted catalog sessions."""
+    with open(training_file) as f:
+        conversations = json.load(f)['conversations']
+    questions = [[message['content'] for message in conversation['messages'] if message['role'] == 'user']
+                 for conversation in conversations]
+    rng = random.Random(5)
+    for _ in range(sessions):
+        row = rng.choice(rows)
+        questions.append([template.format(
+            location=row["location"], guests=rng.randint(1, 4), name=row["name"],
+            amenity=rng.choice(row["amenities"].split(","))
+        ) for template in SCRIPT])
+    return questions
+
+
+def counts():
+    """Get the LLM calls, LLM tokens and embedding calls recorded so far."""
+    from src.metrics import metrics
+
+    snapshot = metrics.snapshot()
+    llm_calls = sum(timing['count'] for key, timing in snapshot['timings'].items()
+                    if key.startswith('llm_call_seconds'))
+    tokens = sum(value for key, value in snapshot['counters'].items() if key.startswith('llm_tokens_total'))
+    embedding_calls = snapshot['timings'].get('rate_limiter_wait_seconds{limiter="embedding"}', {}).get('count', 0)
+    return llm_calls, tokens, embedding_calls
+
+
+def measure_training(corpus: str) -> float:
+    from src.train import PropertyChatbotTrainer
+
+    start = time.perf_counter()
+    PropertyChatbotTrainer(corpus).train(fresh=True)
+    elapsed = time.perf_counter() - start
+    with open(corpus) as f:
+        examples = sum(1 for line in f for message in json.loads(line)['messages'] if message['role'] == 'user')
+    return examples / elapsed
+
+
+def measure_turns(chatbot, sessions):
+    from src.memory import ConversationMemory
+
+    before = counts()
+    latencies = []
+    start = time.perf_counter()
+    for i, questions in enumerate(sessions):
+        chatbot.memory = ConversationMemory(f"regression-{i}")
+        for question in questions:
+            turn_start = time.perf_counter()
+            chatbot.get_response(question)
+            latencies.append(time.perf_counter() - turn_start)
+    elapsed = time.perf_counter() - start
+    # Background summaries are part of what a turn costs
+    chatbot.summarizer.flush()
+    llm_calls, tokens, embedding_calls = (after - earlier for after, earlier in zip(counts(), before))
+    turns = len(latencies)
+    return {
+        'turn_p50_ms': statistics.median(latencies) * 1000,
+        'turn_p95_ms': percentile(latencies, 0.95) * 1000,
+        'llm_calls_per_turn': llm_calls / turns,
+        'tokens_per_turn': tokens / turns,
+        'embedding_calls_per_turn': embedding_calls / turns,
+        'turns_per_second': turns / elapsed,
+    }
+
+
+async def measure_engine(chatbot, sessions) -> float:
+    from src.engine import ChatEngine
+
+    engine = ChatEngine(chatbot)
+
+    async def play(i, questions):
+        for question in questions:
+            await engine.aget_response(f"regression-engine-{i}", question)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(i, questions) for i, questions in enumerate(sessions)))
+    return sum(len(questions) for questions in sessions) / (time.perf_counter() - start)
+
+
+def run(args) -> dict:
+    training_file = os.path.abspath(args.training_data)
+    with tempfile.TemporaryDirectory() as workdir:
+        from benchmarks.synthetic import generate_rows, write_catalog
+        from benchmarks.training_pipeline import write_corpus
+
+        os.environ.update({
+            "LLM_PROVIDER": "fake",
+            "EMBEDDING_PROVIDER": "fake",
+            "FAKE_LLM_LATENCY": str(args.llm_latency),
+            "FAKE_EMBEDDING_LATENCY": str(args.embedding_latency),
+            "LOCAL_EMBEDDING_DIMENSIONS": str(args.dim),
+            "PROPERTIES_FILE": write_catalog(os.path.join(workdir, "properties.csv"), args.rows),
+            "PROPERTY_INDEX_DIR": os.path.join(workdir, "property_index"),
+            "CONVERSATION_STORE_PATH": os.path.join(workdir, "conversations.sqlite"),
+            "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.sqlite"),
+            "TRAINING_SHARD_DIR": os.path.join(workdir, "shards"),
+            "TRAINING_DATA_FILE": training_file,
+            "RESPONSE_CACHE_ENABLED": "false",
+            "SESSION_REQUESTS_PER_MINUTE": "100000",
+            "MAX_REQUESTS_PER_MINUTE": "100000",
+            "MAX_TOKENS_PER_MINUTE": "100000000",
+            "EMBEDDING_REQUESTS_PER_MINUTE": "100000",
+            "EMBEDDING_TOKENS_PER_MINUTE": "100000000",
+        })
+        os.environ.pop("OPENAI_API_KEY", None)
+        cwd = os.getcwd()
+        # The trainer and the chatbot read and write models/ relative to the working directory
+        os.chdir(workdir)
+        try:
+            results = {'training_examples_per_second': measure_training(
+                write_corpus(os.path.join(workdir, "corpus.jsonl"), args.conversations)
+            )}
+
+            from src.chatbot import PropertyChatbot
+            from src.startup import startup
+
+            chatbot = PropertyChatbot()
+            results['index_cold_seconds'] = sum(seconds for name, seconds in startup.phases
+                                                if name in ("data", "index"))
+            start = time.perf_counter()
+            chatbot._initialize_vector_store()
+            results['index_warm_seconds'] = time.perf_counter() - start
+
+            sessions = build_sessions(generate_rows(args.rows), args.sessions, training_file)
+            results.update(measure_turns(chatbot, sessions))
+            results['engine_turns_per_second'] = asyncio.run(measure_engine(chatbot, sessions))
+            chatbot.close()
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, count_tolerance: float,
+            gate_timings: bool = False) -> list:
+    """Print current against baseline values and get the gated metrics that regressed.
+
+    Counts are gated at ``count_tolerance``; timings are gated at ``tolerance``
+    only with ``gate_timings``, and are otherwise flagged without failing.
+    """
+    regressions = []
+    print(f"{'metric':<30} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, higher_is_better in METRICS.items():
+        current, base = results[name], baseline.get(name)
+        if base is None:
+            print(f"{name:<30} {'-':>12} {current:12.3f}")
+            continue
+        change = (current - base) / base if base else 0.0
+        gated = name in COUNT_METRICS or gate_timings
+        limit = count_tolerance if name in COUNT_METRICS else tolerance
+        worse = current < base * (1 - limit) if higher_is_better else current > base * (1 + limit)
+        if worse and gated:
+            regressions.append(name)
+        flag = ("  REGRESSION" if gated else "  slower (not gated)") if worse else ""
+        print(f"{name:<30} {base:12.3f} {current:12.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=20, help="scripted catalog sessions")
+    parser.add_argument("--conversations", type=int, default=20000, help="synthetic training conversations")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="simulated seconds per LLM call")
+    parser.add_argument("--embedding-latency", type=float, default=0.005,
+                        help="simulated seconds per embedding request")
+    parser.add_argument("--training-data", default="data/training/conversations.json")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="flag a timing worse than the baseline by more than this fraction")
+    parser.add_argument("--count-tolerance", type=float, default=0.02,
+                        help="fail when a count per turn is worse than the baseline by more than this fraction")
+    parser.add_argument("--gate-timings", action="store_true",
+                        help="also fail on flagged timings; use a baseline recorded on this machine")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    params = {name: getattr(args, name) for name in
+              ("rows", "sessions", "conversations", "dim", "llm_latency", "embedding_latency")}
+    results = run(args)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump({'params': params, 'metrics': results}, f, indent=2)
+            f.write("\n")
+        compare(results, {}, args.tolerance, args.count_tolerance)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['params'] != params:
+        sys.exit(f"The baseline was recorded with {baseline['params']}; "
+                 f"rerun with those parameters or pass --update-baseline")
+    regressions = compare(results, baseline['metrics'], args.tolerance, args.count_tolerance,
+                          args.gate_timings)
+    if regressions:
+        sys.exit(f"Regressed: {', '.join(regressions)}")
+    print("No regressions" + ("" if args.gate_timings else " in the counts per turn"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Retrieval latency with the local hashing embedding backend, fully offline.
+
+Builds the property index for a synthetic catalog, then times query embedding
+plus filtered vector search per question:
+
+    python -m benchmarks.retrieval_latency --rows 20000 --queries 500
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+QUESTIONS = [
+    "I'm travelling to Barcelona in July, which properties do you have available?",
+    "Can I bring my dog to a villa in Lisbon?",
+    "Is there anything with a pool for 6 guests?",
+    "Quiet apartment with a workspace and fast wifi",
+    "Something under 150 per night in Paris for 4 people",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from benchmarks.synthetic import write_catalog
+
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["EMBEDDING_PROVIDER"] = "hashing"
+        os.environ["PROPERTIES_FILE"] = write_catalog(os.path.join(workdir, "properties.csv"), args.rows)
+        os.environ["PROPERTY_INDEX_DIR"] = os.path.join(workdir, "property_index")
+
+        from src.data_loader import PropertyDataLoader
+        from src.embeddings import build_embeddings
+        from src.property_index import PropertyIndex
+        from src.retrieval import PropertyRetriever
+
+        loader = PropertyDataLoader()
+        index = PropertyIndex(build_embeddings())
+        start = time.perf_counter()
+        stats = index.sync(loader.get_all_properties())
+        print(f"Cold index of {stats['embedded']} listings: {time.perf_counter() - start:.2f}s")
+
+        retriever = PropertyRetriever(property_index=index, data_loader=loader)
+        retriever.get_relevant_documents(QUESTIONS[0])
+        latencies = []
+        for i in range(args.queries):
+            start = time.perf_counter()
+            retriever.get_relevant_documents(QUESTIONS[i % len(QUESTIONS)])
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"Retrieval over {args.queries} queries: p50 {statistics.median(latencies):.2f}ms  "
+              f"p95 {p95:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
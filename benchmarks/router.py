@@ -0,0 +1,94 @@
+"""
+Turns answered by the catalog fast-path router and their latency, fully offline.
+
+Plays scripted sessions (a filter question, then follow-ups about the listed
+properties, then an open question) through the ChatEngine over a synthetic
+catalog, with the hashing embedding backend and a fake chat model of fixed
+latency, and reports the share of turns answered locally and the latency of
+local and LLM turns:
+
+    python -m benchmarks.router --rows 20000 --sessions 200 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+SCRIPT = [
+    "Anything in {location} for {guests} guests?",
+    "What's the price of the second one?",
+    "Check-in time for the {name}?",
+    "Is it pet friendly?",
+    "Does the {name} have {amenity}?",
+    "Which one would be quieter for a family with small kids?",
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def play(engine, rows, sessions: int):
+    rng = random.Random(5)
+    local, llm = [], []
+    for session in range(sessions):
+        row = rng.choice(rows)
+        for template in SCRIPT:
+            question = template.format(
+                location=row["location"], guests=rng.randint(1, 4), name=row["name"],
+                amenity=rng.choice(row["amenities"].split(","))
+            )
+            before = engine.chatbot.router.local_turns if engine.chatbot.router else 0
+            start = time.perf_counter()
+            await engine.aget_response(f"guest-{session}", question)
+            elapsed = time.perf_counter() - start
+            after = engine.chatbot.router.local_turns if engine.chatbot.router else 0
+            (local if after > before else llm).append(elapsed)
+    return local, llm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated LLM latency in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from benchmarks.synthetic import generate_rows, write_catalog
+
+        os.environ["EMBEDDING_PROVIDER"] = "hashing"
+        os.environ["PROPERTIES_FILE"] = write_catalog(os.path.join(workdir, "properties.csv"), args.rows)
+        os.environ["PROPERTY_INDEX_DIR"] = os.path.join(workdir, "property_index")
+        os.environ["CONVERSATION_STORE_PATH"] = os.path.join(workdir, "conversations.sqlite")
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+        os.environ["SESSION_REQUESTS_PER_MINUTE"] = "100000"
+        os.environ["MAX_REQUESTS_PER_MINUTE"] = "100000"
+        os.environ["MAX_TOKENS_PER_MINUTE"] = "100000000"
+
+        from src.chatbot import PropertyChatbot
+        from src.engine import ChatEngine
+        from src.fakes import FakeChatModel
+
+        chatbot = PropertyChatbot(llm=FakeChatModel(
+            response="There are a few good options there; let me know your dates.", latency=args.latency
+        ))
+        local, llm = asyncio.run(play(ChatEngine(chatbot), generate_rows(args.rows), args.sessions))
+
+        total = len(local) + len(llm)
+        print(f"Turns: {total}, answered locally: {len(local)} ({len(local) / total:.0%})")
+        for label, values in (("local", local), ("LLM", llm)):
+            if values:
+                print(f"{label:<6} p50 {statistics.median(values) * 1000:8.2f}ms  "
+                      f"p95 {percentile(values, 0.95) * 1000:8.2f}ms")
+        print(f"Mean turn {statistics.mean(local + llm) * 1000:.1f}ms "
+              f"(all turns through the LLM: ~{statistics.mean(llm) * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
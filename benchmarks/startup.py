@@ -0,0 +1,57 @@
+"""
+Process startup time by phase, with and without the warm-start snapshot, fully offline.
+
+Starts a fresh interpreter that builds a PropertyChatbot over a synthetic
+catalog (hashing embeddings, fake chat model) three times: first run with no
+persisted index, a restart that re-parses the catalog, and a restart from the
+snapshot:
+
+    python -m benchmarks.startup --rows 20000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+from src.chatbot import PropertyChatbot
+from src.fakes import FakeChatModel
+from src.startup import startup
+PropertyChatbot(llm=FakeChatModel())
+print(startup.report())
+"""
+
+
+def run(label: str, env: dict) -> None:
+    result = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    print(f"{label:<22} {result.stdout.strip().splitlines()[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from benchmarks.synthetic import write_catalog
+
+        env = dict(os.environ)
+        env.pop("OPENAI_API_KEY", None)
+        env.update({
+            "PYTHONPATH": os.getcwd(),
+            "EMBEDDING_PROVIDER": "hashing",
+            "PROPERTIES_FILE": write_catalog(os.path.join(workdir, "properties.csv"), args.rows),
+            "PROPERTY_INDEX_DIR": os.path.join(workdir, "property_index"),
+            "CONVERSATION_STORE_PATH": os.path.join(workdir, "conversations.sqlite"),
+        })
+        run("first run", env)
+        run("restart, no snapshot", dict(env, WARM_START_ENABLED="false"))
+        run("restart, snapshot", env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic property catalogs shaped like data/properties.csv, for scaled benchmarks."""
+
+import csv
+import random
+from typing import List
+
+LOCATIONS = [
+    "Barcelona", "Madrid", "Berlin", "Paris", "Lisbon", "Rome", "Mallorca", "Amsterdam",
+    "Vienna", "Prague", "London", "Dublin", "Seville", "Valencia", "Porto", "Florence"
+]
+AMENITIES = [
+    "wifi", "kitchen", "AC", "terrace", "balcony", "heating", "workspace", "pool", "BBQ",
+    "beach access", "elevator", "gym", "security", "jacuzzi", "parking", "garden",
+    "washer", "dryer", "fireplace", "sauna", "sea view", "dishwasher"
+]
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+PROPERTY_TYPES = ["studio", "loft", "villa", "apartment", "house", "penthouse", "cabin"]
+ADJECTIVES = ["Cozy", "Modern", "Sunny", "Quiet", "Charming", "Spacious", "Bright", "Rustic", "Elegant"]
+NOUNS = ["Studio", "Loft", "Flat", "Villa", "Retreat", "Penthouse", "Cottage", "Apartment", "Hideaway"]
+
+FIELDS = [
+    "property_id", "name", "location", "amenities", "status", "price", "available_months",
+    "number_of_bedrooms", "number_of_bathrooms", "square_meters", "property_type", "max_guests",
+    "pet_friendly", "check_in_time", "check_out_time", "minimum_stay", "cleaning_fee",
+    "security_deposit"
+]
+
+
+def generate_rows(count: int, seed: int = 7) -> List[dict]:
+    """Generate ``count`` deterministic synthetic listings."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        bedrooms = rng.randint(1, 5)
+        start_month = rng.randrange(12)
+        rows.append({
+            "property_id": 100000 + i,
+            "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}",
+            "location": rng.choice(LOCATIONS),
+            "amenities": ",".join(rng.sample(AMENITIES, rng.randint(3, 8))),
+            "status": "available" if rng.random() < 0.7 else "booked",
+            "price": rng.randrange(60, 600, 5),
+            "available_months": ",".join(
+                MONTHS[(start_month + j) % 12] for j in range(rng.randint(1, 6))
+            ),
+            "number_of_bedrooms": bedrooms,
+            "number_of_bathrooms": rng.randint(1, bedrooms),
+            "square_meters": rng.randrange(30, 300, 5),
+            "property_type": rng.choice(PROPERTY_TYPES),
+            "max_guests": bedrooms * 2,
+            "pet_friendly": rng.choice(["yes", "no"]),
+            "check_in_time": rng.choice(["14:00", "15:00", "16:00"]),
+            "check_out_time": rng.choice(["10:00", "11:00"]),
+            "minimum_stay": rng.randint(1, 7),
+            "cleaning_fee": rng.randrange(20, 120, 5),
+            "security_deposit": rng.randrange(100, 1000, 50),
+        })
+    return rows
+
+
+def write_catalog(path: str, count: int, seed: int = 7) -> str:
+    """Write a synthetic catalog CSV to ``path`` and return the path."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(generate_rows(count, seed))
+    return path
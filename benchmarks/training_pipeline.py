@@ -0,0 +1,90 @@
+"""
+Sharded training pipeline throughput, resume and peak memory, fully offline.
+
+Writes a synthetic JSONL corpus, trains on it with the hashing embedding
+backend, interrupting the first run after a few shards to show that the
+second run resumes from the checkpoints:
+
+    python -m benchmarks.training_pipeline --conversations 200000 --interrupt-after 3
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+QUESTIONS = [
+    "Do you allow pets?", "What time is check-in?", "Is there parking at the {place}?",
+    "Can I get a late checkout at the {place}?", "Is breakfast included?",
+    "How far is the {place} from the beach?", "Is there a gym?", "Do you have a crib for a baby?",
+]
+PLACES = ["villa", "loft", "studio", "penthouse", "cabin", "apartment"]
+
+
+def write_corpus(path: str, count: int, seed: int = 3) -> str:
+    """Write ``count`` synthetic conversations, one JSON object per line."""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(count):
+            messages = [{"role": "system", "content": "You are a helpful property rental assistant."}]
+            for _ in range(rng.randint(1, 3)):
+                place = rng.choice(PLACES)
+                messages.append({"role": "user", "content": rng.choice(QUESTIONS).format(place=place)})
+                messages.append({"role": "assistant",
+                                 "content": f"Answer {i} about the {place}: {rng.randint(1, 10 ** 6)}"})
+            f.write(json.dumps({"messages": messages}) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=200000)
+    parser.add_argument("--shard-size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--interrupt-after", type=int, default=0,
+                        help="stop the first run after this many shards, then resume")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = write_corpus(os.path.join(workdir, "conversations.jsonl"), args.conversations)
+        print(f"Corpus: {args.conversations} conversations, {os.path.getsize(corpus) / 1e6:.1f}MB")
+
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["EMBEDDING_PROVIDER"] = "hashing"
+        os.environ["LOCAL_EMBEDDING_DIMENSIONS"] = str(args.dim)
+        os.environ["TRAINING_SHARD_SIZE"] = str(args.shard_size)
+        os.environ["TRAINING_SHARD_DIR"] = os.path.join(workdir, "shards")
+        os.chdir(workdir)
+
+        from src.train import PropertyChatbotTrainer
+
+        trainer = PropertyChatbotTrainer(corpus)
+        if args.interrupt_after:
+            embed_shard = trainer._embed_shard
+
+            def interrupting(shard, examples):
+                if shard >= args.interrupt_after:
+                    raise KeyboardInterrupt
+                embed_shard(shard, examples)
+
+            trainer._embed_shard = interrupting
+            try:
+                trainer.build_vector_store(fresh=True)
+            except KeyboardInterrupt:
+                print(f"Interrupted after {args.interrupt_after} shards")
+            trainer._embed_shard = embed_shard
+
+        start = time.perf_counter()
+        vector_store = trainer.build_vector_store()
+        elapsed = time.perf_counter() - start
+        count = vector_store.index.ntotal
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{'Resumed run' if args.interrupt_after else 'Run'}: {count} examples in {elapsed:.1f}s "
+              f"({count / elapsed:.0f} examples/s), peak RSS {peak_mb:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
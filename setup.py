@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 setup(
     name="hosting-chatbot",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks"]),
     install_requires=[
         "langchain==0.0.350",
         "langchain-community==0.0.13",
@@ -18,7 +18,8 @@ setup(
         "pydantic-settings==2.2.1",
         "python-dateutil==2.8.2",
         "urllib3<2.0.0",
-        "httpx==0.27.2"
+        "httpx==0.27.2",
+        "aiohttp==3.9.5"
     ],
     python_requires=">=3.11",
 ) 
\ No newline at end of file
@@ -1,11 +1,29 @@
 """
 Smart Property Chatbot - A conversational AI assistant for property rentals.
+
+Public names are imported on first access, so ``import src`` stays cheap and
+only the modules a process actually uses are loaded.
 """
 
-from .chatbot import PropertyChatbot
-from .config import settings
-from .data_loader import PropertyDataLoader
-from .memory import ConversationMemory
+import importlib
+
+from .startup import startup
 
 __version__ = "0.1.0"
-__all__ = ["PropertyChatbot", "settings", "PropertyDataLoader", "ConversationMemory"] 
\ No newline at end of file
+__all__ = ["PropertyChatbot", "settings", "PropertyDataLoader", "ConversationMemory"]
+
+_EXPORTS = {
+    "PropertyChatbot": ".chatbot",
+    "settings": ".config",
+    "PropertyDataLoader": ".data_loader",
+    "ConversationMemory": ".memory",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
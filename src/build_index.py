@@ -0,0 +1,37 @@
+import argparse
+
+from src.config import settings
+from src.data_loader import PropertyDataLoader
+from src.embeddings import build_embeddings
+from src.property_index import PropertyIndex
+from src.snapshot import save_warm_start
+from src.vector_index import INDEX_TYPES, index_bytes
+
+
+def main():
+    """Embed the catalog, then train and persist the configured vector index under models/."""
+    parser = argparse.ArgumentParser(description="Train and persist the property vector index.")
+    parser.add_argument("--type", choices=INDEX_TYPES, default=None,
+                        help=f"index type (default: VECTOR_INDEX_TYPE={settings.vector_index_type})")
+    args = parser.parse_args()
+
+    if args.type:
+        settings.vector_index_type = args.type
+
+    data_loader = PropertyDataLoader()
+    property_index = PropertyIndex(build_embeddings())
+    stats = property_index.sync(data_loader.get_all_properties())
+    print(f"Property index ready: {stats['embedded']} embedded, "
+          f"{stats['reused']} reused, {stats['removed']} removed")
+
+    property_index.train()
+    # The previous snapshot holds the old index; the next start restores this one
+    save_warm_start(data_loader, property_index)
+    index = property_index.vector_store.index
+    print(f"Trained {property_index.index_type} index ({type(index).__name__}) over "
+          f"{index.ntotal} listings, {index_bytes(index) / 1e6:.1f} MB, "
+          f"saved to {property_index.index_dir}")
+
+
+if __name__ == "__main__":
+    main()
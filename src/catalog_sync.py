@@ -0,0 +1,73 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .config import settings
+from .data_loader import PropertyDataLoader
+from .property_index import PropertyIndex
+from .snapshot import save_warm_start
+
+
+class CatalogSync:
+    """Keeps the live property index in step with the properties source."""
+
+    def __init__(self, data_loader: PropertyDataLoader, property_index: PropertyIndex):
+        self.data_loader = data_loader
+        self.property_index = property_index
+        self.last_stats: Dict[str, int] = {}
+        self.listeners: List[Callable[[List[str]], None]] = []
+        # Serializes syncs, so a snapshot always pairs a catalog with its own index
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync(self) -> Dict[str, int]:
+        """Reload the source and apply only the changed rows to the index.
+
+        The warm-start snapshot is written again afterwards: it is keyed on the
+        source file, so the previous one no longer matches after a reload.
+        """
+        with self._lock:
+            self.data_loader.reload()
+            self.last_stats = self.property_index.sync(self.data_loader.get_all_properties())
+            changed = self.property_index.last_changed
+            save_warm_start(self.data_loader, self.property_index)
+        if changed:
+            for listener in self.listeners:
+                listener(changed)
+        return self.last_stats
+
+    def add_listener(self, listener: Callable[[List[str]], None]) -> None:
+        """Call ``listener`` with the ids of upserted or removed properties after each sync."""
+        self.listeners.append(listener)
+
+    def sync_if_changed(self) -> Optional[Dict[str, int]]:
+        """Sync only when the properties file was modified since it was last read."""
+        if not self.data_loader.has_changed():
+            return None
+        return self.sync()
+
+    def start(self, poll_interval: float = None) -> None:
+        """Poll the properties file in a background thread and sync on changes."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        interval = poll_interval or settings.catalog_poll_interval
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the polling thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _poll(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                stats = self.sync_if_changed()
+                if stats and (stats['embedded'] or stats['removed']):
+                    print(f"Catalog synced: {stats['embedded']} upserted, {stats['removed']} removed")
+            except Exception as e:
+                print(f"Warning: Could not sync catalog from {os.path.basename(self.data_loader.properties_file)}: {str(e)}")
@@ -1,55 +1,177 @@
 import os
 import json
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-import time
-from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from langchain_community.callbacks import get_openai_callback
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, AsyncIterator, NamedTuple, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
 
+from src.clients import create_chat_model
 from src.config import settings
 from src.data_loader import PropertyDataLoader
 from src.memory import ConversationMemory
+from src.property_index import PropertyIndex
+from src.retrieval import PropertyRetriever
+from src.router import CatalogRouter
+from src.rewriter import QuestionRewriter
+from src.catalog_sync import CatalogSync
+from src.conversation_store import close_conversation_stores, reopen_conversation_stores
+from src.rate_limiter import RateLimitCallbackHandler, AsyncRateLimitCallbackHandler
+from src.embeddings import EmbeddingStore, build_embeddings
+from src.context_builder import context_builder
+from src.lexical_index import reciprocal_rank_fusion
+from src.examples import ExampleIndex
+from src.response_cache import SemanticResponseCache, Scope
+from src.query_filters import references_context
+from src.summarizer import BackgroundSummarizer
+from src.snapshot import load_warm_start, save_warm_start
+from src.startup import startup
+from src.tracing import annotate, mark_first_token, profiler, stage, tracer
+
+DEFAULT_SYSTEM_MESSAGE = "You are a helpful property rental assistant."
+
+QA_TEMPLATE = """{system_message} Use the following pieces of context to answer the question at the end.
+If you don't know the answer, just say that you don't know, don't try to make up an answer.
+Always check property details like maximum guests, number of bedrooms, and amenities before making recommendations.
+If a property doesn't meet the user's requirements, explicitly state why and suggest alternatives.
+
+Example answers:
+{examples}
+
+Previous conversation:
+{chat_history}
+
+Context:
+{context}
+
+Question: {question}
+Answer:"""
+
+CONDENSE_QUESTION_PROMPT = PromptTemplate.from_template(
+    """Given the following conversation and a follow up question, rephrase the follow up question to be a standalone question, in its original language.
+
+Chat History:
+{chat_history}
+Follow Up Input: {question}
+Standalone question:"""
+)
+
+QA_CHAIN_PROMPT = PromptTemplate(
+    input_variables=["system_message", "context", "question", "chat_history", "examples"],
+    template=QA_TEMPLATE
+)
+
+
+class Retrieval(NamedTuple):
+    """A question's embedding and the listings retrieved for it."""
+    embedding: List[float]
+    docs: List[Document]
+
 
 class PropertyChatbot:
-    def __init__(self):
-        self.data_loader = PropertyDataLoader()
+    def __init__(self, llm: BaseChatModel = None, embeddings: Embeddings = None):
+        startup.mark_imports()
+        profiler.start()
         self.memory = ConversationMemory()
         
-        # Set OpenAI API key in environment
-        os.environ["OPENAI_API_KEY"] = settings.openai_api_key
+        # The OpenAI client is built on first use, so startup never waits on the SDK
+        self._llm = llm
+        self._summarizer = None
+        self._client_lock = threading.Lock()
         
-        # Initialize LLM with minimal configuration
-        self.llm = ChatOpenAI(
-            model_name=settings.openai_model,
-            temperature=0.7
-        )
-        
-        # Initialize embeddings with minimal configuration
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model
-        )
+        # Initialize embeddings behind the shared cache and batching layer
+        self.embeddings = build_embeddings(embeddings)
+
+        # Every LLM call made on behalf of this bot is charged to the chat limiter
+        self.rate_limit_handler = RateLimitCallbackHandler()
+        self.async_rate_limit_handler = AsyncRateLimitCallbackHandler()
         
+        self.data_loader = None
+        self.property_index = None
         self.vector_store = None
-        self.chain = None
-        self.last_request_time = datetime.now()
+        self.retriever = None
+        self.router = None
+        self.rewriter = None
+        self.catalog_sync = None
+        self.response_cache = SemanticResponseCache() if settings.response_cache_enabled else None
+        self.system_message = DEFAULT_SYSTEM_MESSAGE
+        self.qa_prompt = QA_CHAIN_PROMPT.partial(system_message=self.system_message)
+        # Example search (and an LLM condense call) runs here while the caller searches the property index
+        self.retrieval_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval")
         
         # Initialize property data first
         self._initialize_vector_store()
         
         # Then try to load trained model
-        if self._load_trained_model():
-            print("Loaded trained model successfully!")
-        else:
-            print("No trained model found, initializing with default configuration...")
-            self._initialize_chain()
+        with startup.phase("examples"):
+            # Training exchanges matched to each question and shown as few-shot examples
+            self.example_index = ExampleIndex.load()
+            if self._load_trained_model():
+                print("Loaded trained model successfully!")
+            else:
+                print("No trained model found, initializing with default configuration...")
+
+    @property
+    def llm(self) -> BaseChatModel:
+        if self._llm is None:
+            with self._client_lock:
+                if self._llm is None:
+                    self._llm = create_chat_model()
+        return self._llm
+
+    @property
+    def summarizer(self) -> BackgroundSummarizer:
+        if self._summarizer is None:
+            self._summarizer = BackgroundSummarizer(self.llm, callbacks=[self.rate_limit_handler])
+        return self._summarizer
+
+    def warm_up(self) -> threading.Thread:
+        """Build the deferred clients in the background, e.g. while the user types."""
+        thread = threading.Thread(target=lambda: self.llm, name="client-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        """Finish pending summaries, stop background catalog syncing and write metrics and profile."""
+        if self._summarizer is not None:
+            self._summarizer.flush()
+        self.catalog_sync.stop()
+        tracer.export_metrics()
+        profiler.stop()
+
+    def prepare_fork(self) -> None:
+        """Stop background work and close database connections before forking serving workers."""
+        if self._summarizer is not None:
+            self._summarizer.flush()
+        self.catalog_sync.stop()
+        close_conversation_stores()
+        if isinstance(getattr(self.embeddings, 'store', None), EmbeddingStore):
+            self.embeddings.store.close()
+
+    def after_fork(self, conversation_flush_interval: float = None) -> None:
+        """Reopen what ``prepare_fork`` closed, in a forked worker process.
+
+        The loaded catalog and indexes are inherited as they are and only read;
+        catalog polling stays off, since each worker would otherwise re-sync its
+        own copy of the index. ``conversation_flush_interval`` optionally changes
+        how long conversation writes are batched.
+        """
+        self.retrieval_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval")
+        reopen_conversation_stores(conversation_flush_interval)
+        if isinstance(getattr(self.embeddings, 'store', None), EmbeddingStore):
+            self.embeddings.store.reopen()
 
     def _load_trained_model(self) -> bool:
-        """Load the trained model and vector store if available."""
+        """Load the trained model and vector store if available.
+
+        The trained examples serve as few-shot demonstrations when they were
+        embedded with the same model as the queries; the configured system
+        message replaces the default one.
+        """
         try:
             # Check if trained model exists
             if not os.path.exists('models/vector_store') or not os.path.exists('models/chain_config.json'):
@@ -58,38 +180,22 @@ class PropertyChatbot:
             # Load chain configuration
             with open('models/chain_config.json', 'r') as f:
                 chain_config = json.load(f)
-            
-            # Initialize chain with trained configuration
-            template = """You are a helpful property rental assistant. Use the following pieces of context to answer the question at the end.
-            If you don't know the answer, just say that you don't know, don't try to make up an answer.
-            Always check property details like maximum guests, number of bedrooms, and amenities before making recommendations.
-            If a property doesn't meet the user's requirements, explicitly state why and suggest alternatives.
-
-            Previous conversation:
-            {chat_history}
+            self.system_message = chain_config.get('system_message') or DEFAULT_SYSTEM_MESSAGE
+            self.qa_prompt = QA_CHAIN_PROMPT.partial(system_message=self.system_message)
 
-            Context:
-            {context}
+            from langchain_community.vectorstores import FAISS
 
-            Question: {question}
-            Answer:"""
-
-            QA_CHAIN_PROMPT = PromptTemplate(
-                input_variables=["context", "question", "chat_history"],
-                template=template
-            )
-
-            memory = ConversationBufferMemory(
-                memory_key="chat_history",
-                return_messages=True
-            )
-
-            self.chain = ConversationalRetrievalChain.from_llm(
-                llm=self.llm,
-                retriever=self.vector_store.as_retriever(),
-                memory=memory,
-                combine_docs_chain_kwargs={"prompt": QA_CHAIN_PROMPT}
-            )
+            vector_store = FAISS.load_local('models/vector_store', self.embeddings)
+            model_name = getattr(self.embeddings, 'model_name', settings.embedding_model)
+            trained_model = chain_config.get('embedding_model', model_name)
+            if trained_model != model_name:
+                print(f"Warning: Trained examples were embedded with {trained_model}, not {model_name}; "
+                      "matching examples by keyword only")
+            elif vector_store.index.d != self.property_index.vector_store.index.d:
+                print("Warning: Trained examples have a different embedding dimension; "
+                      "matching examples by keyword only")
+            else:
+                self.example_index.vector_store = vector_store
             
             return True
             
@@ -98,139 +204,337 @@ class PropertyChatbot:
             return False
 
     def _initialize_vector_store(self) -> None:
-        """Initialize the vector store with property data."""
-        properties = self.data_loader.get_all_properties()
-        texts = []
-        metadatas = []
-        
-        for prop in properties:
-            # Create a rich text description of the property
-            text = f"""
-            Property: {prop['name']}
-            Location: {prop['location']}
-            Price: ${prop['price']} per night
-            Status: {prop['status']}
-            Property Type: {prop['property_type']}
-            Maximum Guests: {prop['max_guests']}
-            Number of Bedrooms: {prop['number_of_bedrooms']}
-            Number of Bathrooms: {prop['number_of_bathrooms']}
-            Square Meters: {prop['square_meters']}
-            Pet Friendly: {prop['pet_friendly']}
-            Check-in Time: {prop['check_in_time']}
-            Check-out Time: {prop['check_out_time']}
-            Minimum Stay: {prop['minimum_stay']} nights
-            Cleaning Fee: ${prop['cleaning_fee']}
-            Security Deposit: ${prop['security_deposit']}
-            Amenities: {', '.join(prop['amenities'])}
-            Available months: {', '.join(prop['available_months'])}
-            """
-            texts.append(text)
-            metadatas.append(prop)
-
-        self.vector_store = FAISS.from_texts(
-            texts=texts,
-            metadatas=metadatas,
-            embedding=self.embeddings
+        """Initialize the vector store from the persistent property index.
+
+        A current warm-start snapshot restores the parsed catalog and the live
+        index in one load; otherwise the catalog is parsed and synced, and a new
+        snapshot is written for the next start.
+        """
+        with startup.phase("index"):
+            self.property_index = PropertyIndex(self.embeddings)
+            self.data_loader = load_warm_start(self.property_index)
+        if self.data_loader is not None:
+            print(f"Property index restored from snapshot: {len(self.property_index.slots)} listings")
+        else:
+            with startup.phase("data"):
+                self.data_loader = PropertyDataLoader()
+            with startup.phase("index"):
+                stats = self.property_index.sync(self.data_loader.get_all_properties())
+                save_warm_start(self.data_loader, self.property_index)
+            print(f"Property index ready: {stats['embedded']} embedded, "
+                  f"{stats['reused']} reused, {stats['removed']} removed")
+        self.vector_store = self.property_index.vector_store
+        self.retriever = PropertyRetriever(
+            property_index=self.property_index,
+            data_loader=self.data_loader
         )
+        self.router = CatalogRouter(self.data_loader)
+        self.rewriter = QuestionRewriter(self.router)
+        self.catalog_sync = CatalogSync(self.data_loader, self.property_index)
+        if self.response_cache is not None:
+            self.catalog_sync.add_listener(self.response_cache.invalidate_properties)
+        if settings.catalog_poll_interval > 0:
+            self.catalog_sync.start()
 
-    def _initialize_chain(self) -> None:
-        """Initialize the LangChain conversation chain."""
-        template = """You are a helpful property rental assistant. Use the following pieces of context to answer the question at the end.
-        If you don't know the answer, just say that you don't know, don't try to make up an answer.
-        Always check property details like maximum guests, number of bedrooms, and amenities before making recommendations.
-        If a property doesn't meet the user's requirements, explicitly state why and suggest alternatives.
+    def sync_catalog(self) -> Dict[str, int]:
+        """Apply changes in the properties source to the live index."""
+        return self.catalog_sync.sync()
 
-        Previous conversation:
-        {chat_history}
+    def _summarize_conversation(self) -> None:
+        """Schedule a background summary of the conversation if it grew enough."""
+        self.summarizer.schedule(self.memory)
 
-        Context:
-        {context}
+    def answer_locally(self, user_input: str, memory: ConversationMemory) -> Optional[str]:
+        """Answer a catalog lookup or simple filter without the LLM, or return None.
 
-        Question: {question}
-        Answer:"""
+        ``memory`` is the conversation the question belongs to, before the
+        question is added to it.
+        """
+        if not settings.router_enabled:
+            return None
+        with stage("routing"):
+            routed = self.router.route(user_input, memory)
+        if routed is None:
+            return None
+        annotate(route=routed.intent)
+        return routed.answer
 
-        QA_CHAIN_PROMPT = PromptTemplate(
-            input_variables=["context", "question", "chat_history"],
-            template=template
+    def cache_scope(self, docs: List[Document]) -> Scope:
+        """Get the cache scope of a question from its retrieved properties and their content hashes."""
+        property_ids = [str(doc.metadata['property_id']) for doc in docs]
+        return frozenset(
+            (property_id, self.property_index.hashes.get(property_id, ""))
+            for property_id in property_ids
         )
 
-        memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
+    def is_cacheable(self, user_input: str, context: str) -> bool:
+        """Check whether a question can be answered from, and stored in, the response cache.
+
+        Only a session's opening question qualifies. Once there is history
+        ``context``, the answer is generated from that history and from a
+        question rewritten with earlier constraints, so it does not depend on
+        the retrieved listings alone and must not reach other sessions.
+        Without history the question is retrieved as is.
+        """
+        return (self.response_cache is not None and not context
+                and not references_context(user_input))
+
+    def _lookup_cache(self, user_input: str,
+                      context: str) -> Tuple[Optional[str], Optional[Tuple[Retrieval, Scope]]]:
+        """Look a question up in the response cache.
+
+        Returns the answer and the key to store under: the retrieval behind the
+        scope, which the prompt reuses on a miss, and the scope itself.
+        """
+        if not self.is_cacheable(user_input, context):
+            return None, None
+        with stage("cache_lookup"):
+            embedding = self.embeddings.embed_query(user_input)
+            retrieval = Retrieval(embedding, self.retriever.retrieve_by_vector(user_input, embedding))
+            scope = self.cache_scope(retrieval.docs)
+            answer = self.response_cache.lookup(embedding, scope)
+        annotate(cache_hit=answer is not None)
+        return answer, (retrieval, scope)
+
+    def _store_cache(self, cache_key: Optional[Tuple[Retrieval, Scope]], answer: str) -> None:
+        if cache_key is not None:
+            retrieval, scope = cache_key
+            self.response_cache.store(retrieval.embedding, scope, answer)
+
+    def _build_answer_prompt(self, question: str, docs: List[Document], context: str, examples: str):
+        """Format the QA prompt; the token-budgeted history is sent only here."""
+        return self.qa_prompt.format_prompt(
+            context="\n\n".join(doc.page_content for doc in docs),
+            question=question,
+            chat_history=context,
+            examples=examples
         )
 
-        self.chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.vector_store.as_retriever(),
-            memory=memory,
-            combine_docs_chain_kwargs={"prompt": QA_CHAIN_PROMPT}
+    def _retrieve(self, question: str, retrieval: Optional[Retrieval] = None) -> Tuple[List[Document], str]:
+        """Retrieve listings and few-shot examples for a question, both searches at once.
+
+        With a ``retrieval`` already done for the question only the examples are searched.
+        """
+        with stage("retrieval"):
+            if retrieval is not None:
+                docs = retrieval.docs
+                examples = self.example_index.format(question, None, retrieval.embedding)
+            else:
+                embedding = self.embeddings.embed_query(question)
+                examples = self.retrieval_pool.submit(self.example_index.format, question, None, embedding)
+                docs = self.retriever.retrieve_by_vector(question, embedding)
+                examples = examples.result()
+        annotate(documents=len(docs))
+        return docs, examples
+
+    async def _aretrieve(self, question: str, retrieval: Optional[Retrieval] = None) -> Tuple[List[Document], str]:
+        with stage("retrieval"):
+            if retrieval is not None:
+                docs = retrieval.docs
+                examples = await asyncio.to_thread(self.example_index.format, question, None, retrieval.embedding)
+            else:
+                embedding = await self.embeddings.aembed_query(question)
+                docs, examples = await asyncio.gather(
+                    asyncio.to_thread(self.retriever.retrieve_by_vector, question, embedding),
+                    asyncio.to_thread(self.example_index.format, question, None, embedding)
+                )
+        annotate(documents=len(docs))
+        return docs, examples
+
+    def _search(self, question: str) -> List[Document]:
+        with stage("retrieval"):
+            return self.retriever.retrieve_by_vector(question, self.embeddings.embed_query(question))
+
+    async def _asearch(self, question: str) -> List[Document]:
+        with stage("retrieval"):
+            embedding = await self.embeddings.aembed_query(question)
+            return await asyncio.to_thread(self.retriever.retrieve_by_vector, question, embedding)
+
+    def _merge_documents(self, condensed: List[Document], raw: List[Document]) -> List[Document]:
+        """Fuse the listings found for the condensed and for the raw question."""
+        by_id = {}
+        for doc in raw + condensed:
+            by_id[doc.metadata['property_id']] = doc
+        ranked = reciprocal_rank_fusion(
+            [[doc.metadata['property_id'] for doc in docs] for docs in (condensed, raw)], settings.rrf_k
         )
+        docs = context_builder.select_documents([by_id[property_id] for property_id in ranked[:self.retriever.k]])
+        annotate(documents=len(docs))
+        return docs
 
-    def _check_rate_limit(self) -> None:
-        """Check and enforce rate limiting."""
-        now = datetime.now()
-        time_diff = (now - self.last_request_time).total_seconds()
-        
-        if time_diff < 60 / settings.max_requests_per_minute:
-            sleep_time = (60 / settings.max_requests_per_minute) - time_diff
-            time.sleep(sleep_time)
-        
-        self.last_request_time = datetime.now()
+    def _condense(self, user_input: str, context: str) -> str:
+        with stage("condense"):
+            return self.llm.invoke(
+                CONDENSE_QUESTION_PROMPT.format_prompt(question=user_input, chat_history=context),
+                config={"callbacks": [self.rate_limit_handler]}
+            ).content
 
-    def _summarize_conversation(self) -> None:
-        """Summarize the conversation using the LLM."""
-        if not self.memory.should_summarize():
-            return
+    async def _acondense(self, user_input: str, context: str) -> str:
+        with stage("condense"):
+            return (await self.llm.ainvoke(
+                CONDENSE_QUESTION_PROMPT.format_prompt(question=user_input, chat_history=context),
+                config={"callbacks": [self.async_rate_limit_handler]}
+            )).content
 
-        messages = self.memory.get_recent_messages()
-        conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
-        
-        summary_prompt = f"""
-        Please provide a concise summary of the following conversation, focusing on:
-        1. The user's specific requirements (number of guests, location, dates, etc.)
-        2. Any preferences or constraints mentioned
-        3. Any properties that were discussed or recommended
-        4. Any issues or concerns raised about specific properties
-
-        Conversation:
-        {conversation_text}
+    def _rewrite(self, user_input: str, memory: Optional[ConversationMemory]) -> str:
+        with stage("rewrite"):
+            return self.rewriter.rewrite(user_input, memory or self.memory)
+
+    def prepare_prompt(self, user_input: str, context: str, memory: ConversationMemory = None,
+                       retrieval: Optional[Retrieval] = None):
+        """Turn a follow-up into a standalone question, retrieve, and build the prompt.
+
+        With ``CONDENSE_MODE=heuristic`` (the default) follow-ups are rewritten
+        locally for retrieval, so the turn makes exactly one LLM call. With
+        ``llm`` the condense call runs while the raw question is retrieved, and
+        both results are fused. ``memory`` defaults to the chatbot's own.
+        ``retrieval`` is what a response cache miss already retrieved for
+        ``user_input``; it is reused whenever that question is searched as is.
         """
-        
-        try:
-            with get_openai_callback() as cb:
-                response = self.llm.invoke([{"role": "user", "content": summary_prompt}])
-                self.memory.update_summary(response.content)
-        except Exception as e:
-            print(f"Warning: Could not summarize conversation: {str(e)}")
+        question = user_input
+        if not context or settings.condense_mode == "none":
+            docs, examples = self._retrieve(user_input, retrieval)
+        elif settings.condense_mode == "llm":
+            condensed = self.retrieval_pool.submit(
+                contextvars.copy_context().run, self._condense, user_input, context
+            )
+            docs, examples = self._retrieve(user_input, retrieval)
+            question = condensed.result()
+            if question != user_input:
+                docs = self._merge_documents(self._search(question), docs)
+        else:
+            rewritten = self._rewrite(user_input, memory)
+            docs, examples = self._retrieve(rewritten, retrieval if rewritten == user_input else None)
+        return self._build_answer_prompt(question, docs, context, examples)
 
-    def get_response(self, user_input: str) -> str:
-        """Get a response from the chatbot."""
-        try:
-            self._check_rate_limit()
-            
-            # Add user message to memory
+    async def aprepare_prompt(self, user_input: str, context: str, memory: ConversationMemory = None,
+                              retrieval: Optional[Retrieval] = None):
+        """Async version of ``prepare_prompt``."""
+        question = user_input
+        if not context or settings.condense_mode == "none":
+            docs, examples = await self._aretrieve(user_input, retrieval)
+        elif settings.condense_mode == "llm":
+            question, (docs, examples) = await asyncio.gather(
+                self._acondense(user_input, context), self._aretrieve(user_input, retrieval)
+            )
+            if question != user_input:
+                docs = self._merge_documents(await self._asearch(question), docs)
+        else:
+            rewritten = self._rewrite(user_input, memory)
+            docs, examples = await self._aretrieve(rewritten, retrieval if rewritten == user_input else None)
+        return self._build_answer_prompt(question, docs, context, examples)
+
+    def _finish_turn(self, user_input: str, answer: str) -> None:
+        """Persist a completed turn and summarize if needed."""
+        with stage("persistence"):
             self.memory.add_message("user", user_input)
-            
-            # Get context from memory
-            context = self.memory.get_context()
-            
-            # Get response from chain
-            with get_openai_callback() as cb:
-                response = self.chain({"question": user_input, "chat_history": context})
-                answer = response['answer']
-            
-            # Add assistant response to memory
             self.memory.add_message("assistant", answer)
-            
-            # Check if we should summarize
-            self._summarize_conversation()
-            
-            return answer
-            
-        except Exception as e:
-            error_message = f"I apologize, but I encountered an error: {str(e)}"
-            self.memory.add_message("assistant", error_message)
-            return error_message
+        self._summarize_conversation()
+
+    def get_response(self, user_input: str) -> str:
+        """Get a response from the chatbot."""
+        with tracer.turn() as trace:
+            try:
+                # Get context from memory, then add the user message to it
+                with stage("history"):
+                    context = self.memory.get_context()
+                answer = self.answer_locally(user_input, self.memory)
+                with stage("persistence"):
+                    self.memory.add_message("user", user_input)
+
+                if answer is None:
+                    answer, cache_key = self._lookup_cache(user_input, context)
+                if answer is None:
+                    prompt = self.prepare_prompt(user_input, context,
+                                                 retrieval=cache_key[0] if cache_key else None)
+                    with stage("generation"):
+                        response = self.llm.invoke(prompt, config={"callbacks": [self.rate_limit_handler]})
+                    answer = response.content
+                    self._store_cache(cache_key, answer)
+
+                # Add assistant response to memory
+                with stage("persistence"):
+                    self.memory.add_message("assistant", answer)
+
+                # Check if we should summarize
+                self._summarize_conversation()
+
+                return answer
+
+            except Exception as e:
+                trace.error = str(e)
+                error_message = f"I apologize, but I encountered an error: {str(e)}"
+                self.memory.add_message("assistant", error_message)
+                return error_message
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        """Yield the response token by token as it arrives from the LLM.
+
+        The turn is written to memory (and summarized) only after the last token.
+        """
+        with tracer.turn() as trace:
+            answer = ""
+            try:
+                with stage("history"):
+                    context = self.memory.get_context()
+                cached, cache_key = self.answer_locally(user_input, self.memory), None
+                if cached is None:
+                    cached, cache_key = self._lookup_cache(user_input, context)
+                if cached is not None:
+                    answer = cached
+                    mark_first_token()
+                    yield answer
+                else:
+                    prompt = self.prepare_prompt(user_input, context,
+                                                 retrieval=cache_key[0] if cache_key else None)
+                    with stage("generation"):
+                        for chunk in self.llm.stream(prompt, config={"callbacks": [self.rate_limit_handler]}):
+                            if chunk.content:
+                                mark_first_token()
+                                answer += chunk.content
+                                yield chunk.content
+                    self._store_cache(cache_key, answer)
+            except Exception as e:
+                trace.error = str(e)
+                error_message = f"I apologize, but I encountered an error: {str(e)}"
+                answer = answer + error_message if answer else error_message
+                yield error_message
+            self._finish_turn(user_input, answer)
+
+    async def astream_response(self, user_input: str) -> AsyncIterator[str]:
+        """Async version of ``stream_response`` that never blocks the event loop."""
+        with tracer.turn() as trace:
+            answer = ""
+            try:
+                with stage("history"):
+                    context = await asyncio.to_thread(self.memory.get_context)
+                cached = await asyncio.to_thread(self.answer_locally, user_input, self.memory)
+                cache_key = None
+                if cached is None:
+                    cached, cache_key = await asyncio.to_thread(self._lookup_cache, user_input, context)
+                if cached is not None:
+                    answer = cached
+                    mark_first_token()
+                    yield answer
+                else:
+                    prompt = await self.aprepare_prompt(user_input, context,
+                                                        retrieval=cache_key[0] if cache_key else None)
+                    with stage("generation"):
+                        async for chunk in self.llm.astream(
+                            prompt, config={"callbacks": [self.async_rate_limit_handler]}
+                        ):
+                            if chunk.content:
+                                mark_first_token()
+                                answer += chunk.content
+                                yield chunk.content
+                    await asyncio.to_thread(self._store_cache, cache_key, answer)
+            except Exception as e:
+                trace.error = str(e)
+                error_message = f"I apologize, but I encountered an error: {str(e)}"
+                answer = answer + error_message if answer else error_message
+                yield error_message
+            await asyncio.to_thread(self._finish_turn, user_input, answer)
+
 
 def main():
     """Main function to run the chatbot."""
@@ -239,16 +543,23 @@ def main():
     print("-" * 50)
     
     chatbot = PropertyChatbot()
+    print(startup.report())
+    chatbot.warm_up()
     
     while True:
         user_input = input("\nYou: ").strip()
         
         if user_input.lower() in ['quit', 'exit', 'bye']:
+            chatbot.close()
+            if settings.router_enabled:
+                print(chatbot.router.report())
             print("\nThank you for using the Property Rental Assistant. Goodbye!")
             break
         
-        response = chatbot.get_response(user_input)
-        print(f"\nAssistant: {response}")
+        print("\nAssistant: ", end="", flush=True)
+        for token in chatbot.stream_response(user_input):
+            print(token, end="", flush=True)
+        print()
 
 if __name__ == "__main__":
     main() 
@@ -0,0 +1,124 @@
+import os
+import threading
+from typing import Any, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+
+from .config import settings
+
+
+_openai_clients = {}
+_openai_clients_lock = threading.Lock()
+
+
+def get_openai_clients() -> Tuple[Any, Any]:
+    """Get this process's sync and async OpenAI clients.
+
+    Chat and embedding calls share one pooled keep-alive HTTP connection pool
+    per client instead of one per model object. The clients are built per
+    process, so a forked server worker never reuses its parent's sockets.
+    """
+    pid = os.getpid()
+    clients = _openai_clients.get(pid)
+    if clients is None:
+        with _openai_clients_lock:
+            clients = _openai_clients.get(pid)
+            if clients is None:
+                import httpx
+                import openai
+
+                limits = httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry
+                )
+                timeout = httpx.Timeout(settings.http_timeout, connect=5.0)
+                api_key = settings.require_openai_api_key()
+                clients = (
+                    openai.OpenAI(api_key=api_key, http_client=httpx.Client(limits=limits, timeout=timeout)),
+                    openai.AsyncOpenAI(api_key=api_key,
+                                       http_client=httpx.AsyncClient(limits=limits, timeout=timeout))
+                )
+                _openai_clients.clear()
+                _openai_clients[pid] = clients
+    return clients
+
+
+def create_chat_model(**kwargs: Any) -> BaseChatModel:
+    """Build the chat model selected by ``settings.llm_provider``.
+
+    ``openai`` calls the API, ``fake`` answers locally and ``cassette`` replays
+    answers recorded from the API (recording missing ones with
+    ``CASSETTE_MODE=record``). The stand-ins wait ``settings.fake_llm_latency``
+    per call.
+    """
+    provider = settings.llm_provider.lower()
+    if provider == "openai":
+        return _create_openai_chat_model(**kwargs)
+    from .fakes import CassetteChatModel, FakeChatModel, get_cassette
+
+    if provider == "fake":
+        return FakeChatModel(latency=settings.fake_llm_latency)
+    if provider == "cassette":
+        recording = settings.cassette_mode.lower() == "record"
+        return CassetteChatModel(
+            cassette=get_cassette(),
+            model=_create_openai_chat_model(**kwargs) if recording else None,
+            model_name=kwargs.get('model_name', settings.openai_model),
+            latency=settings.fake_llm_latency
+        )
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def _create_openai_chat_model(**kwargs: Any) -> BaseChatModel:
+    """Build the OpenAI chat model on the shared clients; the SDK is only imported here."""
+    os.environ["OPENAI_API_KEY"] = settings.require_openai_api_key()
+    from langchain_openai import ChatOpenAI
+
+    sync_client, async_client = get_openai_clients()
+    kwargs.setdefault('model_name', settings.openai_model)
+    kwargs.setdefault('temperature', 0.7)
+    kwargs.setdefault('client', sync_client.chat.completions)
+    kwargs.setdefault('async_client', async_client.chat.completions)
+    return ChatOpenAI(**kwargs)
+
+
+class LazyOpenAIEmbeddings(Embeddings):
+    """OpenAI embeddings whose client is built on the first embedding call.
+
+    Startup paths that only load persisted vectors never import the OpenAI SDK
+    or need an API key. A forked process builds its own client.
+    """
+
+    def __init__(self, model: str = None):
+        self.model = model or settings.embedding_model
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Embeddings:
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    os.environ["OPENAI_API_KEY"] = settings.require_openai_api_key()
+                    from langchain_openai import OpenAIEmbeddings
+
+                    sync_client, async_client = get_openai_clients()
+                    self._client = OpenAIEmbeddings(model=self.model, client=sync_client.embeddings,
+                                                    async_client=async_client.embeddings)
+                    self._pid = os.getpid()
+        return self._client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.client.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.client.aembed_query(text)
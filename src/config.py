@@ -11,22 +11,155 @@ class Settings(BaseSettings):
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
 
+    # Embedding Provider: "openai", "hashing" (local, no dependencies), "sentence-transformers",
+    # or the "fake" and "cassette" stand-ins below
+    embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "openai")
+    local_embedding_dimensions: int = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "1024"))
+    # Processes used by the hashing backend for large batches; 0 uses every core
+    local_embedding_workers: int = int(os.getenv("LOCAL_EMBEDDING_WORKERS", "0"))
+    local_embedding_model: str = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+    # Stand-in Backends for running without the OpenAI API
+    # LLM Provider: "openai", "fake" (fixed local answer) or "cassette" (replays recorded answers)
+    llm_provider: str = os.getenv("LLM_PROVIDER", "openai")
+    # Seconds injected per call by the fake and cassette backends
+    fake_llm_latency: float = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+    fake_embedding_latency: float = float(os.getenv("FAKE_EMBEDDING_LATENCY", "0.05"))
+    cassette_path: str = os.getenv("CASSETTE_PATH", "data/cassettes/openai.json")
+    # "replay" fails on requests that were never recorded; "record" sends them to OpenAI and saves them
+    cassette_mode: str = os.getenv("CASSETTE_MODE", "replay")
+
+    # Embedding Cache Configuration
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "models/embedding_cache.sqlite")
+    embedding_cache_lru_size: int = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "10000"))
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    embedding_max_concurrency: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+
     # Memory Configuration
     max_memory_messages: int = int(os.getenv("MAX_MEMORY_MESSAGES", "10"))
     memory_summary_threshold: int = int(os.getenv("MEMORY_SUMMARY_THRESHOLD", "5"))
+    # Background summaries run once this many tokens were added since the last one
+    summary_token_threshold: int = int(os.getenv("SUMMARY_TOKEN_THRESHOLD", "400"))
+    summary_debounce_seconds: float = float(os.getenv("SUMMARY_DEBOUNCE_SECONDS", "2.0"))
+    sessions_dir: str = os.getenv("SESSIONS_DIR", "data/sessions")
+    conversation_store_path: str = os.getenv("CONVERSATION_STORE_PATH", "data/conversations.sqlite")
+    # Writes are committed together at most this many seconds (or writes) apart; 0 commits each one
+    conversation_flush_interval: float = float(os.getenv("CONVERSATION_FLUSH_INTERVAL", "1.0"))
+    conversation_flush_batch: int = int(os.getenv("CONVERSATION_FLUSH_BATCH", "100"))
+    # Drop a session's messages once they are folded into its summary; false keeps the full log
+    conversation_compact_on_summary: bool = os.getenv("CONVERSATION_COMPACT_ON_SUMMARY", "true").lower() == "true"
+    # Token budgets for the prompt context
+    context_history_tokens: int = int(os.getenv("CONTEXT_HISTORY_TOKENS", "1000"))
+    context_summary_tokens: int = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "300"))
+    context_documents_tokens: int = int(os.getenv("CONTEXT_DOCUMENTS_TOKENS", "1500"))
+    memory_tail_window: int = int(os.getenv("MEMORY_TAIL_WINDOW", "50"))
+    # Seconds before an idle session is dropped from the engine's memory; 0 keeps sessions
+    session_idle_timeout: float = float(os.getenv("SESSION_IDLE_TIMEOUT", "1800"))
 
     # Rate Limiting
     max_requests_per_minute: int = int(os.getenv("MAX_REQUESTS_PER_MINUTE", "60"))
+    max_tokens_per_minute: int = int(os.getenv("MAX_TOKENS_PER_MINUTE", "90000"))
+    embedding_requests_per_minute: int = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000"))
+    embedding_tokens_per_minute: int = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+    session_requests_per_minute: int = int(os.getenv("SESSION_REQUESTS_PER_MINUTE", "20"))
+    # Max requests a limiter lets through at once; 0 allows the full per-minute budget
+    rate_limit_burst: int = int(os.getenv("RATE_LIMIT_BURST", "0"))
 
     # Data Configuration
     properties_file: str = os.getenv("PROPERTIES_FILE", "data/properties.csv")
+    property_index_dir: str = os.getenv("PROPERTY_INDEX_DIR", "models/property_index")
+    catalog_poll_interval: float = float(os.getenv("CATALOG_POLL_INTERVAL", "0"))
+    # Restore the parsed catalog and index from one memory-mapped snapshot at startup
+    warm_start_enabled: bool = os.getenv("WARM_START_ENABLED", "true").lower() == "true"
+
+    # Retrieval Configuration
+    retrieval_k: int = int(os.getenv("RETRIEVAL_K", "3"))
+    # How follow-ups become standalone questions for retrieval: "heuristic" (no LLM call),
+    # "llm" (a condense call, run alongside retrieval of the raw question) or "none"
+    condense_mode: str = os.getenv("CONDENSE_MODE", "heuristic")
+    prefilter_exact_limit: int = int(os.getenv("PREFILTER_EXACT_LIMIT", "2000"))
+    # How retrieved listings are written into the prompt: "compact" key:value pairs or "text" lines
+    document_style: str = os.getenv("DOCUMENT_STYLE", "compact")
+    document_relevant_fields_only: bool = os.getenv("DOCUMENT_RELEVANT_FIELDS_ONLY", "true").lower() == "true"
+    # Fuse BM25 keyword matches with vector results (reciprocal rank fusion)
+    hybrid_retrieval_enabled: bool = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+    # Candidates taken from each ranking before fusion
+    hybrid_fetch_k: int = int(os.getenv("HYBRID_FETCH_K", "10"))
+    rrf_k: int = int(os.getenv("RRF_K", "60"))
+    bm25_k1: float = float(os.getenv("BM25_K1", "1.5"))
+    bm25_b: float = float(os.getenv("BM25_B", "0.75"))
+    # Example exchanges from the training conversations added to each answer prompt; 0 disables
+    training_data_file: str = os.getenv("TRAINING_DATA_FILE", "data/training/conversations.json")
+    example_k: int = int(os.getenv("EXAMPLE_K", "2"))
+
+    # Fast-path Router Configuration
+    # Answer field lookups and simple filters from the catalog without an LLM call
+    router_enabled: bool = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+    # Listings shown in a locally answered filter reply
+    router_max_results: int = int(os.getenv("ROUTER_MAX_RESULTS", "5"))
+
+    # Training Configuration
+    training_shard_dir: str = os.getenv("TRAINING_SHARD_DIR", "models/training_shards")
+    # Examples embedded and checkpointed together
+    training_shard_size: int = int(os.getenv("TRAINING_SHARD_SIZE", "5000"))
+    # Conversations handed to each extraction worker at a time
+    training_batch_size: int = int(os.getenv("TRAINING_BATCH_SIZE", "1000"))
+    # Extraction processes; 0 uses every CPU
+    training_workers: int = int(os.getenv("TRAINING_WORKERS", "0"))
+
+    # Vector Index Configuration: flat, sq, ivf, ivfsq, ivfpq, hnsw or hnswsq
+    vector_index_type: str = os.getenv("VECTOR_INDEX_TYPE", "flat")
+    # IVF lists; 0 picks about 4 * sqrt(listings)
+    vector_index_nlist: int = int(os.getenv("VECTOR_INDEX_NLIST", "0"))
+    vector_index_nprobe: int = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+    # PQ sub-quantizers; 0 picks the largest divisor of the dimension up to 64
+    vector_index_pq_m: int = int(os.getenv("VECTOR_INDEX_PQ_M", "0"))
+    vector_index_hnsw_m: int = int(os.getenv("VECTOR_INDEX_HNSW_M", "32"))
+    vector_index_ef_search: int = int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64"))
+
+    # Response Cache Configuration
+    response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    response_cache_threshold: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+    response_cache_near_miss_margin: float = float(os.getenv("RESPONSE_CACHE_NEAR_MISS_MARGIN", "0.05"))
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    response_cache_ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
+    # Observability Configuration
+    # One JSON line per turn with stage timings, tokens and cost; empty disables
+    trace_file: str = os.getenv("TRACE_FILE", "")
+    # Prometheus text file rewritten at most every METRICS_EXPORT_INTERVAL seconds; empty disables
+    metrics_file: str = os.getenv("METRICS_FILE", "")
+    metrics_export_interval: float = float(os.getenv("METRICS_EXPORT_INTERVAL", "10"))
+    # USD per 1K tokens, used for the cost of each turn
+    llm_prompt_price_per_1k: float = float(os.getenv("LLM_PROMPT_PRICE_PER_1K", "0.0005"))
+    llm_completion_price_per_1k: float = float(os.getenv("LLM_COMPLETION_PRICE_PER_1K", "0.0015"))
+    # Profiler: "none", "cprofile" or "py-spy"; the output defaults to profile.pstats / profile.svg
+    profile_mode: str = os.getenv("PROFILE_MODE", "none")
+    profile_output: str = os.getenv("PROFILE_OUTPUT", "")
+
+    # Server Configuration
+    server_host: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    server_port: int = int(os.getenv("SERVER_PORT", "8000"))
+    # Worker processes sharing the listening socket and the loaded index; 0 uses every CPU
+    server_workers: int = int(os.getenv("SERVER_WORKERS", "0"))
+    # Keep-alive connection pool shared by the chat and embedding clients of each process
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    http_timeout: float = float(os.getenv("HTTP_TIMEOUT", "60"))
 
     class Config:
         env_file = ".env"
 
+    def require_openai_api_key(self) -> str:
+        """Get the OpenAI API key, raising if it is not configured.
+
+        Checked when an OpenAI client is first built rather than at import, so
+        local backends, tooling and tests run without a key.
+        """
+        if not self.openai_api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+        return self.openai_api_key
+
 # Create global settings instance
 settings = Settings()
-
-# Validate required settings
-if not settings.openai_api_key:
-    raise ValueError("OPENAI_API_KEY environment variable is required") 
\ No newline at end of file
@@ -0,0 +1,118 @@
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from langchain.schema import Document
+
+from .config import settings
+from .metrics import metrics
+from .rate_limiter import estimate_tokens
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_failed = False
+
+
+def _get_encoding():
+    """Load the tiktoken encoding for the chat model once; None if it is unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken
+                try:
+                    _encoding = tiktoken.encoding_for_model(settings.openai_model)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                _encoding_failed = True
+                print(f"Warning: Could not load tokenizer, estimating token counts: {str(e)}")
+    return _encoding
+
+
+@lru_cache(maxsize=10000)
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text with the chat model's tokenizer."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most ``max_tokens`` tokens, keeping its end."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[-max_tokens * 4:]
+    return encoding.decode(encoding.encode(text)[-max_tokens:])
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Count the tokens of a formatted message, caching the count on the message."""
+    tokens = message.get('tokens')
+    if tokens is None:
+        tokens = count_tokens(f"{message['role']}: {message['content']}")
+        message['tokens'] = tokens
+    return tokens
+
+
+class ContextBuilder:
+    """Assembles prompt context under explicit token budgets.
+
+    The conversation summary gets at most ``summary_tokens``, the summary plus
+    the most recent turns at most ``history_tokens``, and the retrieved listings
+    at most ``documents_tokens``. Turns that no longer fit drop out of the
+    prompt; they stay in the conversation store and reach the model through the
+    background summary.
+    """
+
+    def __init__(self, history_tokens: int = None, summary_tokens: int = None,
+                 documents_tokens: int = None):
+        self.history_tokens = history_tokens or settings.context_history_tokens
+        self.summary_tokens = summary_tokens or settings.context_summary_tokens
+        self.documents_tokens = documents_tokens or settings.context_documents_tokens
+
+    def build_history(self, memory) -> str:
+        """Format the summary and as many recent messages as fit the history budget."""
+        context = []
+        used = 0
+
+        if memory.summary:
+            summary = truncate_to_tokens(memory.summary, self.summary_tokens)
+            context.append(f"Previous conversation summary: {summary}")
+            used += count_tokens(context[0])
+
+        recent_messages = []
+        for msg in reversed(memory.get_recent_messages()):
+            tokens = message_tokens(msg)
+            if used + tokens > self.history_tokens:
+                break
+            recent_messages.append(msg)
+            used += tokens
+        if recent_messages:
+            context.append("\nRecent messages:")
+            for msg in reversed(recent_messages):
+                context.append(f"{msg['role']}: {msg['content']}")
+
+        metrics.observe_size("context_history_tokens", used)
+        return "\n".join(context)
+
+    def select_documents(self, docs: List[Document]) -> List[Document]:
+        """Keep the best-ranked documents that fit the documents budget (at least one)."""
+        selected = []
+        used = 0
+        for doc in docs:
+            tokens = count_tokens(doc.page_content)
+            if selected and used + tokens > self.documents_tokens:
+                break
+            selected.append(doc)
+            used += tokens
+        metrics.observe_size("context_document_tokens", used)
+        return selected
+
+
+context_builder = ContextBuilder()
@@ -0,0 +1,260 @@
+import atexit
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import settings
+
+
+class ConversationStore:
+    """Append-only message log for every session, backed by SQLite in WAL mode.
+
+    Messages are inserted, never rewritten, so saving a turn costs the same no
+    matter how long the conversation is. Writes are grouped into one commit per
+    ``flush_interval`` seconds (or ``batch_size`` writes) instead of one sync per
+    message; call ``flush`` to force pending writes out. Sessions are read
+    lazily, loading only a tail window of recent messages.
+
+    Several processes may share one database: sequence numbers are allocated
+    inside the write transaction, and a writer waits up to ``BUSY_TIMEOUT_MS``
+    for another process's transaction instead of failing. Processes serving
+    the same sessions should use ``flush_interval=0`` so no write transaction
+    stays open between turns.
+    """
+
+    BUSY_TIMEOUT_MS = 5000
+
+    def __init__(self, path: str = None, flush_interval: float = None, batch_size: int = None):
+        self.path = path or settings.conversation_store_path
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else settings.conversation_flush_interval)
+        self.batch_size = batch_size or settings.conversation_flush_batch
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, "
+            "content TEXT NOT NULL, timestamp TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, message_count INTEGER NOT NULL DEFAULT 0, "
+            "summary TEXT NOT NULL DEFAULT '', summarized_count INTEGER NOT NULL DEFAULT 0, "
+            "last_summary_time TEXT)"
+        )
+        self._pending_writes = 0
+        self._in_transaction = False
+        self._flush_timer = None
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _begin(self) -> None:
+        if not self._in_transaction:
+            # Take the write lock up front; upgrading a read transaction can fail under contention
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._in_transaction = True
+
+    def _written(self) -> None:
+        """Commit now or schedule the batched commit for a write just made."""
+        self._pending_writes += 1
+        if self.flush_interval <= 0 or self._pending_writes >= self.batch_size:
+            self._commit()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _commit(self) -> None:
+        if self._in_transaction:
+            self._conn.execute("COMMIT")
+            self._in_transaction = False
+        self._pending_writes = 0
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _rollback(self) -> None:
+        """Drop the open transaction, including other writes batched into it."""
+        if self._in_transaction:
+            self._conn.execute("ROLLBACK")
+            self._in_transaction = False
+        self._pending_writes = 0
+
+    def flush(self) -> None:
+        """Commit every pending write."""
+        with self._lock:
+            if not self._closed:
+                self._commit()
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session's message count and summary state, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_count, summary, summarized_count, last_summary_time "
+                "FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'message_count': row[0],
+            'summary': row[1],
+            'summarized_count': row[2],
+            'last_summary_time': row[3]
+        }
+
+    def load_messages(self, session_id: str, start: int = 0, end: int = None) -> List[Dict[str, Any]]:
+        """Get the messages with ``start <= seq < end`` in order."""
+        query = "SELECT role, content, timestamp FROM messages WHERE session_id = ? AND seq >= ?"
+        params: List[Any] = [session_id, start]
+        if end is not None:
+            query += " AND seq < ?"
+            params.append(end)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY seq", params).fetchall()
+        return [{'role': role, 'content': content, 'timestamp': timestamp}
+                for role, content, timestamp in rows]
+
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> int:
+        """Append one message to a session's log and get its sequence number.
+
+        The number is taken from the session's message count in the same
+        transaction as the insert, so processes appending to one session never
+        overwrite each other's messages.
+        """
+        with self._lock:
+            self._begin()
+            try:
+                message_count = self._conn.execute(
+                    "INSERT INTO sessions (session_id, message_count) VALUES (?, 1) "
+                    "ON CONFLICT(session_id) DO UPDATE SET message_count = message_count + 1 "
+                    "RETURNING message_count",
+                    (session_id,)
+                ).fetchone()[0]
+                self._conn.execute(
+                    "INSERT INTO messages (session_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, message_count - 1, message['role'], message['content'], message['timestamp'])
+                )
+            except sqlite3.Error:
+                self._rollback()
+                raise
+            self._written()
+        return message_count - 1
+
+    def save_summary(self, session_id: str, summary: str, summarized_count: int,
+                     last_summary_time: str) -> None:
+        """Record a session's summary and how many messages it covers."""
+        with self._lock:
+            self._begin()
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, summary, summarized_count, last_summary_time) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET "
+                "summary = excluded.summary, summarized_count = excluded.summarized_count, "
+                "last_summary_time = excluded.last_summary_time",
+                (session_id, summary, summarized_count, last_summary_time)
+            )
+            self._written()
+
+    def clear_session(self, session_id: str) -> None:
+        """Delete a session's messages and summary, keeping the session itself."""
+        with self._lock:
+            self._begin()
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, message_count, summary, summarized_count) "
+                "VALUES (?, 0, '', 0)", (session_id,)
+            )
+            self._commit()
+
+    def compact(self, retain_summarized: int = 0, session_id: Optional[str] = None) -> int:
+        """Drop messages already folded into their session's summary.
+
+        The last ``retain_summarized`` summarized messages of each session are
+        kept. With ``session_id`` only that session is compacted; otherwise the
+        WAL is checkpointed and truncated afterwards. Returns how many messages
+        were removed.
+        """
+        query = ("DELETE FROM messages WHERE seq < (SELECT s.summarized_count - ? FROM sessions s "
+                 "WHERE s.session_id = messages.session_id)")
+        params: Tuple = (retain_summarized,)
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params += (session_id,)
+        with self._lock:
+            self._commit()
+            self._begin()
+            removed = self._conn.execute(query, params).rowcount
+            self._commit()
+            if session_id is None:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def session_ids(self) -> List[str]:
+        """Get the ids of every stored session."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM sessions")]
+
+    def close(self) -> None:
+        """Flush pending writes and close the database."""
+        with self._lock:
+            if self._closed:
+                return
+            self._commit()
+            self._conn.close()
+            self._closed = True
+
+    def reopen(self) -> None:
+        """Open a new connection after ``close``, e.g. in a forked worker process.
+
+        SQLite connections must not cross ``fork``, so the parent closes the
+        store before forking and each child reopens it.
+        """
+        with self._lock:
+            if self._closed:
+                self._conn = self._connect()
+                self._closed = False
+
+
+_stores: Dict[str, ConversationStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_conversation_store(path: str = None) -> ConversationStore:
+    """Get the process-wide store for a database path; it is flushed at exit."""
+    path = path or settings.conversation_store_path
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = ConversationStore(path)
+            _stores[path] = store
+            atexit.register(store.close)
+        return store
+
+
+def close_conversation_stores() -> None:
+    """Close every process-wide store, e.g. before forking worker processes."""
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+
+
+def reopen_conversation_stores(flush_interval: float = None) -> None:
+    """Reopen the stores closed by ``close_conversation_stores`` in a forked worker.
+
+    ``flush_interval`` optionally changes how long their writes are batched.
+    """
+    with _stores_lock:
+        for store in _stores.values():
+            store.reopen()
+            if flush_interval is not None:
+                store.flush_interval = flush_interval
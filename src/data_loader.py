@@ -1,57 +1,243 @@
-import pandas as pd
-from typing import List, Dict, Any
+import os
+from collections.abc import Sequence
+import numpy as np
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Optional
 from .config import settings
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class PropertyRecords(Sequence):
+    """Read-only view of catalog rows; each row is turned into a dict only when accessed."""
+
+    def __init__(self, catalog: "CatalogIndex", positions: np.ndarray):
+        self._catalog = catalog
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PropertyRecords(self._catalog, self._positions[i])
+        return self._catalog.row(int(self._positions[i]))
+
+    def property_ids(self) -> List[int]:
+        """Get the property ids in this view without materializing the rows."""
+        ids = self._catalog.columns['property_id']
+        return [ids[position] for position in self._positions]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Materialize every row as a dictionary."""
+        return [self._catalog.row(int(position)) for position in self._positions]
+
+
+class CatalogIndex:
+    """Immutable inverted indexes over one loaded catalog.
+
+    Categorical columns (status, lowercase location, amenities, months, pets) map
+    each value to a boolean row bitmap, and numeric columns keep a sorted copy
+    for range lookups, so filters combine as bitmap intersections instead of
+    scanning the frame.
+    """
+
+    def __init__(self, properties_df: "pd.DataFrame"):
+        self.size = len(properties_df)
+        self.columns: Dict[str, list] = {
+            column: properties_df[column].tolist() for column in properties_df.columns
+        }
+        self.positions_by_id: Dict[int, int] = {
+            property_id: i for i, property_id in enumerate(self.columns['property_id'])
+        }
+        self.locations: Dict[str, str] = {}
+        for location in self.columns['location']:
+            if isinstance(location, str):
+                self.locations.setdefault(location.lower(), location)
+
+        self.status = self._bitmaps((value,) for value in self.columns['status'])
+        self.location = self._bitmaps(
+            (str(value).lower(),) for value in self.columns['location']
+        )
+        self.amenity = self._bitmaps(
+            [item.lower() for item in items] for items in self.columns['amenities']
+        )
+        self.month = self._bitmaps(
+            [month.lower() for month in months] for months in self.columns['available_months']
+        )
+        self.pet_friendly = np.array(
+            [str(value).lower() == 'yes' for value in self.columns['pet_friendly']], dtype=bool
+        )
+        self.sorted = {
+            column: self._sorted(properties_df[column].to_numpy())
+            for column in ('price', 'max_guests')
+        }
+
+    def _bitmaps(self, values_per_row: Iterable[Iterable[str]]) -> Dict[str, np.ndarray]:
+        positions: Dict[str, List[int]] = {}
+        for i, values in enumerate(values_per_row):
+            for value in values:
+                positions.setdefault(value, []).append(i)
+        bitmaps = {}
+        for value, rows in positions.items():
+            bitmap = np.zeros(self.size, dtype=bool)
+            bitmap[rows] = True
+            bitmaps[value] = bitmap
+        return bitmaps
+
+    @staticmethod
+    def _sorted(values: np.ndarray) -> tuple:
+        order = np.argsort(values, kind='stable')
+        return values[order], order
+
+    def lookup(self, bitmaps: Dict[str, np.ndarray], value: str) -> np.ndarray:
+        """Get the row bitmap for a value, all-false when it is unknown."""
+        bitmap = bitmaps.get(value)
+        return bitmap if bitmap is not None else np.zeros(self.size, dtype=bool)
+
+    def range(self, column: str, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Get the row bitmap for ``low <= column <= high`` using binary search."""
+        values, order = self.sorted[column]
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        end = len(values) if high is None else np.searchsorted(values, high, side='right')
+        bitmap = np.zeros(self.size, dtype=bool)
+        bitmap[order[start:end]] = True
+        return bitmap
+
+    def row(self, position: int) -> Dict[str, Any]:
+        """Materialize one row as a dictionary."""
+        return {column: values[position] for column, values in self.columns.items()}
+
+    def records(self, bitmap: Optional[np.ndarray] = None) -> PropertyRecords:
+        """Get a view over the rows set in ``bitmap`` (all rows when None)."""
+        if bitmap is None:
+            return PropertyRecords(self, np.arange(self.size))
+        return PropertyRecords(self, np.flatnonzero(bitmap))
+
+
 class PropertyDataLoader:
-    def __init__(self):
+    def __init__(self, catalog: Optional[CatalogIndex] = None, last_modified: Optional[float] = None):
+        """Load the properties file, or adopt an already built ``catalog`` (e.g. from a snapshot)."""
         self.properties_file = settings.properties_file
-        self.properties_df = None
-        self._load_data()
+        # (catalog, frame): the frame is rebuilt when the catalog was replaced
+        self._frame: tuple = (None, None)
+        self.catalog = catalog
+        self.last_modified = last_modified
+        if catalog is None:
+            self._load_data()
+
+    @property
+    def properties_df(self) -> "pd.DataFrame":
+        """The catalog as a DataFrame, rebuilt from its columns on first use after a warm start."""
+        catalog, properties_df = self._frame
+        if catalog is not self.catalog:
+            import pandas as pd
+
+            catalog = self.catalog
+            properties_df = pd.DataFrame(catalog.columns)
+            self._frame = (catalog, properties_df)
+        return properties_df
 
     def _load_data(self) -> None:
         """Load property data from CSV file."""
+        import pandas as pd
+
         try:
-            self.properties_df = pd.read_csv(self.properties_file)
+            last_modified = os.path.getmtime(self.properties_file)
+            properties_df = pd.read_csv(self.properties_file)
             # Convert string lists to actual lists
-            self.properties_df['amenities'] = self.properties_df['amenities'].apply(
+            properties_df['amenities'] = properties_df['amenities'].apply(
                 lambda x: [item.strip() for item in x.split(',')]
             )
-            self.properties_df['available_months'] = self.properties_df['available_months'].apply(
+            properties_df['available_months'] = properties_df['available_months'].apply(
                 lambda x: [month.strip() for month in x.split(',')]
             )
+            catalog = CatalogIndex(properties_df)
+            # Swap in the new frame only once it is fully parsed and indexed, so
+            # readers never see a half-converted catalog during a reload.
+            self._frame = (catalog, properties_df)
+            self.catalog = catalog
+            self.last_modified = last_modified
         except FileNotFoundError:
             raise FileNotFoundError(f"Properties file not found at {self.properties_file}")
         except Exception as e:
             raise Exception(f"Error loading properties data: {str(e)}")
 
-    def get_all_properties(self) -> List[Dict[str, Any]]:
-        """Get all properties as a list of dictionaries."""
-        return self.properties_df.to_dict('records')
+    def reload(self) -> None:
+        """Re-read the properties file."""
+        self._load_data()
+
+    def has_changed(self) -> bool:
+        """Check whether the properties file was modified since it was last loaded."""
+        try:
+            return os.path.getmtime(self.properties_file) != self.last_modified
+        except OSError:
+            return False
+
+    def get_all_properties(self) -> PropertyRecords:
+        """Get all properties as a sequence of dictionaries."""
+        return self.catalog.records()
 
-    def get_available_properties(self) -> List[Dict[str, Any]]:
+    def get_available_properties(self) -> PropertyRecords:
         """Get only available properties."""
-        return self.properties_df[self.properties_df['status'] == 'available'].to_dict('records')
+        return self.catalog.records(self.catalog.lookup(self.catalog.status, 'available'))
 
     def get_property_by_id(self, property_id: int) -> Dict[str, Any]:
         """Get a specific property by ID."""
-        property_data = self.properties_df[self.properties_df['property_id'] == property_id]
-        if property_data.empty:
+        position = self.catalog.positions_by_id.get(property_id)
+        if position is None:
             raise ValueError(f"Property with ID {property_id} not found")
-        return property_data.iloc[0].to_dict()
+        return self.catalog.row(position)
 
-    def get_properties_by_location(self, location: str) -> List[Dict[str, Any]]:
+    def get_properties_by_location(self, location: str) -> PropertyRecords:
         """Get properties in a specific location."""
-        return self.properties_df[self.properties_df['location'].str.lower() == location.lower()].to_dict('records')
+        return self.catalog.records(self.catalog.lookup(self.catalog.location, location.lower()))
 
-    def get_properties_by_price_range(self, min_price: float, max_price: float) -> List[Dict[str, Any]]:
+    def get_properties_by_price_range(self, min_price: float, max_price: float) -> PropertyRecords:
         """Get properties within a price range."""
-        return self.properties_df[
-            (self.properties_df['price'] >= min_price) & 
-            (self.properties_df['price'] <= max_price)
-        ].to_dict('records')
+        return self.catalog.records(self.catalog.range('price', min_price, max_price))
 
-    def get_properties_by_amenity(self, amenity: str) -> List[Dict[str, Any]]:
+    def get_properties_by_amenity(self, amenity: str) -> PropertyRecords:
         """Get properties that have a specific amenity."""
-        return self.properties_df[
-            self.properties_df['amenities'].apply(lambda x: amenity.lower() in [a.lower() for a in x])
-        ].to_dict('records') 
\ No newline at end of file
+        return self.catalog.records(self.catalog.lookup(self.catalog.amenity, amenity.lower()))
+
+    def get_locations(self) -> List[str]:
+        """Get the distinct property locations."""
+        return list(self.catalog.locations.values())
+
+    def filter_properties(
+        self,
+        location: Optional[str] = None,
+        months: Optional[Iterable[str]] = None,
+        min_guests: Optional[int] = None,
+        pet_friendly: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        status: Optional[str] = None,
+        amenities: Optional[Iterable[str]] = None
+    ) -> PropertyRecords:
+        """Get properties matching all given filters (months match any, amenities match all)."""
+        catalog = self.catalog
+        mask = np.ones(catalog.size, dtype=bool)
+        if location is not None:
+            mask &= catalog.lookup(catalog.location, location.lower())
+        if months:
+            any_month = np.zeros(catalog.size, dtype=bool)
+            for month in months:
+                any_month |= catalog.lookup(catalog.month, month.lower())
+            mask &= any_month
+        if min_guests is not None:
+            mask &= catalog.range('max_guests', low=min_guests)
+        if pet_friendly is not None:
+            mask &= catalog.pet_friendly if pet_friendly else ~catalog.pet_friendly
+        if min_price is not None or max_price is not None:
+            mask &= catalog.range('price', min_price, max_price)
+        if status is not None:
+            mask &= catalog.lookup(catalog.status, status)
+        for amenity in amenities or ():
+            mask &= catalog.lookup(catalog.amenity, amenity.lower())
+        return catalog.records(mask)
+
+    def find_property_ids(self, **filters: Any) -> List[int]:
+        """Get the ids of properties matching all given filters (see ``filter_properties``)."""
+        return self.filter_properties(**filters).property_ids()
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+from .clients import LazyOpenAIEmbeddings
+from .config import settings
+from .local_embeddings import HashingEmbeddings, sentence_transformer_embeddings
+from .rate_limiter import RateLimiter, estimate_tokens, get_rate_limiter
+
+
+def text_hash(text: str) -> str:
+    """Hash a text for use as an embedding cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Persistent (model, text hash) -> vector store backed by SQLite in WAL mode."""
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.embedding_cache_path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Get the stored vectors for the given hashes; missing ones are left out."""
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        """Store many vectors in one transaction."""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                    [(model, key, np.asarray(vector, dtype=np.float32).tobytes())
+                     for key, vector in vectors.items()]
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def reopen(self) -> None:
+        """Open a new connection after ``close``, e.g. in a forked worker process."""
+        with self._lock:
+            self._conn = self._connect()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embedding layer shared by the chatbot and the trainer.
+
+    Lookups go through an in-memory LRU, then the persistent EmbeddingStore; only
+    the remaining texts are sent to the wrapped model, de-duplicated, split into
+    ``batch_size`` chunks and embedded ``max_concurrency`` chunks at a time, each
+    chunk charged to the embedding rate limiter (unless ``rate_limited`` is
+    False, for local models). New vectors are written back in bulk.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str = None,
+        store: Optional[EmbeddingStore] = None,
+        lru_size: int = None,
+        batch_size: int = None,
+        max_concurrency: int = None,
+        limiter: RateLimiter = None,
+        rate_limited: bool = True
+    ):
+        self.embeddings = embeddings
+        self.model_name = (model_name or getattr(embeddings, 'model', None)
+                           or getattr(embeddings, 'model_name', None)
+                           or type(embeddings).__name__)
+        self.store = store if store is not None else EmbeddingStore()
+        self.lru_size = lru_size or settings.embedding_cache_lru_size
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.max_concurrency = max_concurrency or settings.embedding_max_concurrency
+        self.limiter = (limiter or get_rate_limiter("embedding")) if rate_limited else None
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lru_lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_put(self, vectors: Dict[str, np.ndarray]) -> None:
+        with self._lru_lock:
+            for key, vector in vectors.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Resolve as many keys as possible from the LRU and the persistent store."""
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            vector = self._lru_get(key)
+            if vector is not None:
+                found[key] = vector
+            else:
+                missing.append(key)
+        if missing:
+            stored = self.store.get_many(self.model_name, missing)
+            self._lru_put(stored)
+            found.update(stored)
+        return found
+
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        if self.limiter is not None:
+            self.limiter.acquire(sum(estimate_tokens(text) for text in texts))
+        return self.embeddings.embed_documents(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the model only for texts never embedded before."""
+        keys = [text_hash(text) for text in texts]
+        found = self._lookup(keys)
+
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                pending.setdefault(key, text)
+        if pending:
+            pending_keys = list(pending)
+            chunks = [pending_keys[i:i + self.batch_size]
+                      for i in range(0, len(pending_keys), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(chunks))) as pool:
+                results = pool.map(lambda chunk: self._embed_chunk([pending[k] for k in chunk]), chunks)
+                new_vectors = {}
+                for chunk, vectors in zip(chunks, results):
+                    for key, vector in zip(chunk, vectors):
+                        new_vectors[key] = np.asarray(vector, dtype=np.float32)
+            self.store.put_many(self.model_name, new_vectors)
+            self._lru_put(new_vectors)
+            found.update(new_vectors)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the vector for any identical earlier text."""
+        key = text_hash(text)
+        found = self._lookup([key])
+        if key in found:
+            return found[key].tolist()
+        if self.limiter is not None:
+            self.limiter.acquire(estimate_tokens(text))
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        self.store.put_many(self.model_name, {key: vector})
+        self._lru_put({key: vector})
+        return vector.tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = text_hash(text)
+        vector = self._lru_get(key)
+        if vector is not None:
+            return vector.tolist()
+        found = await asyncio.to_thread(self._lookup, [key])
+        if key in found:
+            return found[key].tolist()
+        if self.limiter is not None:
+            await self.limiter.aacquire(estimate_tokens(text))
+        vector = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        await asyncio.to_thread(self.store.put_many, self.model_name, {key: vector})
+        self._lru_put({key: vector})
+        return vector.tolist()
+
+
+def create_embedding_provider(provider: str = None) -> Embeddings:
+    """Create the embeddings model selected by ``settings.embedding_provider``.
+
+    ``openai`` calls the OpenAI API, ``hashing`` is a dependency-free local
+    backend and ``sentence-transformers`` runs a local model on the CPU.
+    ``fake`` and ``cassette`` stand in for the API in benchmarks: hashing
+    vectors, or vectors recorded from the API, after a simulated latency.
+    """
+    provider = (provider or settings.embedding_provider).lower()
+    if provider == "openai":
+        return LazyOpenAIEmbeddings(settings.embedding_model)
+    if provider == "fake":
+        from .fakes import FakeEmbeddings
+
+        return FakeEmbeddings(settings.fake_embedding_latency)
+    if provider == "cassette":
+        from .fakes import CassetteEmbeddings, get_cassette
+
+        recording = settings.cassette_mode.lower() == "record"
+        return CassetteEmbeddings(
+            get_cassette(), settings.embedding_model,
+            embeddings=LazyOpenAIEmbeddings(settings.embedding_model) if recording else None,
+            latency=settings.fake_embedding_latency
+        )
+    if provider == "hashing":
+        return HashingEmbeddings()
+    if provider == "sentence-transformers":
+        return sentence_transformer_embeddings()
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+def build_embeddings(embeddings: Embeddings = None) -> Embeddings:
+    """Get the embeddings used by the chatbot and the trainer.
+
+    Models are wrapped in the shared cached, batched layer; API-backed ones and
+    their stand-ins are also rate limited. The hashing backend is used
+    directly, since computing a vector is cheaper than looking one up.
+    """
+    if embeddings is None:
+        provider = settings.embedding_provider.lower()
+        embeddings = create_embedding_provider(provider)
+        if provider == "hashing":
+            return embeddings
+        return CachedEmbeddings(embeddings, rate_limited=provider in ("openai", "fake", "cassette"))
+    return CachedEmbeddings(embeddings)
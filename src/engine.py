@@ -0,0 +1,167 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from src.chatbot import PropertyChatbot, Retrieval
+from src.config import settings
+from src.memory import ConversationMemory
+from src.rate_limiter import AsyncRateLimitCallbackHandler, create_session_limiter
+from src.response_cache import Scope
+from src.tracing import annotate, mark_first_token, stage, tracer
+
+
+class ChatSession:
+    """Per-guest conversation state served by the ChatEngine."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.memory = ConversationMemory(session_id)
+        # Turns within one session are answered in order.
+        self.lock = asyncio.Lock()
+        self.limiter = create_session_limiter()
+        self.last_used = time.monotonic()
+
+
+class ChatEngine:
+    """Asyncio serving engine answering many sessions concurrently.
+
+    The LLM client, embeddings, property and example indexes and global rate
+    limits are shared by every session; only the conversation memory and a
+    per-session request budget are kept per ``session_id``. The session
+    history is passed into the chatbot's prompt on each call. Summaries are
+    produced by the chatbot's background summarizer.
+
+    With ``shared_sessions``, several processes serve the same sessions: each
+    turn reloads the session from the conversation store if another process
+    added to it, and each message is committed as soon as it is added.
+    Sessions idle for ``session_idle_timeout`` seconds are dropped from memory;
+    their history stays in the conversation store.
+    Conversation store reads and writes, routing, summary scheduling, and the
+    response cache's retrieval and FAISS lookups run in worker threads, off
+    the event loop.
+    """
+
+    def __init__(self, chatbot: PropertyChatbot = None, shared_sessions: bool = False):
+        self.chatbot = chatbot or PropertyChatbot()
+        self.shared_sessions = shared_sessions
+        self.sessions: Dict[str, ChatSession] = {}
+        self.rate_limit_handler = AsyncRateLimitCallbackHandler()
+        self.session_idle_timeout = settings.session_idle_timeout
+        self._next_eviction = time.monotonic() + self.session_idle_timeout
+
+    def get_session(self, session_id: str) -> ChatSession:
+        """Get the session for an id, loading its memory on first use."""
+        now = time.monotonic()
+        if self.session_idle_timeout > 0 and now >= self._next_eviction:
+            self._evict_idle_sessions(now)
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = ChatSession(session_id)
+            self.sessions[session_id] = session
+        session.last_used = now
+        return session
+
+    def _evict_idle_sessions(self, now: float) -> None:
+        # Sessions answering a turn are kept: a second ChatSession for the same id
+        # would not be ordered by the first one's lock
+        cutoff = now - self.session_idle_timeout
+        for session_id, session in list(self.sessions.items()):
+            if session.last_used < cutoff and not session.lock.locked():
+                del self.sessions[session_id]
+        self._next_eviction = now + self.session_idle_timeout / 2
+
+    async def aget_response(self, session_id: str, user_input: str) -> str:
+        """Get a response for one session without blocking other sessions."""
+        return "".join([chunk async for chunk in self._turn(session_id, user_input, stream=False)])
+
+    async def astream_response(self, session_id: str, user_input: str) -> AsyncIterator[str]:
+        """Stream a response for one session; the turn is saved once the last token is out."""
+        async for chunk in self._turn(session_id, user_input, stream=True):
+            yield chunk
+
+    async def _turn(self, session_id: str, user_input: str, stream: bool) -> AsyncIterator[str]:
+        session = self.get_session(session_id)
+        with tracer.turn(session_id=session_id) as trace:
+            with stage("session_wait"):
+                await session.lock.acquire()
+            answer = ""
+            try:
+                async for chunk in self._answer(session, user_input, stream):
+                    answer += chunk
+                    yield chunk
+            except Exception as e:
+                trace.error = str(e)
+                error_message = f"I apologize, but I encountered an error: {str(e)}"
+                await asyncio.to_thread(self._save_message, session.memory, "assistant", answer + error_message)
+                yield error_message
+            finally:
+                session.lock.release()
+
+    async def _answer(self, session: ChatSession, user_input: str, stream: bool) -> AsyncIterator[str]:
+        memory = session.memory
+        await session.limiter.aacquire()
+
+        with stage("history"):
+            context = await asyncio.to_thread(self._load_history, memory)
+        answer = await asyncio.to_thread(self.chatbot.answer_locally, user_input, memory)
+        with stage("persistence"):
+            await asyncio.to_thread(self._save_message, memory, "user", user_input)
+
+        cacheable = answer is None and self.chatbot.is_cacheable(user_input, context)
+        if cacheable:
+            with stage("cache_lookup"):
+                embedding = await self.chatbot.embeddings.aembed_query(user_input)
+                retrieval, scope, answer = await asyncio.to_thread(self._lookup_cache, user_input, embedding)
+            annotate(cache_hit=answer is not None)
+
+        if answer is not None:
+            yield answer
+        else:
+            # On a cache miss the listings retrieved for the scope are reused
+            prompt = await self.chatbot.aprepare_prompt(user_input, context, memory,
+                                                        retrieval if cacheable else None)
+            config = {"callbacks": [self.rate_limit_handler]}
+            if stream:
+                answer = ""
+                with stage("generation"):
+                    async for chunk in self.chatbot.llm.astream(prompt, config=config):
+                        if chunk.content:
+                            mark_first_token()
+                            answer += chunk.content
+                            yield chunk.content
+            else:
+                with stage("generation"):
+                    response = await self.chatbot.llm.ainvoke(prompt, config=config)
+                answer = response.content
+                yield answer
+            if cacheable:
+                await asyncio.to_thread(self.chatbot.response_cache.store, embedding, scope, answer)
+
+        with stage("persistence"):
+            await asyncio.to_thread(self._save_message, memory, "assistant", answer)
+        # Deciding whether to summarize reads the store and counts tokens
+        await asyncio.to_thread(self.chatbot.summarizer.schedule, memory)
+
+    def _load_history(self, memory: ConversationMemory) -> str:
+        if self.shared_sessions:
+            memory.refresh()
+        return memory.get_context()
+
+    def _lookup_cache(self, user_input: str,
+                      embedding: List[float]) -> Tuple[Retrieval, Scope, Optional[str]]:
+        retrieval = Retrieval(embedding, self.chatbot.retriever.retrieve_by_vector(user_input, embedding))
+        scope = self.chatbot.cache_scope(retrieval.docs)
+        return retrieval, scope, self.chatbot.response_cache.lookup(embedding, scope)
+
+    def _save_message(self, memory: ConversationMemory, role: str, content: str) -> None:
+        memory.add_message(role, content)
+        if self.shared_sessions:
+            # Commit each message on its own: no write transaction stays open across
+            # the LLM call, and the process serving the next turn sees this one
+            memory.store.flush()
+
+    def close_session(self, session_id: str) -> None:
+        """Drop a session's in-memory state; its history stays on disk."""
+        session = self.sessions.get(session_id)
+        if session is not None and not session.lock.locked():
+            del self.sessions[session_id]
@@ -0,0 +1,180 @@
+import json
+import os
+import pickle
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain_community.vectorstores import FAISS
+
+from .config import settings
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+
+
+READ_CHUNK_SIZE = 1 << 20
+EXAMPLE_INDEX_PATH = "models/example_index.pkl"
+
+
+def _iter_json_array(f, key: str) -> Iterator[Any]:
+    """Yield the items of the array stored under ``key`` one at a time.
+
+    The file is read in chunks and each item is decoded as soon as it is
+    complete, so memory use follows the largest item, not the file size.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = f.read(READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+        return not eof
+
+    marker = json.dumps(key)
+    while True:
+        start = buffer.find(marker)
+        bracket = buffer.find("[", start) if start != -1 else -1
+        if bracket != -1:
+            position = bracket + 1
+            break
+        if not fill():
+            return
+
+    while True:
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or not fill():
+                break
+        if position >= len(buffer):
+            raise ValueError(f"Unterminated '{key}' array")
+        if buffer[position] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof or not fill():
+                raise
+            continue
+        yield item
+        position = end
+        if position > READ_CHUNK_SIZE:
+            buffer, position = buffer[position:], 0
+
+
+def iter_conversations(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream training conversations from a ``.jsonl`` file or a ``{"conversations": [...]}`` JSON file."""
+    with open(path, 'r') as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f, 'conversations')
+
+
+def load_conversations(path: str) -> List[Dict[str, Any]]:
+    """Load all training conversations from a file."""
+    return list(iter_conversations(path))
+
+
+def extract_examples(conversations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn conversations into user/assistant example pairs with their system message."""
+    examples = []
+    for conv in conversations:
+        messages = conv.get('messages', [])
+        if len(messages) < 2:  # Skip conversations with less than 2 messages
+            continue
+
+        system_message = next((msg['content'] for msg in messages if msg['role'] == 'system'), None)
+
+        for i in range(1, len(messages)):
+            if messages[i]['role'] == 'user' and i + 1 < len(messages) and messages[i + 1]['role'] == 'assistant':
+                examples.append({
+                    'input': messages[i]['content'],
+                    'output': messages[i + 1]['content'],
+                    'system_message': system_message
+                })
+    return examples
+
+
+def example_text(example: Dict[str, Any]) -> str:
+    """Render an example the way it is stored in the trained vector store."""
+    return f"Input: {example['input']}\nOutput: {example['output']}"
+
+
+def parse_example_text(text: str) -> Dict[str, Any]:
+    """Recover an example from its stored ``Input: ...\nOutput: ...`` text."""
+    prompt, _, output = text.partition("\nOutput: ")
+    return {'input': prompt[len("Input: "):] if prompt.startswith("Input: ") else prompt,
+            'output': output, 'system_message': None}
+
+
+class ExampleIndex:
+    """Few-shot example retrieval over the training exchanges.
+
+    Examples are ranked by BM25 over the training conversations and, once a
+    trained ``vector_store`` is attached, also by embedding similarity; the
+    two rankings are merged with reciprocal rank fusion. Examples are keyed by
+    their stored text, so hits from either side refer to the same example.
+    The trainer builds the index and saves it next to the vector store, so
+    the chatbot never re-reads the training conversations.
+    """
+
+    def __init__(self, examples: List[Dict[str, Any]], vector_store: Optional[FAISS] = None):
+        self.examples: Dict[str, Dict[str, Any]] = {}
+        self.lexical = BM25Index(settings.bm25_k1, settings.bm25_b)
+        self.vector_store = vector_store
+        self.add(examples)
+
+    def add(self, examples: Iterable[Dict[str, Any]]) -> None:
+        """Index more examples."""
+        for example in examples:
+            text = example_text(example)
+            self.examples[text] = example
+            self.lexical.add(text, text)
+
+    def save(self, path: str = None) -> None:
+        """Write the examples and their BM25 index, replacing any previous file atomically."""
+        path = path or EXAMPLE_INDEX_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", 'wb') as f:
+            pickle.dump({'examples': self.examples, 'lexical': self.lexical}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str = None) -> "ExampleIndex":
+        """Load the index saved by the trainer; an empty index if there is none."""
+        path = path or EXAMPLE_INDEX_PATH
+        index = cls([])
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            index.examples, index.lexical = state['examples'], state['lexical']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError) as e:
+            print(f"Warning: Could not load training examples: {str(e)}")
+        return index
+
+    def search(self, query: str, k: int = None,
+               embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Get the examples closest to ``query``, using its ``embedding`` when a vector store is attached."""
+        k = settings.example_k if k is None else k
+        if k <= 0:
+            return []
+        fetch_k = max(k, settings.hybrid_fetch_k)
+        ranked = [text for text, _ in self.lexical.search(query, fetch_k)]
+        if self.vector_store is not None and embedding is not None:
+            docs = self.vector_store.similarity_search_by_vector(embedding, k=fetch_k)
+            ranked = reciprocal_rank_fusion([[doc.page_content for doc in docs], ranked],
+                                            settings.rrf_k)
+        return [self.examples.get(text) or parse_example_text(text) for text in ranked[:k]]
+
+    def format(self, query: str, k: int = None, embedding: Optional[List[float]] = None) -> str:
+        """Render the matching examples for the answer prompt."""
+        return "\n\n".join(
+            f"Guest: {example['input']}\nAssistant: {example['output']}"
+            for example in self.search(query, k, embedding)
+        ) or "None"
@@ -0,0 +1,299 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .config import settings
+from .local_embeddings import HashingEmbeddings
+
+
+class Reply(NamedTuple):
+    """One chat answer of a stand-in model and the latency to simulate before it."""
+    content: str
+    token_usage: Dict[str, int]
+    latency: float
+
+
+class FakeChatModel(BaseChatModel):
+    """Local stand-in for ChatOpenAI that answers after a fixed simulated latency.
+
+    When streamed, the response is emitted word by word with the latency spread
+    evenly across the words.
+    """
+
+    response: str = "Based on the listings above, the Cozy Studio in Barcelona is a good match."
+    latency: float = 0.0
+
+    def _reply(self, messages: List[BaseMessage], stop: Optional[List[str]] = None) -> Reply:
+        prompt_tokens = sum(len(str(message.content).split()) for message in messages)
+        completion_tokens = len(self.response.split())
+        return Reply(self.response, {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }, self.latency)
+
+    async def _areply(self, messages: List[BaseMessage], stop: Optional[List[str]] = None) -> Reply:
+        return self._reply(messages, stop)
+
+    def _result(self, reply: Reply) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=reply.content))],
+            llm_output={'token_usage': dict(reply.token_usage), 'model_name': self._llm_type}
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = self._reply(messages, stop)
+        if reply.latency:
+            time.sleep(reply.latency)
+        return self._result(reply)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = await self._areply(messages, stop)
+        if reply.latency:
+            await asyncio.sleep(reply.latency)
+        return self._result(reply)
+
+    @staticmethod
+    def _tokens(content: str) -> List[str]:
+        words = content.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        reply = self._reply(messages, stop)
+        tokens = self._tokens(reply.content)
+        for token in tokens:
+            if reply.latency:
+                time.sleep(reply.latency / len(tokens))
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        reply = await self._areply(messages, stop)
+        tokens = self._tokens(reply.content)
+        for token in tokens:
+            if reply.latency:
+                await asyncio.sleep(reply.latency / len(tokens))
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+
+class FakeEmbeddings(HashingEmbeddings):
+    """Local stand-in for OpenAIEmbeddings: hashing vectors after a simulated latency per request."""
+
+    def __init__(self, latency: float = 0.0, dimensions: int = None):
+        super().__init__(dimensions)
+        self.latency = latency
+        self.model_name = f"fake-{self.dimensions}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+class Cassette:
+    """Recorded chat answers and embedding vectors, keyed by a hash of the request.
+
+    A cassette is one JSON file. Record it once against the real API, commit
+    it, and replay it in benchmarks with no network or API key.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {'chat': {}, 'embeddings': {}}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for kind, entries in json.load(f).items():
+                    self.entries.setdefault(kind, {}).update(entries)
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, kind: str, key: str) -> Any:
+        """Get a recorded entry, raising if the request was never recorded."""
+        try:
+            return self.entries[kind][key]
+        except KeyError:
+            raise KeyError(f"No recorded {kind} response in {self.path}; "
+                           f"record it with CASSETTE_MODE=record") from None
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        with self._lock:
+            self.entries[kind][key] = value
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cassette if anything was recorded since it was loaded."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str = None) -> Cassette:
+    """Get the process-wide cassette for a path; new recordings are saved at exit."""
+    path = path or settings.cassette_path
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = Cassette(path)
+            _cassettes[path] = cassette
+            atexit.register(cassette.save)
+        return cassette
+
+
+class CassetteChatModel(FakeChatModel):
+    """Replays chat answers recorded from a real model, after a simulated latency.
+
+    With a ``model`` to record from, requests missing from the cassette are
+    sent to it and their answers and token usage recorded; without one,
+    missing requests raise.
+    """
+
+    cassette: Any
+    model: Optional[BaseChatModel] = None
+    model_name: str = ""
+
+    def _key(self, messages: List[BaseMessage], stop: Optional[List[str]]) -> str:
+        return Cassette.key(self.model_name, [[message.type, message.content] for message in messages], stop)
+
+    def _replay(self, key: str) -> Optional[Reply]:
+        if self.model is not None and key not in self.cassette.entries['chat']:
+            return None
+        entry = self.cassette.get('chat', key)
+        return Reply(entry['content'], entry['token_usage'], self.latency)
+
+    def _record(self, key: str, result: Any) -> Reply:
+        reply = Reply(result.generations[0][0].text,
+                      (result.llm_output or {}).get('token_usage', {}), 0.0)
+        self.cassette.put('chat', key, {'content': reply.content, 'token_usage': reply.token_usage})
+        return reply
+
+    def _reply(self, messages: List[BaseMessage], stop: Optional[List[str]] = None) -> Reply:
+        key = self._key(messages, stop)
+        reply = self._replay(key)
+        if reply is None:
+            reply = self._record(key, self.model.generate([messages], stop=stop))
+        return reply
+
+    async def _areply(self, messages: List[BaseMessage], stop: Optional[List[str]] = None) -> Reply:
+        key = self._key(messages, stop)
+        reply = self._replay(key)
+        if reply is None:
+            reply = self._record(key, await self.model.agenerate([messages], stop=stop))
+        return reply
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette-chat"
+
+
+class CassetteEmbeddings(Embeddings):
+    """Replays embedding vectors recorded from a real model, one entry per text.
+
+    Like CassetteChatModel, it records texts missing from the cassette when
+    given ``embeddings`` to record from, and raises on them otherwise.
+    """
+
+    def __init__(self, cassette: Cassette, model_name: str, embeddings: Embeddings = None,
+                 latency: float = 0.0):
+        self.cassette = cassette
+        self.model_name = model_name
+        self.embeddings = embeddings
+        self.latency = latency
+
+    def _vectors(self, texts: List[str]) -> List[List[float]]:
+        keys = [Cassette.key(self.model_name, text) for text in texts]
+        recorded = self.cassette.entries['embeddings']
+        missing = [text for key, text in zip(keys, texts) if key not in recorded]
+        if missing and self.embeddings is not None:
+            for text, vector in zip(missing, self.embeddings.embed_documents(missing)):
+                self.cassette.put('embeddings', Cassette.key(self.model_name, text), list(vector))
+        elif self.latency:
+            time.sleep(self.latency)
+        return [self.cassette.get('embeddings', key) for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._vectors(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vectors([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self._vectors, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await asyncio.to_thread(self._vectors, [text]))[0]
@@ -0,0 +1,206 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and any are as at be but by can do does for from have i in is it its me my "
+    "of on or our so that the there this to was we what which with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, dropping stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory inverted index ranking documents with Okapi BM25.
+
+    Documents can be added and removed one at a time, so the index follows
+    catalog syncs without a rebuild. Each term's BM25 weights are computed once
+    into numpy arrays and reused until the index changes, so a query costs a
+    few vectorized adds over the postings of its own terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.terms: Dict[str, List[str]] = {}
+        self.positions: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        self.lengths: List[int] = []
+        self.free_positions: List[int] = []
+        self.total_length = 0
+        self._packed = None
+        self._vocabulary = None
+        self._weights: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getstate__(self) -> Dict:
+        """Pickle the postings as flat arrays, which load much faster than nested dicts."""
+        return {
+            'k1': self.k1,
+            'b': self.b,
+            'ids': self.ids,
+            'lengths': np.asarray(self.lengths, dtype=np.int32),
+            'free_positions': self.free_positions,
+            'total_length': self.total_length,
+            'packed': self._packed if self.postings is None else self._pack()
+        }
+
+    def __setstate__(self, state: Dict) -> None:
+        self.k1 = state['k1']
+        self.b = state['b']
+        self.ids = state['ids']
+        self.lengths = state['lengths'].tolist()
+        self.free_positions = state['free_positions']
+        self.total_length = state['total_length']
+        self.positions = {doc_id: i for i, doc_id in enumerate(self.ids) if doc_id is not None}
+        # Postings stay packed until the index is next modified
+        self.postings = None
+        self.terms = None
+        self._packed = state['packed']
+        self._vocabulary = {term: i for i, term in enumerate(self._packed[0])}
+        self._weights = {}
+
+    def _pack(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Flatten the postings into (terms, offsets, positions, frequencies)."""
+        vocabulary = list(self.postings)
+        sizes = np.fromiter((len(self.postings[term]) for term in vocabulary), dtype=np.int64,
+                            count=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        positions = np.fromiter((position for term in vocabulary for position in self.postings[term]),
+                                dtype=np.int32, count=int(offsets[-1]))
+        frequencies = np.fromiter((count for term in vocabulary for count in self.postings[term].values()),
+                                  dtype=np.int32, count=int(offsets[-1]))
+        return vocabulary, offsets, positions, frequencies
+
+    def _unpack(self) -> None:
+        """Rebuild the mutable postings dicts after loading a packed index."""
+        if self.postings is not None:
+            return
+        vocabulary, offsets, positions, frequencies = self._packed
+        self.postings, self.terms = {}, {doc_id: [] for doc_id in self.positions}
+        for i, term in enumerate(vocabulary):
+            start, end = offsets[i], offsets[i + 1]
+            docs = dict(zip(positions[start:end].tolist(), frequencies[start:end].tolist()))
+            self.postings[term] = docs
+            for position in docs:
+                self.terms[self.ids[position]].append(term)
+        self._packed = self._vocabulary = None
+
+    def _term_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Get a term's posting positions and frequencies."""
+        if self.postings is None:
+            i = self._vocabulary.get(term)
+            if i is None:
+                return None
+            _, offsets, positions, frequencies = self._packed
+            start, end = offsets[i], offsets[i + 1]
+            return positions[start:end].astype(np.int64), frequencies[start:end].astype(np.float32)
+        docs = self.postings.get(term)
+        if not docs:
+            return None
+        return (np.fromiter(docs.keys(), dtype=np.int64, count=len(docs)),
+                np.fromiter(docs.values(), dtype=np.float32, count=len(docs)))
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version with the same id."""
+        self._unpack()
+        if doc_id in self.positions:
+            self.remove(doc_id)
+        if self.free_positions:
+            position = self.free_positions.pop()
+        else:
+            position = len(self.ids)
+            self.ids.append(None)
+            self.lengths.append(0)
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[position] = count
+        self.terms[doc_id] = list(counts)
+        self.positions[doc_id] = position
+        self.ids[position] = doc_id
+        self.lengths[position] = len(tokens)
+        self.total_length += len(tokens)
+        self._weights.clear()
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document from the index."""
+        self._unpack()
+        position = self.positions.pop(doc_id, None)
+        if position is None:
+            return
+        for term in self.terms.pop(doc_id):
+            docs = self.postings[term]
+            del docs[position]
+            if not docs:
+                del self.postings[term]
+        self.total_length -= self.lengths[position]
+        self.ids[position] = None
+        self.lengths[position] = 0
+        self.free_positions.append(position)
+        self._weights.clear()
+
+    def _term_weights(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Get a term's posting positions and their BM25 weights."""
+        cached = self._weights.get(term)
+        if cached is not None:
+            return cached
+        postings = self._term_postings(term)
+        if postings is None:
+            return None
+        positions, frequencies = postings
+        count = len(self.positions)
+        average_length = self.total_length / count or 1.0
+        idf = math.log(1 + (count - len(positions) + 0.5) / (len(positions) + 0.5))
+        lengths = np.asarray(self.lengths, dtype=np.float32)[positions]
+        norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        weights = idf * frequencies * (self.k1 + 1) / (frequencies + norms)
+        self._weights[term] = (positions, weights)
+        return positions, weights
+
+    def search(self, query: str, k: int = 4,
+               allowed_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Get the ``k`` best (doc id, score) pairs, optionally only among ``allowed_ids``."""
+        if not self.positions or k <= 0:
+            return []
+        scores = None
+        for term in set(tokenize(query)):
+            weights = self._term_weights(term)
+            if weights is None:
+                continue
+            if scores is None:
+                scores = np.zeros(len(self.ids), dtype=np.float32)
+            scores[weights[0]] += weights[1]
+        if scores is None:
+            return []
+        if allowed_ids is not None:
+            mask = np.zeros(len(self.ids), dtype=bool)
+            allowed = [self.positions[i] for i in allowed_ids if i in self.positions]
+            mask[allowed] = True
+            scores[~mask] = 0.0
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.ids[position], float(scores[position])) for position in matched]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Merge ranked id lists, scoring each id by the sum of ``1 / (k + rank)`` over the lists."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
@@ -0,0 +1,88 @@
+import os
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+from .config import settings
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Batches smaller than this are embedded in-process; spawning workers costs more.
+PARALLEL_MIN_TEXTS = 2048
+
+
+@lru_cache(maxsize=200000)
+def _feature(token: str, dimensions: int) -> Tuple[int, float]:
+    """Hash a token to a (column, sign) pair."""
+    h = zlib.crc32(token.encode("utf-8"))
+    return h % dimensions, 1.0 if (h // dimensions) % 2 == 0 else -1.0
+
+
+def _hash_batch(texts: List[str], dimensions: int) -> np.ndarray:
+    """Embed texts as L2-normalized, log-scaled signed hashes of their words and word pairs."""
+    rows, columns, signs = [], [], []
+    for row, text in enumerate(texts):
+        words = _TOKEN_PATTERN.findall(text.lower())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for token in tokens:
+            column, sign = _feature(token, dimensions)
+            rows.append(row)
+            columns.append(column)
+            signs.append(sign)
+
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)),
+              np.asarray(signs, dtype=np.float32))
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class HashingEmbeddings(Embeddings):
+    """CPU-only embeddings using the hashing trick over words and word bigrams.
+
+    No model download or network access is needed and vectors are deterministic,
+    so they can be cached and persisted like any other model's. Large batches
+    are split across ``workers`` processes.
+    """
+
+    def __init__(self, dimensions: int = None, workers: int = None):
+        self.dimensions = dimensions or settings.local_embedding_dimensions
+        self.workers = workers or settings.local_embedding_workers or os.cpu_count() or 1
+        self.model_name = f"hashing-{self.dimensions}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts, in parallel processes when the batch is large."""
+        if len(texts) < PARALLEL_MIN_TEXTS or self.workers <= 1:
+            return _hash_batch(texts, self.dimensions).tolist()
+        chunk_size = -(-len(texts) // self.workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            results = pool.map(_hash_batch, chunks, [self.dimensions] * len(chunks))
+            return np.concatenate(list(results)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return _hash_batch([text], self.dimensions)[0].tolist()
+
+
+def sentence_transformer_embeddings(model_name: str = None) -> Embeddings:
+    """Load a local sentence-transformers model; needs the optional ``sentence-transformers`` package."""
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "EMBEDDING_PROVIDER=sentence-transformers needs the sentence-transformers package: "
+            "pip install sentence-transformers"
+        )
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name or settings.local_embedding_model,
+        encode_kwargs={'batch_size': settings.embedding_batch_size, 'normalize_embeddings': True}
+    )
@@ -2,84 +2,178 @@ from typing import List, Dict, Any
 from datetime import datetime
 import json
 import os
+import re
+import threading
 from .config import settings
+from .conversation_store import ConversationStore, get_conversation_store
+from .context_builder import context_builder, message_tokens
+
+DEFAULT_SESSION_ID = "default"
+
 
 class ConversationMemory:
-    def __init__(self):
+    """Conversation history for one session, persisted in the shared ConversationStore.
+
+    Only a tail window of recent messages is kept in ``messages``; older ones
+    are read from the store on demand, so loading and saving cost the same no
+    matter how long the conversation is.
+    """
+
+    def __init__(self, session_id: str = None, store: ConversationStore = None):
+        self.session_id = session_id
         self.messages: List[Dict[str, Any]] = []
+        self.message_count: int = 0
         self.summary: str = ""
+        # The first summarized_count messages are already folded into the summary
+        self.summarized_count: int = 0
         self.last_summary_time: datetime = datetime.now()
-        self.memory_file = "data/conversation_memory.json"
+        self._lock = threading.RLock()
+        if session_id is None:
+            self.store_id = DEFAULT_SESSION_ID
+            self.memory_file = "data/conversation_memory.json"
+        else:
+            if not re.fullmatch(r"[A-Za-z0-9_.-]+", session_id) or session_id.startswith('.'):
+                raise ValueError(f"Invalid session id: {session_id!r}")
+            self.store_id = session_id
+            self.memory_file = os.path.join(settings.sessions_dir, f"{session_id}.json")
+        self.tail_window = max(settings.memory_tail_window, settings.max_memory_messages)
+        self.store = store or get_conversation_store()
         self._load_memory()
 
+    @property
+    def _first_loaded(self) -> int:
+        """Index of the first message held in ``messages``."""
+        return self.message_count - len(self.messages)
+
     def _load_memory(self) -> None:
-        """Load existing conversation memory from file."""
+        """Load the session state and the tail window of its messages."""
         try:
-            if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r') as f:
-                    data = json.load(f)
-                    self.messages = data.get('messages', [])
-                    self.summary = data.get('summary', '')
-                    self.last_summary_time = datetime.fromisoformat(data.get('last_summary_time', datetime.now().isoformat()))
+            state = self.store.load_session(self.store_id)
+            if state is None:
+                self._import_legacy_file()
+                return
+            self.message_count = state['message_count']
+            self.summary = state['summary']
+            self.summarized_count = state['summarized_count']
+            if state['last_summary_time']:
+                self.last_summary_time = datetime.fromisoformat(state['last_summary_time'])
+            self.messages = self.store.load_messages(
+                self.store_id, start=max(0, self.message_count - self.tail_window)
+            )
         except Exception as e:
             print(f"Warning: Could not load conversation memory: {str(e)}")
 
-    def _save_memory(self) -> None:
-        """Save conversation memory to file."""
+    def refresh(self) -> bool:
+        """Reload the session if another process wrote to it since it was loaded.
+
+        Returns whether it was reloaded. Lets any server worker answer the next
+        turn of a session whose earlier turns another worker served.
+        """
         try:
-            os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-            with open(self.memory_file, 'w') as f:
-                json.dump({
-                    'messages': self.messages,
-                    'summary': self.summary,
-                    'last_summary_time': self.last_summary_time.isoformat()
-                }, f)
+            state = self.store.load_session(self.store_id)
         except Exception as e:
-            print(f"Warning: Could not save conversation memory: {str(e)}")
+            print(f"Warning: Could not refresh conversation memory: {str(e)}")
+            return False
+        with self._lock:
+            if state is None or (state['message_count'] == self.message_count
+                                 and state['summarized_count'] == self.summarized_count):
+                return False
+            self._load_memory()
+        return True
+
+    def _import_legacy_file(self) -> None:
+        """Move a whole-file JSON memory from older versions into the store."""
+        if not os.path.exists(self.memory_file) or os.path.getsize(self.memory_file) == 0:
+            return
+        with open(self.memory_file, 'r') as f:
+            data = json.load(f)
+        for message in data.get('messages', []):
+            self.message_count = self.store.append_message(self.store_id, message) + 1
+        self.summary = data.get('summary', '')
+        self.last_summary_time = datetime.fromisoformat(
+            data.get('last_summary_time', datetime.now().isoformat())
+        )
+        self.store.save_summary(self.store_id, self.summary, self.summarized_count,
+                                self.last_summary_time.isoformat())
+        self.store.flush()
+        self.messages = self.store.load_messages(
+            self.store_id, start=max(0, self.message_count - self.tail_window)
+        )
 
     def add_message(self, role: str, content: str) -> None:
         """Add a new message to the conversation."""
-        self.messages.append({
+        message = {
             'role': role,
             'content': content,
             'timestamp': datetime.now().isoformat()
-        })
-        self._save_memory()
+        }
+        with self._lock:
+            try:
+                seq = self.store.append_message(self.store_id, message)
+            except Exception as e:
+                print(f"Warning: Could not save conversation memory: {str(e)}")
+                seq = self.message_count
+            if seq != self.message_count:
+                # Another process added to the session since it was loaded
+                self._load_memory()
+                return
+            self.messages.append(message)
+            self.message_count += 1
+            if len(self.messages) > 2 * self.tail_window:
+                self.messages = self.messages[-self.tail_window:]
+
+    def get_messages(self, start: int = 0, end: int = None) -> List[Dict[str, Any]]:
+        """Get messages ``start`` to ``end``, reading from the store only if they left the tail window."""
+        with self._lock:
+            if end is None:
+                end = self.message_count
+            first_loaded = self._first_loaded
+            if start >= first_loaded:
+                return self.messages[start - first_loaded:end - first_loaded]
+        return self.store.load_messages(self.store_id, start, end)
 
     def get_recent_messages(self, n: int = None) -> List[Dict[str, Any]]:
-        """Get the n most recent messages."""
+        """Get the n most recent messages not yet folded into the summary."""
         if n is None:
             n = settings.max_memory_messages
-        return self.messages[-n:]
+        return self.get_messages(max(self.summarized_count, self.message_count - n))
+
+    def get_unsummarized_messages(self) -> List[Dict[str, Any]]:
+        """Get every message added since the last summary."""
+        return self.get_messages(self.summarized_count)
+
+    def unsummarized_tokens(self) -> int:
+        """Estimate how many tokens were added since the last summary."""
+        return sum(message_tokens(msg) for msg in self.get_unsummarized_messages())
 
     def should_summarize(self) -> bool:
-        """Check if we should summarize the conversation."""
-        return len(self.messages) >= settings.memory_summary_threshold
+        """Check if enough new conversation piled up since the last summary."""
+        return (len(self.get_unsummarized_messages()) >= settings.memory_summary_threshold
+                and self.unsummarized_tokens() >= settings.summary_token_threshold)
 
-    def update_summary(self, new_summary: str) -> None:
-        """Update the conversation summary."""
-        self.summary = new_summary
-        self.last_summary_time = datetime.now()
-        self._save_memory()
+    def update_summary(self, new_summary: str, summarized_count: int = None) -> None:
+        """Update the conversation summary, which now covers the first summarized_count messages."""
+        with self._lock:
+            self.summary = new_summary
+            if summarized_count is not None:
+                self.summarized_count = summarized_count
+            self.last_summary_time = datetime.now()
+            try:
+                self.store.save_summary(self.store_id, self.summary, self.summarized_count,
+                                        self.last_summary_time.isoformat())
+            except Exception as e:
+                print(f"Warning: Could not save conversation summary: {str(e)}")
 
     def get_context(self) -> str:
-        """Get the current conversation context including summary and recent messages."""
-        context = []
-        
-        if self.summary:
-            context.append(f"Previous conversation summary: {self.summary}")
-        
-        recent_messages = self.get_recent_messages()
-        if recent_messages:
-            context.append("\nRecent messages:")
-            for msg in recent_messages:
-                context.append(f"{msg['role']}: {msg['content']}")
-        
-        return "\n".join(context)
+        """Get the current conversation context: the summary and the recent messages that fit the token budget."""
+        return context_builder.build_history(self)
 
     def clear(self) -> None:
         """Clear the conversation memory."""
-        self.messages = []
-        self.summary = ""
-        self.last_summary_time = datetime.now()
-        self._save_memory() 
\ No newline at end of file
+        with self._lock:
+            self.messages = []
+            self.message_count = 0
+            self.summary = ""
+            self.summarized_count = 0
+            self.last_summary_time = datetime.now()
+            self.store.clear_session(self.store_id) 
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Any, List, Tuple
+
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_key(key: Tuple[str, Tuple[Tuple[str, str], ...]], suffix: str = "") -> str:
+    name, labels = key
+    name += suffix
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _summary() -> Dict[str, float]:
+    return {'count': 0, 'sum': 0.0, 'max': 0.0}
+
+
+def _add_sample(summary: Dict[str, float], value: float) -> None:
+    summary['count'] += 1
+    summary['sum'] += value
+    summary['max'] = max(summary['max'], value)
+
+
+class Metrics:
+    """Thread-safe in-process counters, timing summaries and size summaries.
+
+    Timings are durations in seconds; sizes are other per-event amounts, such
+    as token or document counts, summarized the same way but kept apart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple, float] = defaultdict(float)
+        self.timings: Dict[Tuple, Dict[str, float]] = defaultdict(_summary)
+        self.sizes: Dict[Tuple, Dict[str, float]] = defaultdict(_summary)
+
+    def increment(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self.counters[_metric_key(name, labels)] += value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        """Record one duration sample."""
+        with self._lock:
+            _add_sample(self.timings[_metric_key(name, labels)], seconds)
+
+    def observe_size(self, name: str, value: float, **labels: Any) -> None:
+        """Record one size sample, e.g. the tokens of one prompt section."""
+        with self._lock:
+            _add_sample(self.sizes[_metric_key(name, labels)], value)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get a copy of all metrics keyed by ``name{label="value"}``."""
+        with self._lock:
+            return {
+                'counters': {_format_key(key): value for key, value in self.counters.items()},
+                'timings': {_format_key(key): dict(value) for key, value in self.timings.items()},
+                'sizes': {_format_key(key): dict(value) for key, value in self.sizes.items()}
+            }
+
+    def prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format.
+
+        Counters are exported as counters, timings and sizes as summaries
+        (``_count`` and ``_sum``) plus a ``_max`` gauge.
+        """
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timings = sorted((key, dict(value)) for table in (self.timings, self.sizes)
+                             for key, value in table.items())
+        lines: List[str] = []
+        declared = set()
+        for key, value in counters:
+            if key[0] not in declared:
+                declared.add(key[0])
+                lines.append(f"# TYPE {key[0]} counter")
+            lines.append(f"{_format_key(key)} {value:g}")
+        for key, timing in timings:
+            if key[0] not in declared:
+                declared.add(key[0])
+                lines.append(f"# TYPE {key[0]} summary")
+            lines.append(f"{_format_key(key, '_count')} {timing['count']:g}")
+            lines.append(f"{_format_key(key, '_sum')} {timing['sum']:.6g}")
+        for key, timing in timings:
+            if key[0] + "_max" not in declared:
+                declared.add(key[0] + "_max")
+                lines.append(f"# TYPE {key[0]}_max gauge")
+            lines.append(f"{_format_key(key, '_max')} {timing['max']:.6g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write ``prometheus()`` to a file atomically, e.g. for node_exporter's textfile collector."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", 'w') as f:
+            f.write(self.prometheus())
+        os.replace(path + ".tmp", path)
+
+    def reset(self) -> None:
+        """Clear all recorded metrics."""
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.sizes.clear()
+
+
+# Create global metrics instance
+metrics = Metrics()
@@ -0,0 +1,114 @@
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain.schema import Document
+
+from .config import settings
+from .query_filters import MONTHS
+
+
+def _money(value: Any) -> str:
+    return f"${value}"
+
+
+def _join(values: Any) -> str:
+    return ", ".join(values) if isinstance(values, (list, tuple)) else str(values)
+
+
+# (column, label, compact key, formatter) in rendering order
+PROPERTY_FIELDS: List[Tuple[str, str, str, Callable[[Any], str]]] = [
+    ('name', "Property", "name", str),
+    ('location', "Location", "location", str),
+    ('price', "Price", "price", lambda value: f"${value} per night"),
+    ('status', "Status", "status", str),
+    ('property_type', "Property Type", "type", str),
+    ('max_guests', "Maximum Guests", "guests", str),
+    ('number_of_bedrooms', "Number of Bedrooms", "bedrooms", str),
+    ('number_of_bathrooms', "Number of Bathrooms", "bathrooms", str),
+    ('square_meters', "Square Meters", "m2", str),
+    ('pet_friendly', "Pet Friendly", "pets", str),
+    ('check_in_time', "Check-in Time", "check_in", str),
+    ('check_out_time', "Check-out Time", "check_out", str),
+    ('minimum_stay', "Minimum Stay", "min_nights", lambda value: f"{value} nights"),
+    ('cleaning_fee', "Cleaning Fee", "cleaning_fee", _money),
+    ('security_deposit', "Security Deposit", "deposit", _money),
+    ('amenities', "Amenities", "amenities", _join),
+    ('available_months', "Available months", "months", _join),
+]
+
+# Fields every answer may need to check a recommendation
+CORE_FIELDS = (
+    'name', 'location', 'price', 'status', 'property_type',
+    'max_guests', 'number_of_bedrooms', 'amenities'
+)
+
+_FIELD_PATTERNS: Dict[str, "re.Pattern"] = {
+    'available_months': re.compile(
+        r"\b(?:when|month|months|dates?|availab\w*|season|summer|winter|spring|autumn|fall|"
+        + "|".join(month[:3] + "(?:" + month[3:] + ")?" for month in MONTHS) + r")\b",
+        re.IGNORECASE
+    ),
+    'pet_friendly': re.compile(r"\b(?:pets?|dogs?|cats?|puppy|animals?)\b", re.IGNORECASE),
+    'number_of_bathrooms': re.compile(r"\b(?:bath\w*|toilets?|showers?)\b", re.IGNORECASE),
+    'square_meters': re.compile(r"\b(?:size|square|m2|sqm|big|large|spacious|small)\b", re.IGNORECASE),
+    'check_in_time': re.compile(r"\b(?:check[- ]?in|arriv\w*|early)\b", re.IGNORECASE),
+    'check_out_time': re.compile(r"\b(?:check[- ]?out|leav\w*|depart\w*|late)\b", re.IGNORECASE),
+    'minimum_stay': re.compile(r"\b(?:minimum|nights?|stay|weekend|how long)\b", re.IGNORECASE),
+    'cleaning_fee': re.compile(r"\b(?:cleaning|fees?|total|cost|extra)\b", re.IGNORECASE),
+    'security_deposit': re.compile(r"\b(?:deposit|fees?|total|cost|extra)\b", re.IGNORECASE),
+}
+
+
+def relevant_fields(query: str) -> List[str]:
+    """Get the fields worth showing for a question: the core ones plus any it mentions."""
+    mentioned = {column for column, pattern in _FIELD_PATTERNS.items() if pattern.search(query)}
+    return [column for column, _, _, _ in PROPERTY_FIELDS
+            if column in CORE_FIELDS or column in mentioned]
+
+
+def render_property_text(prop: Dict[str, Any], fields: Optional[Iterable[str]] = None,
+                         style: str = "text") -> str:
+    """Render a property row, optionally restricted to ``fields``.
+
+    ``text`` renders one ``Label: value`` line per field; ``compact`` renders
+    terse ``key:value`` pairs on a single line.
+    """
+    wanted = None if fields is None else set(fields)
+    parts = []
+    for column, label, key, formatter in PROPERTY_FIELDS:
+        if wanted is not None and column not in wanted:
+            continue
+        value = formatter(prop[column])
+        parts.append(f"{key}:{value}" if style == "compact" else f"{label}: {value}")
+    return "; ".join(parts) if style == "compact" else "\n".join(parts)
+
+
+class PropertyTable:
+    """Columnar side table of listing fields referenced by property id.
+
+    Retrieval documents carry only the ``property_id``; their text is rendered
+    from this table when they are returned, so each field is stored once.
+    """
+
+    def __init__(self, properties: Sequence[Dict[str, Any]]):
+        self.columns: Dict[str, list] = {column: [] for column, _, _, _ in PROPERTY_FIELDS}
+        self.positions: Dict[str, int] = {}
+        for prop in properties:
+            self.positions[str(prop['property_id'])] = len(self.positions)
+            for column, values in self.columns.items():
+                values.append(prop[column])
+
+    def __contains__(self, property_id: str) -> bool:
+        return property_id in self.positions
+
+    def row(self, property_id: str) -> Dict[str, Any]:
+        """Get one listing's fields as a dictionary."""
+        position = self.positions[property_id]
+        return {column: values[position] for column, values in self.columns.items()}
+
+    def document(self, property_id: str, fields: Optional[Iterable[str]] = None,
+                 style: str = None) -> Document:
+        """Render one listing as a retrieval document."""
+        text = render_property_text(self.row(property_id), fields,
+                                    style or settings.document_style)
+        return Document(page_content=text, metadata={'property_id': property_id})
@@ -0,0 +1,507 @@
+import hashlib
+import json
+import os
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from .config import settings
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .property_documents import PropertyTable, render_property_text
+from .vector_index import (
+    IN_PLACE_TYPES, build_index, configure_search, search_parameters, train_index
+)
+
+
+class _PropertyIdDocstore(InMemoryDocstore):
+    """Docstore whose documents are only the property id, created on lookup.
+
+    Building tens of thousands of placeholder Documents up front dominated
+    wrapping a loaded index; only the handful a search returns are needed.
+    """
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search not in self._dict:
+            return f"ID {search} not found."
+        return Document(page_content="", metadata={'property_id': search})
+
+
+class PropertyIndex:
+    """On-disk property embedding index keyed by a hash of each listing's text.
+
+    Vectors live in a memory-mapped ``.npy`` slot file next to a manifest mapping
+    each property id to its slot and content hash. Syncing embeds only listings
+    whose rendered text (or the embedding model) changed, writes their vectors into
+    free slots, and patches the live FAISS store in place under ``lock``. The
+    FAISS index type comes from ``settings.vector_index_type``; trained and
+    built indexes are persisted next to the vectors. IVF indexes are patched
+    by id; types that cannot remove entries in place (HNSW) are rebuilt from
+    the stored vectors before ``lock`` is taken and swapped in under it.
+    The store's documents carry only the property id; listing fields live once
+    in ``table`` and are rendered into text when results are returned. A BM25
+    index over the same texts (``lexical``) follows every sync, and searches
+    given the query text fuse both rankings with reciprocal rank fusion.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    VECTORS_FILE = "vectors.npy"
+    ANN_FILE = "ann.index"
+    ANN_TRAINED_FILE = "ann_trained.index"
+    ANN_META_FILE = "ann.json"
+
+    def __init__(self, embeddings: Embeddings, index_dir: str = None, model_name: str = None):
+        self.embeddings = embeddings
+        self.index_dir = index_dir or settings.property_index_dir
+        self.model_name = (model_name or getattr(embeddings, 'model_name', None)
+                           or settings.embedding_model)
+        self.slots: Dict[str, int] = {}
+        self.hashes: Dict[str, str] = {}
+        self.free_slots: List[int] = []
+        self.vectors: Optional[np.ndarray] = None
+        self.vector_store: Optional[FAISS] = None
+        self.table: Optional[PropertyTable] = None
+        self.lexical = BM25Index(settings.bm25_k1, settings.bm25_b)
+        self.index_type = settings.vector_index_type.lower()
+        self.version = 0
+        self.last_changed: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._positions_version = -1
+        # Guards reads and writes of the live store; _sync_lock serializes syncs
+        # so embedding new rows never holds up queries.
+        self.lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._load()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.index_dir, self.MANIFEST_FILE)
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.index_dir, self.VECTORS_FILE)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _content_hash(self, text: str) -> str:
+        """Hash a rendered property text together with the embedding model name."""
+        return hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        """Load the persisted vectors and manifest, if they match the embedding model."""
+        try:
+            if not os.path.exists(self.manifest_path) or not os.path.exists(self.vectors_path):
+                return
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('embedding_model') != self.model_name:
+                return
+            vectors = np.load(self.vectors_path, mmap_mode='r')
+            slots = manifest.get('slots', {})
+            if set(slots) != set(manifest.get('hashes', {})):
+                raise ValueError("manifest slots and hashes are out of sync")
+            if any(slot >= vectors.shape[0] for slot in slots.values()):
+                raise ValueError("manifest references slots beyond the vectors file")
+            self.slots = slots
+            self.hashes = manifest.get('hashes', {})
+            self.vectors = vectors
+            used = set(slots.values())
+            self.free_slots = [slot for slot in range(vectors.shape[0]) if slot not in used]
+        except Exception as e:
+            print(f"Warning: Could not load property index: {str(e)}")
+            self.slots, self.hashes, self.free_slots, self.vectors = {}, {}, [], None
+
+    def _save_manifest(self) -> None:
+        """Persist the manifest, replacing the previous file atomically."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self.manifest_path + ".tmp", 'w') as f:
+            json.dump({
+                'embedding_model': self.model_name,
+                'slots': self.slots,
+                'hashes': self.hashes
+            }, f)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    def _ensure_capacity(self, needed: int, dim: int) -> None:
+        """Grow (or create) the slot file so at least ``needed`` free slots exist."""
+        if self.vectors is not None and self.vectors.shape[1] != dim:
+            # Embedding dimension changed: nothing stored is reusable, and dropping the
+            # hashes makes the next sync re-embed the listings this batch left out.
+            self.vectors, self.slots, self.hashes, self.free_slots = None, {}, {}, []
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if len(self.free_slots) >= needed:
+            return
+
+        new_capacity = max(capacity * 2, capacity + needed - len(self.free_slots))
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = self.vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                          shape=(new_capacity, dim))
+        if capacity:
+            grown[:capacity] = self.vectors
+        grown.flush()
+        del grown
+        os.replace(tmp_path, self.vectors_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode='r')
+        self.free_slots.extend(range(capacity, new_capacity))
+
+    def _write_vectors(self, property_ids: List[str], vectors: np.ndarray,
+                       removed: List[str], hashes: Dict[str, str]) -> None:
+        """Write changed vectors into free slots, then commit the new manifest."""
+        if property_ids:
+            self._ensure_capacity(len(property_ids), vectors.shape[1])
+            # Only slots that were already free are overwritten, so a crash before
+            # the manifest is replaced leaves the previous index intact.
+            targets = self.free_slots[:len(property_ids)]
+            self.free_slots = self.free_slots[len(property_ids):]
+            writable = np.load(self.vectors_path, mmap_mode='r+')
+            for slot, vector in zip(targets, vectors):
+                writable[slot] = vector
+            writable.flush()
+            del writable
+        else:
+            targets = []
+
+        released = []
+        for property_id in removed:
+            if property_id in self.slots:
+                released.append(self.slots.pop(property_id))
+            self.hashes.pop(property_id, None)
+        for property_id, slot in zip(property_ids, targets):
+            if property_id in self.slots:
+                released.append(self.slots[property_id])
+            self.slots[property_id] = slot
+            self.hashes[property_id] = hashes[property_id]
+
+        try:
+            self._save_manifest()
+        except Exception as e:
+            print(f"Warning: Could not save property index: {str(e)}")
+        self.free_slots.extend(released)
+
+    def sync(self, properties: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Bring the index in line with the given properties, embedding only what changed.
+
+        The first call builds the live FAISS store from the stored vectors; later
+        calls upsert and delete just the affected entries in place.
+        """
+        if not properties:
+            raise ValueError("No properties to index")
+
+        table = PropertyTable(properties)
+        texts = {}
+        hashes = {}
+        for property_id in table.positions:
+            texts[property_id] = render_property_text(table.row(property_id))
+            hashes[property_id] = self._content_hash(texts[property_id])
+
+        with self._sync_lock:
+            changed = [pid for pid in hashes if self.hashes.get(pid) != hashes[pid]]
+            removed = [pid for pid in self.hashes if pid not in hashes]
+            stats = {
+                'embedded': len(changed),
+                'reused': len(hashes) - len(changed),
+                'removed': len(removed)
+            }
+
+            new_vectors = np.empty((0, 0), dtype=np.float32)
+            if changed:
+                new_vectors = np.asarray(
+                    self.embeddings.embed_documents([texts[pid] for pid in changed]),
+                    dtype=np.float32
+                )
+
+            store = None
+            if self.vector_store is None or ((changed or removed) and not self._patchable()):
+                # Built before taking ``lock`` so queries keep using the current store meanwhile
+                ids = ([pid for pid in self.slots if pid in hashes]
+                       + [pid for pid in changed if pid not in self.slots])
+                store = self._build_store(ids, hashes, changed, new_vectors)
+
+            with self.lock:
+                previous = set(self.slots)
+                self._write_vectors(changed, new_vectors, removed, hashes)
+                self.table = table
+                self._sync_lexical(texts, changed, removed)
+                if store is not None:
+                    self.vector_store = store
+                elif (changed or removed) and self.index_type not in IN_PLACE_TYPES:
+                    self._patch_ivf(changed, removed)
+                elif changed or removed:
+                    stale = [pid for pid in changed + removed if pid in previous]
+                    if stale:
+                        self.vector_store.delete(stale)
+                    if changed:
+                        self.vector_store.add_embeddings(
+                            zip([""] * len(changed), new_vectors.tolist()),
+                            metadatas=[{'property_id': pid} for pid in changed],
+                            ids=changed
+                        )
+                if changed or removed:
+                    self.version += 1
+                self.last_changed = changed + removed
+
+        return stats
+
+    def _patchable(self) -> bool:
+        """Check whether the live store can take changes in place instead of being rebuilt."""
+        return (self.index_type in IN_PLACE_TYPES
+                or faiss.try_extract_index_ivf(self.vector_store.index) is not None)
+
+    def _patch_ivf(self, changed: List[str], removed: List[str]) -> None:
+        """Patch an IVF store by id, keeping FAISS ids dense like a flat index.
+
+        Re-embedded listings keep their position, the last entry moves into the
+        position of each removed listing, and new listings are appended. Only
+        those positions are removed and re-added; the centroids are kept.
+        """
+        store = self.vector_store
+        mapping = store.index_to_docstore_id
+        count = len(mapping)
+        ids = [mapping[i] for i in range(count)]
+        positions = {pid: i for i, pid in enumerate(ids)}
+        for pid in removed:
+            position = positions.pop(pid, None)
+            if position is None:
+                continue
+            last = ids.pop()
+            if last != pid:
+                ids[position] = last
+                positions[last] = position
+        for pid in changed:
+            if pid not in positions:
+                positions[pid] = len(ids)
+                ids.append(pid)
+
+        refreshed = set(changed)
+        stale = [i for i in range(count)
+                 if i >= len(ids) or ids[i] != mapping[i] or ids[i] in refreshed]
+        fresh = [i for i in stale if i < len(ids)] + list(range(count, len(ids)))
+        if stale:
+            store.index.remove_ids(np.array(stale, dtype=np.int64))
+        if fresh:
+            vectors = np.ascontiguousarray(self.vectors[[self.slots[ids[i]] for i in fresh]], dtype=np.float32)
+            store.index.add_with_ids(vectors, np.array(fresh, dtype=np.int64))
+
+        dropped = [pid for pid in removed if pid in store.docstore._dict]
+        if dropped:
+            store.docstore.delete(dropped)
+        added = {pid: None for pid in changed if pid not in store.docstore._dict}
+        if added:
+            store.docstore.add(added)
+        for i in range(len(ids), count):
+            del mapping[i]
+        for i in fresh:
+            mapping[i] = ids[i]
+
+    def _sync_lexical(self, texts: Dict[str, str], changed: List[str], removed: List[str]) -> None:
+        """Update the BM25 index; the first sync indexes every listing, later ones only the changes."""
+        if not len(self.lexical):
+            changed = list(texts)
+        for property_id in removed:
+            self.lexical.remove(property_id)
+        for property_id in changed:
+            self.lexical.add(property_id, texts[property_id])
+
+    def _store_positions(self) -> Dict[str, int]:
+        """Map property ids to FAISS row positions, rebuilt only after the index changes."""
+        if self._positions_version != self.version:
+            self._positions = {pid: i for i, pid in self.vector_store.index_to_docstore_id.items()}
+            self._positions_version = self.version
+        return self._positions
+
+    def search(self, embedding: List[float], k: int = 4,
+               property_ids: Optional[Iterable[Any]] = None,
+               fields: Optional[Iterable[str]] = None,
+               query: Optional[str] = None) -> List[Document]:
+        """Find the ``k`` nearest properties, optionally only among ``property_ids``.
+
+        Small candidate sets are ranked exactly from the stored vectors; larger ones
+        are searched in FAISS with an id selector, so the cost follows the number of
+        candidates rather than the catalog size. When ``query`` is given and hybrid
+        retrieval is enabled, the vector and BM25 rankings are fused. Results are
+        rendered with only ``fields`` when given.
+        """
+        with self.lock:
+            if query is None or not settings.hybrid_retrieval_enabled:
+                ids = self._search_ids(embedding, k, property_ids)
+            else:
+                ids = self._hybrid_ids(query, embedding, k, property_ids)
+            return [self.table.document(pid, fields) for pid in ids]
+
+    def _hybrid_ids(self, query: str, embedding: List[float], k: int,
+                    property_ids: Optional[Iterable[Any]]) -> List[str]:
+        """Fuse the top vector and BM25 candidates into one ranking of ``k`` ids."""
+        if property_ids is not None:
+            property_ids = [pid for pid in map(str, property_ids) if pid in self.slots]
+        fetch_k = max(k, settings.hybrid_fetch_k)
+        vector_ids = self._search_ids(embedding, fetch_k, property_ids)
+        lexical_ids = [pid for pid, _ in self.lexical.search(query, fetch_k, property_ids)]
+        return reciprocal_rank_fusion([vector_ids, lexical_ids], settings.rrf_k)[:k]
+
+    def _search_ids(self, embedding: List[float], k: int,
+                    property_ids: Optional[Iterable[Any]]) -> List[str]:
+        if property_ids is None:
+            docs = self.vector_store.similarity_search_by_vector(embedding, k=k)
+            return [doc.metadata['property_id'] for doc in docs]
+
+        candidates = [pid for pid in map(str, property_ids) if pid in self.slots]
+        if not candidates:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        if len(candidates) <= settings.prefilter_exact_limit:
+            vectors = np.asarray(self.vectors[[self.slots[pid] for pid in candidates]])
+            distances = ((vectors - query) ** 2).sum(axis=1)
+            order = np.argsort(distances)[:k]
+            return [candidates[i] for i in order]
+
+        positions = self._store_positions()
+        selector = faiss.IDSelectorBatch(
+            np.array([positions[pid] for pid in candidates], dtype=np.int64)
+        )
+        _, indices = self.vector_store.index.search(
+            query.reshape(1, -1), k, params=search_parameters(self.vector_store.index, selector)
+        )
+        return [self.vector_store.index_to_docstore_id[i] for i in indices[0] if i != -1]
+
+    def snapshot_state(self) -> Tuple[Dict[str, Any], faiss.Index]:
+        """Get the live table, BM25 index and FAISS index for a warm-start snapshot."""
+        with self.lock:
+            ids = [self.vector_store.index_to_docstore_id[i]
+                   for i in range(len(self.vector_store.index_to_docstore_id))]
+            return {
+                'embedding_model': self.model_name,
+                'index_type': self.index_type,
+                'ids': ids,
+                'ids_digest': self._ids_digest(sorted(ids)),
+                'trained_digest': self._trained_digest(),
+                'table': self.table,
+                'lexical': self.lexical
+            }, self.vector_store.index
+
+    def restore(self, state: Dict[str, Any], index: faiss.Index) -> bool:
+        """Adopt a snapshot taken by ``snapshot_state`` if it matches the stored vectors.
+
+        A snapshot taken before the index was last retrained is rejected, so the
+        retrained index is used instead.
+        """
+        if (state['embedding_model'] != self.model_name or state['index_type'] != self.index_type
+                or set(state['ids']) != set(self.slots)
+                or state['ids_digest'] != self._ids_digest(sorted(state['ids']))
+                or state.get('trained_digest') != self._trained_digest()):
+            return False
+        configure_search(index)
+        with self.lock:
+            self.table = state['table']
+            self.lexical = state['lexical']
+            self.vector_store = self._wrap_store(index, state['ids'])
+            self.version += 1
+        return True
+
+    def _ids_digest(self, ids: List[str], hashes: Dict[str, str] = None) -> str:
+        """Fingerprint the ids and contents an index was built from."""
+        hashes = self.hashes if hashes is None else hashes
+        joined = "\n".join(f"{pid}:{hashes[pid]}" for pid in ids)
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+    def _read_ann(self, name: str, meta_key: str, expected: str) -> Optional[faiss.Index]:
+        """Read a persisted index if its metadata entry matches ``expected``."""
+        try:
+            with open(self._path(self.ANN_META_FILE), 'r') as f:
+                meta = json.load(f)
+            if meta.get('index_type') != self.index_type or meta.get(meta_key) != expected:
+                return None
+            return faiss.read_index(self._path(name))
+        except (OSError, ValueError, RuntimeError):
+            return None
+
+    def _trained_digest(self) -> Optional[str]:
+        """Fingerprint of the persisted trained template; it changes whenever the index is retrained."""
+        try:
+            with open(self._path(self.ANN_META_FILE), 'r') as f:
+                return json.load(f).get('trained_digest')
+        except (OSError, ValueError):
+            return None
+
+    def _write_ann(self, index: faiss.Index, trained: faiss.Index, digest: str) -> None:
+        """Persist a built index and its trained empty template."""
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            for name, value in ((self.ANN_FILE, index), (self.ANN_TRAINED_FILE, trained)):
+                faiss.write_index(value, self._path(name) + ".tmp")
+                os.replace(self._path(name) + ".tmp", self._path(name))
+            with open(self._path(self.ANN_META_FILE) + ".tmp", 'w') as f:
+                json.dump({
+                    'index_type': self.index_type,
+                    'embedding_model': self.model_name,
+                    'ids_digest': digest,
+                    'trained_digest': hashlib.sha256(faiss.serialize_index(trained).tobytes()).hexdigest()
+                }, f)
+            os.replace(self._path(self.ANN_META_FILE) + ".tmp", self._path(self.ANN_META_FILE))
+        except Exception as e:
+            print(f"Warning: Could not save vector index: {str(e)}")
+
+    def train(self) -> None:
+        """Retrain the index (e.g. IVF centroids) on the current vectors and persist it."""
+        with self._sync_lock, self.lock:
+            ids = list(self.slots)
+            vectors = self._gather_vectors(ids)
+            trained = train_index(vectors, self.index_type)
+            index = build_index(vectors, trained=trained)
+            self._write_ann(index, trained, self._ids_digest(ids))
+            self.vector_store = self._wrap_store(index, ids)
+            self.version += 1
+
+    def _gather_vectors(self, ids: List[str], changed: List[str] = (),
+                        new_vectors: np.ndarray = None) -> np.ndarray:
+        """Get the vectors of ``ids`` from their slots, or from ``new_vectors`` for the ``changed`` ones."""
+        fresh = {pid: i for i, pid in enumerate(changed)}
+        dim = new_vectors.shape[1] if fresh else self.vectors.shape[1]
+        vectors = np.empty((len(ids), dim), dtype=np.float32)
+        stored = [i for i, pid in enumerate(ids) if pid not in fresh]
+        if stored:
+            vectors[stored] = self.vectors[[self.slots[ids[i]] for i in stored]]
+        if fresh:
+            updated = [i for i, pid in enumerate(ids) if pid in fresh]
+            vectors[updated] = new_vectors[[fresh[ids[i]] for i in updated]]
+        return vectors
+
+    def _build_store(self, ids: List[str] = None, hashes: Dict[str, str] = None,
+                     changed: List[str] = (), new_vectors: np.ndarray = None) -> FAISS:
+        """Wrap the stored vectors in a LangChain FAISS vector store.
+
+        A persisted index built from exactly these vectors is loaded as is;
+        otherwise the index is rebuilt, reusing the persisted trained template
+        so centroids are only learned by ``train`` or on first build. A sync
+        passes the ids, hashes and re-embedded vectors it is about to commit,
+        so the store can be built before the slots are written.
+        """
+        ids = list(self.slots) if ids is None else ids
+        digest = self._ids_digest(ids, hashes)
+        index = self._read_ann(self.ANN_FILE, 'ids_digest', digest)
+        if index is None:
+            vectors = self._gather_vectors(ids, changed, new_vectors)
+            trained = self._read_ann(self.ANN_TRAINED_FILE, 'embedding_model', self.model_name)
+            if trained is None or trained.d != vectors.shape[1]:
+                trained = train_index(vectors, self.index_type)
+            index = build_index(vectors, trained=trained)
+            self._write_ann(index, trained, digest)
+        else:
+            configure_search(index)
+        return self._wrap_store(index, ids)
+
+    def _wrap_store(self, index: faiss.Index, ids: List[str]) -> FAISS:
+        docstore = _PropertyIdDocstore(dict.fromkeys(ids))
+        return FAISS(
+            self.embeddings,
+            index,
+            docstore,
+            {i: pid for i, pid in enumerate(ids)}
+        )
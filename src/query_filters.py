@@ -0,0 +1,128 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+_MONTH_PATTERN = re.compile(
+    r"\b(" + "|".join(month[:3] + "(?:" + month[3:] + ")?" for month in MONTHS) + r")\b",
+    re.IGNORECASE
+)
+_GUESTS_PATTERN = re.compile(
+    r"\b(\d+)\s*(?:guests?|people|persons?|adults?|travell?ers?|of us)\b"
+    r"|\b(?:group|family|party) of (\d+)\b",
+    re.IGNORECASE
+)
+_PET_PATTERN = re.compile(r"\b(?:pets?|dogs?|cats?|puppy|pet[- ]friendly)\b", re.IGNORECASE)
+_MAX_PRICE_PATTERN = re.compile(
+    r"\b(?:under|below|less than|at most|max(?:imum)?|up to|cheaper than|no more than)\s*\$?\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE
+)
+_MIN_PRICE_PATTERN = re.compile(
+    r"\b(?:over|above|more than|at least|min(?:imum)?)\s*\$?\s*(\d+(?:\.\d+)?)\s*(?:\$|dollars|per night|a night|/night)",
+    re.IGNORECASE
+)
+_PRICE_RANGE_PATTERN = re.compile(
+    r"\bbetween\s*\$?\s*(\d+(?:\.\d+)?)\s*(?:and|-|to)\s*\$?\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE
+)
+# "free" only means available on its own ("free in May", "is it free?"), not in "free wifi"
+_AVAILABLE_PATTERN = re.compile(
+    r"\b(?:available|availability|vacant)\b"
+    r"|\bfree\s+(?:in|on|during|from|for|between|this|next|until|dates?)\b"
+    r"|\b(?:is|are)\s+(?:it|they|that one|this one|those|these|there any)\s+free\b|\bfree\s*[?.!]*\s*$",
+    re.IGNORECASE
+)
+_CONTEXT_REFERENCE_PATTERN = re.compile(
+    r"\b(?:it|its|it's|that|this|those|these|them|they|one|ones|first|second|third|fourth|fifth"
+    r"|last|previous|former|latter|above|same|other|another|else)\b",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class QueryConstraints:
+    """Structured filters extracted from a guest's free-text question."""
+
+    location: Optional[str] = None
+    months: List[str] = field(default_factory=list)
+    min_guests: Optional[int] = None
+    pet_friendly: Optional[bool] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    status: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        """Check whether no constraint was found."""
+        return (
+            self.location is None and not self.months and self.min_guests is None
+            and self.pet_friendly is None and self.min_price is None
+            and self.max_price is None and self.status is None
+        )
+
+
+def _normalize_month(token: str) -> str:
+    prefix = token[:3].lower()
+    return next(month for month in MONTHS if month[:3].lower() == prefix)
+
+
+def extract_constraints(query: str, locations: Iterable[str] = ()) -> QueryConstraints:
+    """Extract location, months, party size, pets, price and status constraints from a query.
+
+    Locations are only recognised when they match one of the known catalog
+    ``locations``, so unknown place names never filter everything out.
+    """
+    constraints = QueryConstraints()
+
+    lowered = query.lower()
+    for location in sorted(locations, key=len, reverse=True):
+        if re.search(r"\b" + re.escape(location.lower()) + r"\b", lowered):
+            constraints.location = location
+            break
+
+    for match in _MONTH_PATTERN.finditer(query):
+        # "may" is too common a verb to count unless it is capitalised and not
+        # the start of a question such as "May I bring my dog?".
+        if match.group(1).lower() == "may" and (
+            match.group(1) != "May"
+            or re.match(r"\s+(?:i|we|you|they|he|she)\b", query[match.end():], re.IGNORECASE)
+        ):
+            continue
+        month = _normalize_month(match.group(1))
+        if month not in constraints.months:
+            constraints.months.append(month)
+
+    guests = _GUESTS_PATTERN.search(query)
+    if guests:
+        constraints.min_guests = int(guests.group(1) or guests.group(2))
+
+    if _PET_PATTERN.search(query):
+        constraints.pet_friendly = True
+
+    price_range = _PRICE_RANGE_PATTERN.search(query)
+    if price_range:
+        low, high = sorted([float(price_range.group(1)), float(price_range.group(2))])
+        constraints.min_price, constraints.max_price = low, high
+    else:
+        max_price = _MAX_PRICE_PATTERN.search(query)
+        if max_price:
+            constraints.max_price = float(max_price.group(1))
+        min_price = _MIN_PRICE_PATTERN.search(query)
+        if min_price:
+            constraints.min_price = float(min_price.group(1))
+
+    if _AVAILABLE_PATTERN.search(query):
+        constraints.status = "available"
+
+    return constraints
+
+
+def references_context(query: str) -> bool:
+    """Check whether a query points back at earlier turns ("the second one", "is it...").
+
+    Such questions cannot be answered, or cached, without the conversation history.
+    """
+    return bool(_CONTEXT_REFERENCE_PATTERN.search(query))
@@ -0,0 +1,226 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .config import settings
+from .metrics import metrics
+from .tracing import record_llm_usage, record_stage
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used to reserve TPM budget."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` units per second.
+
+    Callers reserve units up front; the balance may go negative, in which case the
+    returned delay is how long the caller must wait for its reservation to be
+    covered. Reserving never sleeps, so the same bucket serves threads and
+    coroutines alike.
+    """
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take ``amount`` units and return the seconds to wait before using them."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def scale(self, fraction: float) -> None:
+        """Keep only ``fraction`` of the refill rate and capacity."""
+        with self._lock:
+            self.rate *= fraction
+            self.capacity *= fraction
+            self.tokens = min(self.tokens, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, if negative, additionally charge) ``amount`` units."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets for one model."""
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float = None,
+                 burst: float = None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute, burst or None)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _reserve(self, tokens: int) -> float:
+        delay = self.requests.reserve(1)
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def _record_wait(self, delay: float) -> None:
+        metrics.observe("rate_limiter_wait_seconds", delay, limiter=self.name)
+        record_stage("rate_limit_wait", delay)
+        if delay > 0:
+            metrics.increment("rate_limiter_throttled_total", limiter=self.name)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block the current thread until one request of ``tokens`` tokens fits the budget."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        self._record_wait(delay)
+        return delay
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Wait on the event loop until one request of ``tokens`` tokens fits the budget."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._record_wait(delay)
+        return delay
+
+    def scale(self, fraction: float) -> None:
+        """Keep only ``fraction`` of both budgets, e.g. one process's share of an account limit."""
+        self.requests.scale(fraction)
+        if self.tokens is not None:
+            self.tokens.scale(fraction)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token budget once the real usage of a request is known."""
+        if self.tokens is not None and actual_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Get the process-wide limiter for ``chat`` or ``embedding`` calls."""
+    with _limiters_lock:
+        if name not in _limiters:
+            if name == "chat":
+                _limiters[name] = RateLimiter(
+                    name,
+                    settings.max_requests_per_minute,
+                    settings.max_tokens_per_minute,
+                    settings.rate_limit_burst
+                )
+            elif name == "embedding":
+                _limiters[name] = RateLimiter(
+                    name,
+                    settings.embedding_requests_per_minute,
+                    settings.embedding_tokens_per_minute,
+                    settings.rate_limit_burst
+                )
+            else:
+                raise ValueError(f"Unknown rate limiter: {name}")
+        return _limiters[name]
+
+
+def share_rate_limits(processes: int) -> None:
+    """Split the chat and embedding budgets evenly between ``processes`` serving processes.
+
+    The configured limits are per API account, but each process keeps its own
+    buckets; call this once in each process so that together they stay within
+    the account limits.
+    """
+    for name in ("chat", "embedding"):
+        get_rate_limiter(name).scale(1.0 / processes)
+
+
+def create_session_limiter() -> RateLimiter:
+    """Create the per-session request budget used by the serving engine."""
+    return RateLimiter("session", settings.session_requests_per_minute,
+                       burst=settings.rate_limit_burst)
+
+
+class _UsageTracker:
+    """Shared bookkeeping for the sync and async LLM callback handlers."""
+
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+        self._pending: Dict[UUID, tuple] = {}
+
+    def start(self, run_id: UUID, prompts: List[str]) -> int:
+        estimated = sum(estimate_tokens(prompt) for prompt in prompts)
+        self._pending[run_id] = (estimated, time.perf_counter())
+        return estimated
+
+    def started(self, run_id: UUID) -> None:
+        estimated, _ = self._pending[run_id]
+        self._pending[run_id] = (estimated, time.perf_counter())
+
+    def end(self, run_id: UUID, response: Optional[LLMResult]) -> None:
+        estimated, started = self._pending.pop(run_id, (0, None))
+        if started is not None:
+            metrics.observe("llm_call_seconds", time.perf_counter() - started, limiter=self.limiter.name)
+        usage = ((response.llm_output or {}).get('token_usage') or {}) if response else {}
+        self.limiter.record_usage(estimated, usage.get('total_tokens', 0))
+        if response is not None:
+            if usage:
+                record_llm_usage(usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0))
+            else:
+                # Streamed responses carry no usage; estimate it like the budget does
+                completion = "".join(g.text for gs in response.generations for g in gs)
+                record_llm_usage(estimated, estimate_tokens(completion) if completion else 0)
+
+
+class RateLimitCallbackHandler(BaseCallbackHandler):
+    """Applies a RateLimiter to every LLM call made by a chain (blocking variant)."""
+
+    run_inline = True
+
+    def __init__(self, limiter: RateLimiter = None):
+        self.tracker = _UsageTracker(limiter or get_rate_limiter("chat"))
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *,
+                     run_id: UUID, **kwargs: Any) -> None:
+        estimated = self.tracker.start(run_id, prompts)
+        self.tracker.limiter.acquire(estimated)
+        self.tracker.started(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self.tracker.end(run_id, response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.tracker.end(run_id, None)
+
+
+class AsyncRateLimitCallbackHandler(AsyncCallbackHandler):
+    """Applies a RateLimiter to every LLM call made by a chain without blocking the loop."""
+
+    run_inline = True
+
+    def __init__(self, limiter: RateLimiter = None):
+        self.tracker = _UsageTracker(limiter or get_rate_limiter("chat"))
+
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *,
+                           run_id: UUID, **kwargs: Any) -> None:
+        estimated = self.tracker.start(run_id, prompts)
+        await self.tracker.limiter.aacquire(estimated)
+        self.tracker.started(run_id)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self.tracker.end(run_id, response)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.tracker.end(run_id, None)
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+from .config import settings
+from .metrics import metrics
+
+# A cache scope is the set of (property_id, content hash) pairs retrieved for a
+# question, so an answer is only reused while it is grounded in the same rows.
+Scope = FrozenSet[Tuple[str, str]]
+
+
+class _CacheEntry:
+    __slots__ = ("embedding", "answer", "scope", "created_at")
+
+    def __init__(self, embedding: np.ndarray, answer: str, scope: Scope):
+        self.embedding = embedding
+        self.answer = answer
+        self.scope = scope
+        self.created_at = time.monotonic()
+
+
+class SemanticResponseCache:
+    """Answer cache keyed by query embedding similarity within a retrieval scope.
+
+    A lookup hits when a cached question with the same scope has cosine
+    similarity of at least ``threshold``; lookups within ``near_miss_margin``
+    below the threshold are counted as near misses to help tune it. Entries are
+    evicted least-recently-used beyond ``max_entries`` or after ``ttl`` seconds,
+    and dropped as soon as any property they reference changes.
+    """
+
+    def __init__(self, threshold: float = None, max_entries: int = None, ttl: float = None,
+                 near_miss_margin: float = None):
+        self.threshold = threshold if threshold is not None else settings.response_cache_threshold
+        self.max_entries = max_entries or settings.response_cache_max_entries
+        self.ttl = ttl if ttl is not None else settings.response_cache_ttl
+        self.near_miss_margin = (near_miss_margin if near_miss_margin is not None
+                                 else settings.response_cache_near_miss_margin)
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._by_scope: Dict[Scope, Set[int]] = {}
+        self._by_property: Dict[str, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.near_misses = 0
+
+    @staticmethod
+    def _normalize(embedding: Iterable[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        scoped = self._by_scope.get(entry.scope)
+        if scoped is not None:
+            scoped.discard(entry_id)
+            if not scoped:
+                del self._by_scope[entry.scope]
+        for property_id, _ in entry.scope:
+            referencing = self._by_property.get(property_id)
+            if referencing is not None:
+                referencing.discard(entry_id)
+                if not referencing:
+                    del self._by_property[property_id]
+
+    def lookup(self, embedding: Iterable[float], scope: Scope) -> Optional[str]:
+        """Get a cached answer for a similar question with the same scope, if any."""
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_score = None, -1.0
+            for entry_id in list(self._by_scope.get(scope, ())):
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl:
+                    self._remove(entry_id)
+                    continue
+                score = float(np.dot(entry.embedding, query))
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_id)
+                self.hits += 1
+                metrics.increment("response_cache_lookups_total", result="hit")
+                return self._entries[best_id].answer
+
+            if best_id is not None and best_score >= self.threshold - self.near_miss_margin:
+                self.near_misses += 1
+                metrics.increment("response_cache_lookups_total", result="near_miss")
+            else:
+                self.misses += 1
+                metrics.increment("response_cache_lookups_total", result="miss")
+            return None
+
+    def store(self, embedding: Iterable[float], scope: Scope, answer: str) -> None:
+        """Cache an answer for a question embedding within a scope."""
+        entry = _CacheEntry(self._normalize(embedding), answer, scope)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._by_scope.setdefault(scope, set()).add(entry_id)
+            for property_id, _ in scope:
+                self._by_property.setdefault(property_id, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_properties(self, property_ids: Iterable[str]) -> int:
+        """Drop every entry referencing one of the given properties; returns how many."""
+        with self._lock:
+            entry_ids = set()
+            for property_id in property_ids:
+                entry_ids |= self._by_property.get(str(property_id), set())
+            for entry_id in entry_ids:
+                self._remove(entry_id)
+            return len(entry_ids)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._by_scope.clear()
+            self._by_property.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit, miss and near-miss counts and the current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'near_misses': self.near_misses,
+                'size': len(self._entries)
+            }
@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+
+from .config import settings
+from .context_builder import context_builder
+from .data_loader import PropertyDataLoader
+from .property_documents import relevant_fields
+from .property_index import PropertyIndex
+from .query_filters import extract_constraints
+
+
+class PropertyRetriever(BaseRetriever):
+    """Retriever over the live property index that is safe to use during catalog syncs.
+
+    When a ``data_loader`` is given, structured constraints found in the query
+    (location, months, party size, pets, price, status) first narrow the
+    candidates using the catalog columns, and only those candidates are ranked by
+    vector similarity, fused with BM25 keyword matches. If no listing satisfies
+    every constraint the search falls back to the whole catalog so the LLM can
+    still suggest alternatives. Each listing is rendered with only the fields the
+    query needs, and the results are cut to the context builder's documents token
+    budget.
+    """
+
+    property_index: PropertyIndex
+    data_loader: Optional[PropertyDataLoader] = None
+    k: int = settings.retrieval_k
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _candidate_ids(self, query: str) -> Optional[List[int]]:
+        """Get the ids allowed by the query's constraints, or None to search everything."""
+        if self.data_loader is None:
+            return None
+        constraints = extract_constraints(query, self.data_loader.get_locations())
+        if constraints.is_empty():
+            return None
+        property_ids = self.data_loader.find_property_ids(
+            location=constraints.location,
+            months=constraints.months,
+            min_guests=constraints.min_guests,
+            pet_friendly=constraints.pet_friendly,
+            min_price=constraints.min_price,
+            max_price=constraints.max_price,
+            status=constraints.status
+        )
+        return property_ids or None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        """Embed the query, then search the current store while holding the index lock."""
+        embedding = self.property_index.embeddings.embed_query(query)
+        return self.retrieve_by_vector(query, embedding)
+
+    def retrieve_by_vector(self, query: str, embedding: List[float]) -> List[Document]:
+        """Retrieve for a query whose embedding the caller already computed."""
+        property_ids = self._candidate_ids(query)
+        fields = relevant_fields(query) if settings.document_relevant_fields_only else None
+        docs = self.property_index.search(embedding, k=self.k, property_ids=property_ids,
+                                          fields=fields, query=query)
+        return context_builder.select_documents(docs)
@@ -0,0 +1,114 @@
+import re
+from typing import List
+
+from .config import settings
+from .memory import ConversationMemory
+from .metrics import metrics
+from .query_filters import QueryConstraints, extract_constraints, references_context
+from .router import CatalogRouter
+
+_FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(?:and|also|but|or|so|what about|how about|any|anything|something|one|ones|with|without"
+    r"|cheaper|bigger|smaller|closer|larger|nearer|same|only|just)\b",
+    re.IGNORECASE
+)
+_PLURAL_REFERENCE_PATTERN = re.compile(
+    r"\b(?:them|they|those|these|both|all of them|either|any of them|ones)\b", re.IGNORECASE
+)
+
+
+def _format_constraints(constraints: QueryConstraints) -> List[str]:
+    """Render constraints as phrases ``extract_constraints`` parses back."""
+    parts = []
+    if constraints.location:
+        parts.append(f"in {constraints.location}")
+    if constraints.months:
+        parts.append("in " + ", ".join(constraints.months))
+    if constraints.min_guests:
+        parts.append(f"for {constraints.min_guests} guests")
+    if constraints.pet_friendly:
+        parts.append("pet friendly")
+    if constraints.min_price is not None and constraints.max_price is not None:
+        parts.append(f"between ${constraints.min_price:g} and ${constraints.max_price:g}")
+    elif constraints.max_price is not None:
+        parts.append(f"under ${constraints.max_price:g}")
+    elif constraints.min_price is not None:
+        parts.append(f"over {constraints.min_price:g} dollars")
+    if constraints.status:
+        parts.append(constraints.status)
+    return parts
+
+
+class QuestionRewriter:
+    """Turns follow-up questions into standalone retrieval queries without an LLM call.
+
+    Self-contained questions are returned unchanged. A follow-up gets the names
+    of the listings it refers to ("the second one", "it", "them") and the
+    constraints of earlier questions it does not restate (location, months,
+    party size, pets, price, availability) appended, which is what the
+    condense call used to spell out for the retriever. The answer prompt still
+    gets the original question and the conversation history.
+    """
+
+    def __init__(self, router: CatalogRouter):
+        self.router = router
+
+    def is_follow_up(self, question: str) -> bool:
+        """Check whether a question leans on earlier turns rather than standing alone."""
+        return references_context(question) or bool(_FOLLOW_UP_PATTERN.match(question))
+
+    def rewrite(self, question: str, memory: ConversationMemory) -> str:
+        """Get the standalone retrieval query for ``question`` in the conversation ``memory``."""
+        if not self.is_follow_up(question):
+            metrics.increment("question_rewrites_total", result="unchanged")
+            return question
+
+        parts = []
+        named, _ = self.router.vocabulary.mentioned_properties(question)
+        if not named:
+            recent = self.router.recent_properties(memory, question)
+            if _PLURAL_REFERENCE_PATTERN.search(question):
+                referenced = recent
+            else:
+                property_id = self.router.resolve_reference(question, recent)
+                referenced = [] if property_id is None else [property_id]
+            for property_id in referenced:
+                parts.append(self.router.data_loader.get_property_by_id(property_id)['name'])
+
+        parts.extend(_format_constraints(self._carried_constraints(question, memory)))
+        if not parts:
+            metrics.increment("question_rewrites_total", result="unchanged")
+            return question
+        metrics.increment("question_rewrites_total", result="rewritten")
+        return f"{question} ({', '.join(parts)})"
+
+    def _carried_constraints(self, question: str, memory: ConversationMemory) -> QueryConstraints:
+        """Get the constraints of earlier questions that ``question`` does not restate.
+
+        For each constraint, the most recent earlier search question that set it
+        wins; questions about particular listings ("is the second one pet
+        friendly?") are not searches and are skipped.
+        """
+        locations = self.router.data_loader.get_locations()
+        current = extract_constraints(question, locations)
+        carried = QueryConstraints()
+        start = max(0, memory.message_count - settings.max_memory_messages)
+        for message in reversed(memory.get_messages(start)):
+            if message['role'] != 'user' or message['content'] == question \
+                    or references_context(message['content']):
+                continue
+            earlier = extract_constraints(message['content'], locations)
+            if carried.location is None and current.location is None:
+                carried.location = earlier.location
+            if not carried.months and not current.months:
+                carried.months = earlier.months
+            if carried.min_guests is None and current.min_guests is None:
+                carried.min_guests = earlier.min_guests
+            if carried.pet_friendly is None and current.pet_friendly is None:
+                carried.pet_friendly = earlier.pet_friendly
+            if carried.min_price is None and carried.max_price is None \
+                    and current.min_price is None and current.max_price is None:
+                carried.min_price, carried.max_price = earlier.min_price, earlier.max_price
+            if carried.status is None and current.status is None:
+                carried.status = earlier.status
+        return carried
@@ -0,0 +1,391 @@
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+from .data_loader import CatalogIndex, PropertyDataLoader
+from .memory import ConversationMemory
+from .metrics import metrics
+from .query_filters import MONTHS, extract_constraints
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# (column, question pattern); cleaning fee and deposit questions are not price questions
+FIELD_PATTERNS: List[Tuple[str, "re.Pattern"]] = [
+    ('cleaning_fee', re.compile(r"\bcleaning(?: fee)?\b", re.IGNORECASE)),
+    ('security_deposit', re.compile(r"\b(?:security )?deposit\b", re.IGNORECASE)),
+    ('price', re.compile(r"\b(?:price|prices|cost|costs|how much|rate|nightly)\b", re.IGNORECASE)),
+    ('check_in_time', re.compile(r"\bcheck[- ]?in\b|\barriv(?:e|al)\b", re.IGNORECASE)),
+    ('check_out_time', re.compile(r"\bcheck[- ]?out\b", re.IGNORECASE)),
+    ('minimum_stay', re.compile(
+        r"\b(?:minimum|min)(?: stay| nights?)?\b|\bhow many nights\b|\bshortest stay\b", re.IGNORECASE
+    )),
+    ('pet_friendly', re.compile(r"\b(?:pets?|dogs?|cats?|pet[- ]friendly|animals?)\b", re.IGNORECASE)),
+    ('number_of_bedrooms', re.compile(r"\bbed ?rooms?\b", re.IGNORECASE)),
+    ('number_of_bathrooms', re.compile(r"\bbath ?rooms?\b|\bbaths\b", re.IGNORECASE)),
+    ('square_meters', re.compile(r"\bhow big\b|\bsize\b|\bsquare met(?:er|re)s\b|\bm2\b|\bsqm\b", re.IGNORECASE)),
+    ('max_guests', re.compile(
+        r"\bhow many (?:guests|people|persons|adults)\b|\b(?:max(?:imum)?|guest) (?:guests|occupancy|capacity)\b"
+        r"|\bcapacity\b|\bsleeps?\b",
+        re.IGNORECASE
+    )),
+    ('location', re.compile(r"\bwhere\b|\blocat(?:ion|ed)\b|\bwhich city\b", re.IGNORECASE)),
+    ('property_type', re.compile(r"\b(?:what|which) (?:type|kind) of\b|\bproperty type\b", re.IGNORECASE)),
+    ('available_months', re.compile(r"\bwhen\b|\b(?:which|what) months?\b|\bavailab\w*\b|\bdates\b", re.IGNORECASE)),
+    ('amenities', re.compile(r"\bamenities\b|\bfeatures\b|\bwhat does (?:it|that one|this one) (?:have|offer)\b",
+                             re.IGNORECASE)),
+]
+
+# A price question in its own words, as opposed to "how much is the deposit?"
+_EXPLICIT_PRICE_PATTERN = re.compile(r"\b(?:price|prices|rate|nightly|per night)\b", re.IGNORECASE)
+
+_ORDINALS = {
+    'first': 0, '1st': 0, 'second': 1, '2nd': 1, 'third': 2, '3rd': 2,
+    'fourth': 3, '4th': 3, 'fifth': 4, '5th': 4, 'last': -1
+}
+_ORDINAL_PATTERN = re.compile(
+    r"\b(?:the )?(" + "|".join(_ORDINALS) + r")(?: one| option| place| property| listing)?\b"
+    r"|\b(?:number|option|#)\s*(\d)\b",
+    re.IGNORECASE
+)
+_PRONOUN_PATTERN = re.compile(
+    r"\b(?:it|its|it's|that one|this one|that place|this place|that property|this property)\b",
+    re.IGNORECASE
+)
+_LIST_PATTERN = re.compile(
+    r"\b(?:which|list|show|find|any|anything|something|options?|properties|places|listings|"
+    r"rentals|what (?:properties|places|listings))\b",
+    re.IGNORECASE
+)
+
+# Negated questions ask for the opposite of what the catalog filters would find
+_NEGATION_PATTERN = re.compile(
+    r"\b(?:not|never|without|except|excluding|no(?! (?:more|less) than\b)|\w+n['’]t|dont|doesnt|isnt|arent|cant)\b",
+    re.IGNORECASE
+)
+
+# Words that carry no request of their own; anything else makes the router hand the turn to the LLM
+FILLER_WORDS: Set[str] = set("""
+a an the is are was were be been do does did have has had it its it's this that these those
+one ones there here any anything something which what what's whats where when how much many
+i i'm we we're you me my our us your can could would will should may might please tell show list
+find give get know let about for of in on at to from with and or also too so then per night nights
+time times fee fees price prices cost costs rate nightly check out arrive arrival minimum min stay
+shortest pet pets dog dogs cat cats friendly allowed allow bring animal animals bedroom bedrooms bed
+bath baths bathroom bathrooms room rooms how big size square meters metres m2 sqm guests guest people
+persons adults max maximum capacity occupancy sleep sleeps where located location city type kind
+property properties place places listing listings option options rentals available
+availability free vacant months month dates amenities features offer number under below less than
+more over above at least most up no between dollars dollar usd eur euros cheaper security deposit
+cleaning first second third fourth fifth 1st 2nd 3rd 4th 5th last group family party travelers
+travellers okay ok thanks thank hi hello hey
+""".split())
+
+MONTH_WORDS = {word for month in MONTHS for word in (month.lower(), month[:3].lower())}
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def _parsed_numbers(question: str) -> Set[str]:
+    """Get the numbers in a question that a filter or listing reference accounts for."""
+    constraints = extract_constraints(question)
+    values = [constraints.min_guests, constraints.min_price, constraints.max_price]
+    numbers = {str(int(value)) for value in values if value is not None and float(value).is_integer()}
+    numbers.update(match.group(2) for match in _ORDINAL_PATTERN.finditer(question) if match.group(2))
+    return numbers
+
+
+def _join_words(values: List[str]) -> str:
+    if len(values) <= 1:
+        return "".join(values)
+    return ", ".join(values[:-1]) + " and " + values[-1]
+
+
+@dataclass
+class RoutedAnswer:
+    """A reply produced from the catalog without calling the LLM."""
+
+    answer: str
+    intent: str
+    property_ids: List[int] = field(default_factory=list)
+
+
+class _CatalogVocabulary:
+    """Name and word lookups over one loaded catalog."""
+
+    def __init__(self, catalog: CatalogIndex):
+        self.catalog = catalog
+        self.names: Dict[Tuple[str, ...], List[int]] = {}
+        for property_id, name in zip(catalog.columns['property_id'], catalog.columns['name']):
+            key = tuple(_words(str(name)))
+            if key:
+                self.names.setdefault(key, []).append(property_id)
+        self.max_name_words = max((len(key) for key in self.names), default=0)
+        self.amenities: Dict[str, Tuple[str, ...]] = {
+            amenity: tuple(_words(amenity)) for amenity in catalog.amenity
+        }
+        # Words a question may use besides filler; property types are not a
+        # catalog filter, so "any villas?" is left to the LLM
+        self.words = set(MONTH_WORDS)
+        for location in catalog.locations:
+            self.words.update(_words(location))
+        for amenity_words in self.amenities.values():
+            self.words.update(amenity_words)
+
+    def mentioned_properties(self, text: str) -> Tuple[List[int], Set[str]]:
+        """Get the properties named in a text, in order of appearance, and the words naming them.
+
+        Names shared by several listings are ambiguous and skipped.
+        """
+        words = _words(text)
+        found: List[int] = []
+        name_words: Set[str] = set()
+        i = 0
+        while i < len(words):
+            for n in range(min(self.max_name_words, len(words) - i), 0, -1):
+                ids = self.names.get(tuple(words[i:i + n]))
+                if ids is not None:
+                    if len(ids) == 1 and ids[0] not in found:
+                        found.append(ids[0])
+                    name_words.update(words[i:i + n])
+                    i += n
+                    break
+            else:
+                i += 1
+        return found, name_words
+
+    def mentioned_amenities(self, question: str) -> List[str]:
+        # "security deposit" asks for a field, not for the "security" amenity
+        for _, pattern in FIELD_PATTERNS:
+            question = pattern.sub(" ", question)
+        words = _words(question)
+        text = " " + " ".join(words) + " "
+        return [amenity for amenity, amenity_words in self.amenities.items()
+                if amenity_words and " " + " ".join(amenity_words) + " " in text]
+
+
+class CatalogRouter:
+    """Answers catalog lookups and simple filters straight from the loaded catalog.
+
+    A question is served locally only when every word in it is accounted for:
+    a listing (by name, by ordinal such as "the second one", or by "it" when
+    exactly one listing was discussed last), a field such as the price or
+    check-in time, an amenity or a filter constraint, or filler. Anything else
+    - preferences, comparisons, follow-ups the router cannot resolve - returns
+    None so the turn goes to the LLM.
+    """
+
+    def __init__(self, data_loader: PropertyDataLoader, max_results: int = None):
+        self.data_loader = data_loader
+        self.max_results = max_results or settings.router_max_results
+        self._vocabulary: Optional[_CatalogVocabulary] = None
+        self._lock = threading.Lock()
+        self.local_turns = 0
+        self.llm_turns = 0
+        self.local_seconds = 0.0
+
+    @property
+    def vocabulary(self) -> _CatalogVocabulary:
+        catalog = self.data_loader.catalog
+        vocabulary = self._vocabulary
+        if vocabulary is None or vocabulary.catalog is not catalog:
+            # Rebuilt whenever a catalog sync swapped in a new catalog
+            vocabulary = _CatalogVocabulary(catalog)
+            self._vocabulary = vocabulary
+        return vocabulary
+
+    def recent_properties(self, memory: ConversationMemory, question: str = None) -> List[int]:
+        """Get the listings of the latest message that named any, in the order they were named.
+
+        A trailing user message equal to ``question`` is the turn being
+        answered, not history, and is skipped.
+        """
+        start = max(0, memory.message_count - settings.max_memory_messages)
+        messages = memory.get_messages(start)
+        if question is not None and messages and messages[-1]['role'] == 'user' \
+                and messages[-1]['content'] == question:
+            messages = messages[:-1]
+        for message in reversed(messages):
+            found, _ = self.vocabulary.mentioned_properties(message['content'])
+            if found:
+                return found
+        return []
+
+    def route(self, question: str, memory: ConversationMemory) -> Optional[RoutedAnswer]:
+        """Answer a question from the catalog, or return None to fall back to the LLM."""
+        start = time.perf_counter()
+        try:
+            routed = self._route(question, memory)
+        except Exception as e:
+            print(f"Warning: Could not route question: {str(e)}")
+            routed = None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if routed is not None:
+                self.local_turns += 1
+                self.local_seconds += elapsed
+            else:
+                self.llm_turns += 1
+        metrics.increment("router_turns_total", result="local" if routed else "llm")
+        metrics.observe("router_seconds", elapsed, result="local" if routed else "llm")
+        return routed
+
+    def _route(self, question: str, memory: ConversationMemory) -> Optional[RoutedAnswer]:
+        vocabulary = self.vocabulary
+        named, name_words = vocabulary.mentioned_properties(question)
+        if len(named) > 1:
+            return None  # comparisons are for the LLM
+        if _NEGATION_PATTERN.search(question):
+            return None
+
+        words = set(_words(question))
+        leftover = words - FILLER_WORDS - vocabulary.words - name_words
+        # A number no filter understood ("for 3 nights") changes the answer
+        if leftover - _parsed_numbers(question):
+            return None
+
+        fields = [column for column, pattern in FIELD_PATTERNS if pattern.search(question)]
+        if ({'cleaning_fee', 'security_deposit'} & set(fields)
+                and not _EXPLICIT_PRICE_PATTERN.search(question)):
+            fields = [column for column in fields if column != 'price']
+        amenities = vocabulary.mentioned_amenities(question)
+
+        property_id = named[0] if named else self.resolve_reference(
+            question, self.recent_properties(memory, question)
+        )
+        if property_id is not None:
+            return self._lookup(property_id, question, fields, amenities)
+        if _ORDINAL_PATTERN.search(question) or _PRONOUN_PATTERN.search(question):
+            return None  # a reference to a listing that could not be resolved
+        if not named and _LIST_PATTERN.search(question):
+            return self._filter(question, amenities)
+        return None
+
+    def resolve_reference(self, question: str, recent: List[int]) -> Optional[int]:
+        """Get the listing among ``recent`` that "the second one", "it" etc. in a question point at."""
+        ordinal = _ORDINAL_PATTERN.search(question)
+        if ordinal is None and not _PRONOUN_PATTERN.search(question):
+            return None
+        if not recent:
+            return None
+        if ordinal is None:
+            return recent[0] if len(recent) == 1 else None
+        if ordinal.group(1):
+            position = _ORDINALS[ordinal.group(1).lower()]
+        else:
+            position = int(ordinal.group(2)) - 1
+        if position >= len(recent) or position < -len(recent):
+            return None
+        return recent[position]
+
+    def _lookup(self, property_id: int, question: str, fields: List[str],
+                amenities: List[str]) -> Optional[RoutedAnswer]:
+        prop = self.data_loader.get_property_by_id(property_id)
+        months = extract_constraints(question).months
+        sentences = []
+        if amenities:
+            sentences.append(self._amenity_answer(prop, amenities))
+        if months:
+            sentences.append(self._months_answer(prop, months))
+        for column in fields:
+            if column == 'amenities' and amenities or column == 'available_months' and months:
+                continue
+            sentences.append(self._field_answer(prop, column))
+        if not sentences:
+            return None
+        return RoutedAnswer(" ".join(sentences), "lookup", [property_id])
+
+    def _field_answer(self, prop: Dict[str, Any], column: str) -> str:
+        name = prop['name']
+        value = prop[column]
+        if column == 'price':
+            return f"{name} costs ${value} per night."
+        if column == 'cleaning_fee':
+            return f"The cleaning fee at {name} is ${value}."
+        if column == 'security_deposit':
+            return f"{name} asks for a security deposit of ${value}."
+        if column == 'check_in_time':
+            return f"Check-in at {name} is from {value}."
+        if column == 'check_out_time':
+            return f"Check-out at {name} is by {value}."
+        if column == 'minimum_stay':
+            return f"{name} has a minimum stay of {value} nights."
+        if column == 'pet_friendly':
+            if str(value).lower() == 'yes':
+                return f"Yes, {name} is pet friendly."
+            return f"No, {name} is not pet friendly."
+        if column == 'number_of_bedrooms':
+            return f"{name} has {value} bedroom{'s' if value != 1 else ''}."
+        if column == 'number_of_bathrooms':
+            return f"{name} has {value} bathroom{'s' if value != 1 else ''}."
+        if column == 'square_meters':
+            return f"{name} is {value} square meters."
+        if column == 'max_guests':
+            return f"{name} sleeps up to {value} guests."
+        if column == 'location':
+            return f"{name} is in {value}."
+        if column == 'property_type':
+            return f"{name} is a {value}."
+        if column == 'available_months':
+            status = "" if prop['status'] == 'available' else f" It is currently {prop['status']}."
+            return f"{name} is available in {_join_words(list(value))}.{status}"
+        return f"{name} offers {_join_words(list(value))}."
+
+    def _amenity_answer(self, prop: Dict[str, Any], amenities: List[str]) -> str:
+        have = {amenity.lower(): amenity for amenity in prop['amenities']}
+        present = [have[amenity] for amenity in amenities if amenity in have]
+        missing = [amenity for amenity in amenities if amenity not in have]
+        if not missing:
+            return f"Yes, {prop['name']} has {_join_words(present)}."
+        answer = f"No, {prop['name']} doesn't list {_join_words(missing)}"
+        if present:
+            answer += f", but it has {_join_words(present)}"
+        return answer + f". Its amenities are {_join_words(list(prop['amenities']))}."
+
+    def _months_answer(self, prop: Dict[str, Any], months: List[str]) -> str:
+        available = [month.lower() for month in prop['available_months']]
+        status = "" if prop['status'] == 'available' else f" Note that it is currently {prop['status']}."
+        if all(month.lower() in available for month in months):
+            return f"Yes, {prop['name']} is available in {_join_words(months)}.{status}"
+        return (f"No, {prop['name']} is only available in "
+                f"{_join_words(list(prop['available_months']))}.{status}")
+
+    def _filter(self, question: str, amenities: List[str]) -> Optional[RoutedAnswer]:
+        constraints = extract_constraints(question, self.data_loader.get_locations())
+        if constraints.is_empty() and not amenities:
+            return None
+        records = self.data_loader.filter_properties(
+            location=constraints.location,
+            months=constraints.months,
+            min_guests=constraints.min_guests,
+            pet_friendly=constraints.pet_friendly,
+            min_price=constraints.min_price,
+            max_price=constraints.max_price,
+            status=constraints.status,
+            amenities=amenities
+        )
+        if not len(records):
+            return None  # the LLM can suggest alternatives
+        shown = records[:self.max_results].to_list()
+        lines = [f"I found {len(records)} matching propert{'y' if len(records) == 1 else 'ies'}:"]
+        for prop in shown:
+            lines.append(f"- {prop['name']} ({prop['location']}): ${prop['price']} per night, "
+                         f"up to {prop['max_guests']} guests, {prop['status']}")
+        if len(records) > len(shown):
+            lines.append(f"...and {len(records) - len(shown)} more. Tell me more about what you need "
+                         "and I can narrow it down.")
+        return RoutedAnswer("\n".join(lines), "filter", [prop['property_id'] for prop in shown])
+
+    def report(self) -> str:
+        """Summarize how many turns were answered locally and how fast."""
+        with self._lock:
+            total = self.local_turns + self.llm_turns
+            if not total:
+                return "Router: no turns yet"
+            average = self.local_seconds / self.local_turns * 1000 if self.local_turns else 0.0
+            return (f"Router: {self.local_turns}/{total} turns answered locally "
+                    f"({self.local_turns / total:.0%}), {average:.2f}ms on average")
@@ -0,0 +1,248 @@
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import time
+import traceback
+import uuid
+from typing import Dict, Optional
+
+from aiohttp import WSMsgType, web
+from langchain_core.language_models import BaseChatModel
+
+from src.chatbot import PropertyChatbot
+from src.config import settings
+from src.conversation_store import close_conversation_stores
+from src.engine import ChatEngine
+from src.metrics import metrics
+from src.rate_limiter import share_rate_limits
+from src.startup import startup
+from src.tracing import profiler
+
+ENGINE = web.AppKey("engine", ChatEngine)
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({'error': message}, status=status)
+
+
+def _parse_message(data: str) -> Optional[str]:
+    """Get the question from a WebSocket frame: plain text or ``{"message": ...}``."""
+    try:
+        body = json.loads(data)
+    except ValueError:
+        body = data
+    if isinstance(body, dict):
+        body = body.get('message')
+    if not isinstance(body, str) or not body.strip():
+        return None
+    return body.strip()
+
+
+async def handle_chat(request: web.Request) -> web.Response:
+    """Answer one turn: ``{"session_id": ..., "message": ...}`` -> ``{"session_id": ..., "answer": ...}``.
+
+    A new session id is generated when none is given.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        return _error(400, "Request body must be JSON")
+    message = body.get('message') if isinstance(body, dict) else None
+    if not isinstance(message, str) or not message.strip():
+        return _error(400, "A non-empty 'message' is required")
+    session_id = body.get('session_id') or uuid.uuid4().hex
+    try:
+        answer = await request.app[ENGINE].aget_response(str(session_id), message.strip())
+    except ValueError as e:
+        return _error(400, str(e))
+    return web.json_response({'session_id': session_id, 'answer': answer})
+
+
+async def handle_websocket(request: web.Request) -> web.WebSocketResponse:
+    """Stream answers over a WebSocket, one session per connection.
+
+    The session comes from the ``session_id`` query parameter (or is created
+    and announced as ``{"type": "session"}``). Each question frame is answered
+    with ``{"type": "token"}`` frames followed by ``{"type": "end"}``.
+    """
+    engine = request.app[ENGINE]
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+    session_id = request.query.get('session_id') or uuid.uuid4().hex
+    try:
+        engine.get_session(session_id)
+    except ValueError as e:
+        await ws.send_json({'type': 'error', 'error': str(e)})
+        await ws.close()
+        return ws
+    await ws.send_json({'type': 'session', 'session_id': session_id})
+
+    try:
+        async for frame in ws:
+            if frame.type != WSMsgType.TEXT:
+                continue
+            message = _parse_message(frame.data)
+            if message is None:
+                await ws.send_json({'type': 'error', 'error': "A non-empty message is required"})
+                continue
+            async for token in engine.astream_response(session_id, message):
+                await ws.send_json({'type': 'token', 'content': token})
+            await ws.send_json({'type': 'end'})
+    finally:
+        engine.close_session(session_id)
+    return ws
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """Metrics of the worker process that took the request, in the Prometheus text format."""
+    return web.Response(text=metrics.prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    chatbot = request.app[ENGINE].chatbot
+    return web.json_response({
+        'status': "ok",
+        'pid': os.getpid(),
+        'listings': len(chatbot.property_index.slots),
+        'sessions': len(request.app[ENGINE].sessions)
+    })
+
+
+def create_app(engine: ChatEngine) -> web.Application:
+    """Build the HTTP/WebSocket application around a serving engine."""
+    app = web.Application()
+    app[ENGINE] = engine
+    app.router.add_post("/chat", handle_chat)
+    app.router.add_get("/ws", handle_websocket)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/health", handle_health)
+    return app
+
+
+def _run_worker(chatbot: PropertyChatbot, sock: socket.socket, worker: int, workers: int) -> None:
+    """Serve on the inherited socket in a forked worker until it is told to stop."""
+    import faiss
+
+    # Scale out by processes, not by OpenMP threads, which are not fork-safe.
+    faiss.omp_set_num_threads(1)
+    # Workers share the conversation database, so none may hold a write transaction open
+    settings.conversation_flush_interval = 0
+    chatbot.after_fork(conversation_flush_interval=0)
+    profiler.after_fork(f"worker{worker}")
+    if settings.metrics_file:
+        root, ext = os.path.splitext(settings.metrics_file)
+        settings.metrics_file = f"{root}.worker{worker}{ext}"
+    share_rate_limits(workers)
+    try:
+        web.run_app(create_app(ChatEngine(chatbot, shared_sessions=True)), sock=sock, print=None)
+    finally:
+        chatbot.close()
+        close_conversation_stores()
+
+
+def _spawn(chatbot: PropertyChatbot, sock: socket.socket, worker: int, workers: int) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    status = 0
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        _run_worker(chatbot, sock, worker, workers)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    finally:
+        # Skip the parent's atexit handlers; the worker cleaned up after itself.
+        os._exit(status)
+
+
+def serve(host: str = None, port: int = None, workers: int = None, llm: BaseChatModel = None) -> None:
+    """Serve the chatbot over HTTP and WebSocket from ``workers`` processes.
+
+    The catalog and indexes are loaded once, from the memory-mapped warm-start
+    snapshot when it is current, before the workers are forked; the workers
+    only read them, so their pages stay shared with the parent instead of being
+    copied per worker. The workers accept connections on one shared listening
+    socket, and sessions live in the conversation store, so any worker can
+    answer any turn. The parent restarts workers that die.
+    """
+    host = host or settings.server_host
+    port = port or settings.server_port
+    workers = workers or settings.server_workers or os.cpu_count() or 1
+
+    chatbot = PropertyChatbot(llm=llm)
+    print(startup.report())
+    sock = socket.create_server((host, port), backlog=1024)
+    print(f"Serving on http://{host}:{port} with {workers} worker(s)")
+
+    if workers == 1:
+        try:
+            web.run_app(create_app(ChatEngine(chatbot)), sock=sock, print=None)
+        finally:
+            chatbot.close()
+        return
+
+    if settings.catalog_poll_interval > 0:
+        print("Warning: Catalog polling is off with several workers; "
+              "restart the server to pick up catalog changes")
+    chatbot.prepare_fork()
+    # Keep the loaded objects out of the collector, which would otherwise touch
+    # (and so copy) their pages in every worker.
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    for worker in range(workers):
+        children[_spawn(chatbot, sock, worker, workers)] = worker
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        worker = children.pop(pid, None)
+        if worker is None or stopping:
+            continue
+        print(f"Warning: Worker {worker} (pid {pid}) exited with status "
+              f"{os.waitstatus_to_exitcode(status)}; restarting it")
+        time.sleep(1)
+        children[_spawn(chatbot, sock, worker, workers)] = worker
+    sock.close()
+
+
+def main():
+    """Run the HTTP/WebSocket server."""
+    parser = argparse.ArgumentParser(description="Serve the chatbot over HTTP and WebSocket.")
+    parser.add_argument("--host", help=f"interface to listen on (default: SERVER_HOST={settings.server_host})")
+    parser.add_argument("--port", type=int, help=f"port to listen on (default: SERVER_PORT={settings.server_port})")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes (default: SERVER_WORKERS, or one per CPU)")
+    parser.add_argument("--fake-llm", type=float, metavar="SECONDS",
+                        help="answer with a local fake model of this latency instead of OpenAI, for load tests")
+    args = parser.parse_args()
+
+    if args.fake_llm is not None:
+        settings.llm_provider = "fake"
+        settings.fake_llm_latency = args.fake_llm
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
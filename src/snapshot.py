@@ -0,0 +1,122 @@
+import json
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from .config import settings
+from .data_loader import PropertyDataLoader
+from .property_index import PropertyIndex
+
+SNAPSHOT_FILE = "snapshot.bin"
+MAGIC = b"PCWARM01"
+VERSION = 1
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def snapshot_path() -> str:
+    return os.path.join(settings.property_index_dir, SNAPSHOT_FILE)
+
+
+def _source_fingerprint(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def write_snapshot(path: str, state: Dict[str, Any], index: faiss.Index) -> None:
+    """Write ``state`` and a FAISS index as one file, replacing any previous snapshot atomically.
+
+    ``state`` is pickled with protocol 5 and its numpy arrays are stored as
+    separate aligned sections, so loading maps them instead of copying.
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    payload = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+    sections = [memoryview(payload)] + [buffer.raw() for buffer in buffers]
+    sections.append(memoryview(faiss.serialize_index(index)))
+
+    layout, offset = [], 0
+    for section in sections:
+        layout.append((offset, section.nbytes))
+        offset = _align(offset + section.nbytes)
+    header = json.dumps({'version': VERSION, 'sections': layout}).encode("utf-8")
+    base = _align(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", 'wb') as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for (start, _), section in zip(layout, sections):
+            f.seek(base + start)
+            f.write(section)
+    # Never rewrite a mapped file in place: readers keep the old inode.
+    os.replace(path + ".tmp", path)
+
+
+def read_snapshot(path: str) -> Optional[Tuple[Dict[str, Any], faiss.Index]]:
+    """Map a snapshot file and rebuild its state; numpy arrays stay views of the mapping."""
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        return None
+    (header_length,) = struct.unpack("<Q", view[len(MAGIC):len(MAGIC) + 8])
+    header_start = len(MAGIC) + 8
+    header = json.loads(bytes(view[header_start:header_start + header_length]))
+    if header.get('version') != VERSION:
+        return None
+    base = _align(header_start + header_length)
+    sections = [view[base + start:base + start + length] for start, length in header['sections']]
+    state = pickle.loads(sections[0], buffers=sections[1:-1])
+    index = faiss.deserialize_index(np.frombuffer(sections[-1], dtype=np.uint8))
+    return state, index
+
+
+def load_warm_start(property_index: PropertyIndex, path: str = None) -> Optional[PropertyDataLoader]:
+    """Restore the parsed catalog and the live index from the snapshot, if it is still current.
+
+    Returns the data loader for the snapshotted catalog, or None when there is
+    no usable snapshot and the catalog has to be loaded and indexed normally.
+    """
+    path = path or snapshot_path()
+    if not settings.warm_start_enabled or not os.path.exists(path):
+        return None
+    try:
+        loaded = read_snapshot(path)
+        if loaded is None:
+            return None
+        state, index = loaded
+        if state['source'] != _source_fingerprint(settings.properties_file):
+            return None
+        if not property_index.restore(state['index'], index):
+            return None
+        return PropertyDataLoader(catalog=state['catalog'], last_modified=state['last_modified'])
+    except Exception as e:
+        print(f"Warning: Could not load warm-start snapshot: {str(e)}")
+        return None
+
+
+def save_warm_start(data_loader: PropertyDataLoader, property_index: PropertyIndex,
+                    path: str = None) -> None:
+    """Snapshot the parsed catalog and the live index for the next start."""
+    if not settings.warm_start_enabled:
+        return
+    try:
+        source = _source_fingerprint(data_loader.properties_file)
+        if source['mtime'] != data_loader.last_modified:
+            return  # the file changed since it was parsed
+        index_state, index = property_index.snapshot_state()
+        write_snapshot(path or snapshot_path(), {
+            'source': source,
+            'last_modified': data_loader.last_modified,
+            'catalog': data_loader.catalog,
+            'index': index_state
+        }, index)
+    except Exception as e:
+        print(f"Warning: Could not save warm-start snapshot: {str(e)}")
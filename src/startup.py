@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from .metrics import metrics
+
+# Set when the ``src`` package is first imported
+PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    """Records how long each startup phase takes, from the first import of ``src`` on."""
+
+    def __init__(self, start: float = None):
+        self.start = PROCESS_START if start is None else start
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+        metrics.observe("startup_seconds", seconds, phase=name)
+
+    def mark_imports(self) -> None:
+        """Record the time since the package was first imported as the import phase (once)."""
+        if not any(name == "imports" for name, _ in self.phases):
+            self.record("imports", time.perf_counter() - self.start)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as one startup phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self) -> str:
+        """Summarize the phases and the total time since the first import."""
+        parts = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        return f"Startup {time.perf_counter() - self.start:.2f}s ({parts})"
+
+
+# Create global startup timer
+startup = StartupTimer()
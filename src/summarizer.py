@@ -0,0 +1,142 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+
+from .config import settings
+from .memory import ConversationMemory
+from .metrics import metrics
+from .tracing import stage, tracer
+
+# The latest exchange stays verbatim in the context instead of being folded in.
+KEEP_RECENT_MESSAGES = 2
+
+
+def build_summary_prompt(messages: List[Dict[str, Any]], previous_summary: str = "") -> str:
+    """Build the prompt asking the LLM to summarize a list of messages.
+
+    When ``previous_summary`` is given the LLM is asked to fold the new messages
+    into it, so each summary only has to read what was said since the last one.
+    """
+    conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
+    previous_text = ""
+    if previous_summary:
+        previous_text = f"""
+        Update this existing summary with the new messages below, keeping everything still relevant:
+        {previous_summary}
+        """
+    return f"""
+        Please provide a concise summary of the following conversation, focusing on:
+        1. The user's specific requirements (number of guests, location, dates, etc.)
+        2. Any preferences or constraints mentioned
+        3. Any properties that were discussed or recommended
+        4. Any issues or concerns raised about specific properties
+        {previous_text}
+        Conversation:
+        {conversation_text}
+        """
+
+
+class BackgroundSummarizer:
+    """Summarizes conversations on a worker thread, off the request path.
+
+    ``schedule`` is called after each turn and returns immediately. A memory is
+    summarized once enough tokens were added since its last summary and no new
+    turn arrived for ``debounce`` seconds; the previous summary is folded in
+    incrementally. Readers keep using whatever summary is current meanwhile.
+    Messages folded into a persisted summary are then dropped from the store.
+    """
+
+    def __init__(self, llm: BaseChatModel, callbacks: Optional[List[Any]] = None,
+                 debounce: float = None):
+        self.llm = llm
+        self.callbacks = callbacks or []
+        self.debounce = debounce if debounce is not None else settings.summary_debounce_seconds
+        self._pending: Dict[int, Tuple[ConversationMemory, float]] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._summarize_lock = threading.Lock()
+
+    def schedule(self, memory: ConversationMemory) -> None:
+        """Queue a memory for summarization if it grew enough; never blocks on the LLM."""
+        if not memory.should_summarize():
+            return
+        with self._condition:
+            # Each new turn pushes the deadline back (trailing debounce).
+            self._pending[id(memory)] = (memory, time.monotonic() + self.debounce)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="summarizer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _next_due(self) -> Optional[ConversationMemory]:
+        """Wait for the next memory whose debounce expired; None once stopped."""
+        with self._condition:
+            while not self._stopped:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                key, (memory, due) = min(self._pending.items(), key=lambda item: item[1][1])
+                delay = due - time.monotonic()
+                if delay <= 0:
+                    del self._pending[key]
+                    return memory
+                self._condition.wait(delay)
+            return None
+
+    def _run(self) -> None:
+        while True:
+            memory = self._next_due()
+            if memory is None:
+                return
+            self.summarize(memory)
+
+    def summarize(self, memory: ConversationMemory) -> None:
+        """Fold the messages added since the last summary into it."""
+        with self._summarize_lock:
+            self._summarize(memory)
+
+    def _summarize(self, memory: ConversationMemory) -> None:
+        cutoff = memory.message_count - KEEP_RECENT_MESSAGES
+        if cutoff <= memory.summarized_count:
+            return
+        summary_prompt = build_summary_prompt(
+            memory.get_messages(memory.summarized_count, cutoff), memory.summary
+        )
+        start = time.perf_counter()
+        with tracer.turn(kind="summary", session_id=memory.session_id) as trace:
+            try:
+                with stage("summarize"):
+                    response = self.llm.invoke(
+                        [{"role": "user", "content": summary_prompt}],
+                        config={"callbacks": self.callbacks}
+                    )
+                with stage("persistence"):
+                    memory.update_summary(response.content, summarized_count=cutoff)
+                    if settings.conversation_compact_on_summary:
+                        memory.store.compact(session_id=memory.store_id)
+                metrics.increment("summaries_total")
+            except Exception as e:
+                trace.error = str(e)
+                metrics.increment("summaries_failed_total")
+                print(f"Warning: Could not summarize conversation: {str(e)}")
+            finally:
+                metrics.observe("summary_seconds", time.perf_counter() - start)
+
+    def flush(self) -> None:
+        """Summarize every pending memory now, e.g. before exiting."""
+        with self._condition:
+            pending = [memory for memory, _ in self._pending.values()]
+            self._pending.clear()
+        for memory in pending:
+            self.summarize(memory)
+
+    def stop(self) -> None:
+        """Stop the worker thread; pending summaries are dropped."""
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify()
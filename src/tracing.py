@@ -0,0 +1,287 @@
+import atexit
+import contextvars
+import cProfile
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from .config import settings
+from .metrics import metrics
+
+PROFILE_OUTPUTS = {'cprofile': "profile.pstats", 'py-spy': "profile.svg"}
+
+_current_turn: contextvars.ContextVar = contextvars.ContextVar("current_turn", default=None)
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("current_stage", default=None)
+
+
+class TurnTrace:
+    """Wall time per stage, LLM usage and retrieval facts of one turn (or one summary)."""
+
+    def __init__(self, kind: str = "turn", session_id: str = None):
+        self.turn_id = uuid.uuid4().hex
+        self.kind = kind
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.stages: Dict[str, float] = {}
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.cache_hit: Optional[bool] = None
+        self.documents: Optional[int] = None
+        # Intent of a turn answered from the catalog without the LLM
+        self.route: Optional[str] = None
+        self.first_token: Optional[float] = None
+        self.error: Optional[str] = None
+        self.total = 0.0
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_usage(self, prompt_tokens: int, completion_tokens: int, cost: float) -> None:
+        with self._lock:
+            self.llm_calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'turn_id': self.turn_id,
+            'kind': self.kind,
+            'session_id': self.session_id,
+            'started_at': self.started_at,
+            'total_seconds': round(self.total, 6),
+            'first_token_seconds': None if self.first_token is None else round(self.first_token, 6),
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'llm_calls': self.llm_calls,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost_usd': round(self.cost, 8),
+            'cache_hit': self.cache_hit,
+            'documents': self.documents,
+            'route': self.route,
+            'error': self.error
+        }
+
+
+def current_turn() -> Optional[TurnTrace]:
+    """Get the trace of the turn being answered in this context, if any."""
+    return _current_turn.get()
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Charge ``seconds`` to a stage of the current turn and to the ``stage_seconds`` metric."""
+    metrics.observe("stage_seconds", seconds, stage=name)
+    trace = _current_turn.get()
+    if trace is not None:
+        trace.add_stage(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as one stage of the current turn.
+
+    LLM calls made inside the block are attributed to the stage in the token
+    and cost metrics.
+    """
+    token = _current_stage.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+        _current_stage.reset(token)
+
+
+def annotate(**fields: Any) -> None:
+    """Set fields such as ``cache_hit`` or ``documents`` on the current turn's trace."""
+    trace = _current_turn.get()
+    if trace is not None:
+        for name, value in fields.items():
+            setattr(trace, name, value)
+
+
+def mark_first_token() -> None:
+    """Record the time to the first streamed token of the current turn (once)."""
+    trace = _current_turn.get()
+    if trace is not None and trace.first_token is None:
+        trace.first_token = trace.elapsed()
+
+
+def llm_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Price one call with the configured per-1K-token prices."""
+    return (prompt_tokens * settings.llm_prompt_price_per_1k
+            + completion_tokens * settings.llm_completion_price_per_1k) / 1000
+
+
+def record_llm_usage(prompt_tokens: int, completion_tokens: int) -> None:
+    """Account the tokens and cost of one LLM call to the current stage and turn."""
+    stage_name = _current_stage.get() or "other"
+    cost = llm_cost(prompt_tokens, completion_tokens)
+    metrics.increment("llm_tokens_total", prompt_tokens, stage=stage_name, type="prompt")
+    metrics.increment("llm_tokens_total", completion_tokens, stage=stage_name, type="completion")
+    metrics.increment("llm_cost_usd_total", cost, stage=stage_name)
+    trace = _current_turn.get()
+    if trace is not None:
+        trace.add_usage(prompt_tokens, completion_tokens, cost)
+
+
+class Tracer:
+    """Opens a trace per turn and exports finished ones.
+
+    Each finished trace is appended as one JSON line to ``settings.trace_file``
+    and folded into the in-process metrics, which are rewritten in the
+    Prometheus text format to ``settings.metrics_file`` at most every
+    ``settings.metrics_export_interval`` seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    @contextmanager
+    def turn(self, kind: str = "turn", session_id: str = None) -> Iterator[TurnTrace]:
+        """Trace the enclosed block as one turn; stages inside it are charged to it."""
+        trace = TurnTrace(kind, session_id)
+        token = _current_turn.set(trace)
+        try:
+            yield trace
+        finally:
+            trace.total = trace.elapsed()
+            try:
+                _current_turn.reset(token)
+            except ValueError:
+                pass  # an async generator finalized in another context
+            self.finish(trace)
+
+    def finish(self, trace: TurnTrace) -> None:
+        cache = "none" if trace.cache_hit is None else ("hit" if trace.cache_hit else "miss")
+        metrics.increment("turns_total", kind=trace.kind, cache=cache)
+        metrics.observe("turn_seconds", trace.total, kind=trace.kind,
+                        served="llm" if trace.route is None else "local")
+        if trace.first_token is not None:
+            metrics.observe("first_token_seconds", trace.first_token, kind=trace.kind)
+        if trace.documents is not None:
+            metrics.observe_size("retrieved_documents", trace.documents)
+        if trace.error is not None:
+            metrics.increment("turn_errors_total", kind=trace.kind)
+        if settings.trace_file:
+            self._write_trace(trace)
+        if settings.metrics_file and time.monotonic() - self._last_export >= settings.metrics_export_interval:
+            self.export_metrics()
+
+    def _write_trace(self, trace: TurnTrace) -> None:
+        line = json.dumps(trace.to_dict()) + "\n"
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(settings.trace_file) or ".", exist_ok=True)
+                with open(settings.trace_file, 'a') as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"Warning: Could not write trace: {str(e)}")
+
+    def export_metrics(self) -> None:
+        """Write the metrics file now, if one is configured."""
+        if not settings.metrics_file:
+            return
+        self._last_export = time.monotonic()
+        try:
+            metrics.write_prometheus(settings.metrics_file)
+        except OSError as e:
+            print(f"Warning: Could not write metrics: {str(e)}")
+
+
+class Profiler:
+    """Optional profiler for finding hot paths under real load, picked by ``settings.profile_mode``.
+
+    ``cprofile`` profiles the thread that starts it (the CLI loop or the
+    serving event loop) and dumps pstats when stopped; ``py-spy`` samples
+    every thread of the process, and of forked server workers, from outside
+    and writes a flame graph.
+    """
+
+    def __init__(self):
+        self.output = None
+        self._profile = None
+        self._process = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None or self._process is not None
+
+    def start(self, mode: str = None, output: str = None) -> bool:
+        """Start profiling unless it is disabled or already running; stopped again at exit."""
+        mode = (settings.profile_mode if mode is None else mode).lower()
+        with self._lock:
+            if not mode or mode == "none" or self.running:
+                return False
+            if mode not in PROFILE_OUTPUTS:
+                raise ValueError(f"Unknown profile mode: {mode}")
+            self.output = output or settings.profile_output or PROFILE_OUTPUTS[mode]
+            if mode == "cprofile":
+                self._profile = cProfile.Profile()
+                self._profile.enable()
+            else:
+                try:
+                    self._process = subprocess.Popen(
+                        ["py-spy", "record", "--pid", str(os.getpid()), "--subprocesses",
+                         "--output", self.output],
+                        stdout=subprocess.DEVNULL
+                    )
+                except OSError as e:
+                    print(f"Warning: Could not start py-spy: {str(e)}")
+                    return False
+        atexit.register(self.stop)
+        return True
+
+    def after_fork(self, suffix: str) -> None:
+        """Take over a profile inherited by a forked worker.
+
+        cProfile keeps profiling the worker into its own ``suffix``-ed file; a
+        py-spy recording stays with the parent, which already samples the
+        workers.
+        """
+        with self._lock:
+            if self._profile is not None:
+                root, ext = os.path.splitext(self.output)
+                self.output = f"{root}.{suffix}{ext}"
+            self._process = None
+
+    def stop(self) -> Optional[str]:
+        """Stop profiling and write the profile; returns its path."""
+        with self._lock:
+            if not self.running:
+                return None
+            if self._profile is not None:
+                self._profile.disable()
+                self._profile.dump_stats(self.output)
+                self._profile = None
+            else:
+                # py-spy writes its output when interrupted
+                self._process.send_signal(signal.SIGINT)
+                try:
+                    self._process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+                self._process = None
+        print(f"Profile written to {self.output}")
+        return self.output
+
+
+# Create global tracer and profiler instances
+tracer = Tracer()
+profiler = Profiler()
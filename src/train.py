@@ -1,130 +1,184 @@
+import argparse
 import json
 import os
-from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator
 from langchain_community.vectorstores import FAISS
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from langchain_community.callbacks import get_openai_callback
 
 from src.config import settings
+from src.embeddings import build_embeddings
+from src.examples import ExampleIndex, example_text, extract_examples, iter_conversations, parse_example_text
 
-class PropertyChatbotTrainer:
-    def __init__(self):
-        self.training_data_path = os.path.join('data', 'training', 'conversations.json')
-        self.llm = ChatOpenAI(
-            model_name=settings.openai_model,
-            temperature=0.7
-        )
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model
-        )
-        self._load_training_data()
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most ``size`` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-    def _load_training_data(self) -> None:
-        """Load training conversations from JSON file."""
-        try:
-            with open(self.training_data_path, 'r') as f:
-                data = json.load(f)
-                self.conversations = data.get('conversations', [])
-        except FileNotFoundError:
+
+class PropertyChatbotTrainer:
+    """Builds the training example vector store as a streaming, resumable pipeline.
+
+    Conversations are read incrementally, turned into examples in a process
+    pool, and embedded in fixed-size shards that are checkpointed under
+    ``shard_dir``. A failed run resumes after the last completed shard; the
+    shards are merged into ``models/vector_store`` at the end, and the BM25
+    example index is built from the merged store and saved to
+    ``models/example_index.pkl``.
+    """
+
+    PROGRESS_FILE = "progress.json"
+
+    def __init__(self, training_data_path: str = None, shard_dir: str = None):
+        self.training_data_path = training_data_path or settings.training_data_file
+        self.shard_dir = shard_dir or settings.training_shard_dir
+        self.embeddings = build_embeddings()
+        self.model_name = getattr(self.embeddings, 'model_name', settings.embedding_model)
+        if not os.path.exists(self.training_data_path):
             raise FileNotFoundError(f"Training data not found at {self.training_data_path}")
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON in training data file: {self.training_data_path}")
 
-    def _prepare_training_data(self) -> List[Dict[str, Any]]:
-        """Prepare training data in the format expected by the model."""
-        training_examples = []
-        
-        for conv in self.conversations:
-            messages = conv.get('messages', [])
-            if len(messages) < 2:  # Skip conversations with less than 2 messages
+    def _iter_examples(self) -> Iterator[Dict[str, Any]]:
+        """Stream examples in file order, extracting batches of conversations in worker processes."""
+        batches = _batches(iter_conversations(self.training_data_path), settings.training_batch_size)
+        workers = settings.training_workers or os.cpu_count() or 1
+        if workers <= 1:
+            for batch in batches:
+                yield from extract_examples(batch)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded number of batches in flight so memory stays flat
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.submit(extract_examples, batch))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def _source_fingerprint(self) -> Dict[str, Any]:
+        """Identify the training data and settings a set of shards was built from."""
+        stat = os.stat(self.training_data_path)
+        return {
+            'path': os.path.abspath(self.training_data_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'embedding_model': self.model_name,
+            'shard_size': settings.training_shard_size
+        }
+
+    def _load_progress(self) -> int:
+        """Get the number of completed shards that are still valid for the current data."""
+        try:
+            with open(os.path.join(self.shard_dir, self.PROGRESS_FILE), 'r') as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if progress.get('source') != self._source_fingerprint():
+            return 0
+        return progress.get('completed_shards', 0)
+
+    def _save_progress(self, completed_shards: int) -> None:
+        path = os.path.join(self.shard_dir, self.PROGRESS_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump({'source': self._source_fingerprint(), 'completed_shards': completed_shards}, f)
+        os.replace(path + ".tmp", path)
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.shard_dir, f"shard_{shard:05d}")
+
+    def _embed_shard(self, shard: int, examples: List[Dict[str, Any]]) -> None:
+        """Embed one shard of examples and checkpoint it to disk."""
+        texts = [example_text(ex) for ex in examples]
+        metadatas = [{'system_message': ex['system_message']} for ex in examples]
+        vector_store = FAISS.from_texts(texts=texts, metadatas=metadatas, embedding=self.embeddings)
+        path = self._shard_path(shard)
+        shutil.rmtree(path + ".tmp", ignore_errors=True)
+        vector_store.save_local(path + ".tmp")
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(path + ".tmp", path)
+        self._save_progress(shard + 1)
+
+    def _merge_shards(self, shards: int) -> FAISS:
+        """Merge the checkpointed shards into a single vector store, one shard at a time."""
+        vector_store = FAISS.load_local(self._shard_path(0), self.embeddings)
+        for shard in range(1, shards):
+            vector_store.merge_from(FAISS.load_local(self._shard_path(shard), self.embeddings))
+        return vector_store
+
+    def build_vector_store(self, fresh: bool = False) -> FAISS:
+        """Run the sharded embedding pipeline, resuming from checkpoints unless ``fresh``."""
+        if fresh:
+            shutil.rmtree(self.shard_dir, ignore_errors=True)
+        os.makedirs(self.shard_dir, exist_ok=True)
+        completed = self._load_progress()
+        if completed:
+            print(f"Resuming after {completed} completed shards")
+        else:
+            # Shards left by a different source or model are not reusable
+            for name in os.listdir(self.shard_dir):
+                shutil.rmtree(os.path.join(self.shard_dir, name), ignore_errors=True)
+
+        shards = 0
+        examples = 0
+        for shard, batch in enumerate(_batches(self._iter_examples(), settings.training_shard_size)):
+            shards = shard + 1
+            examples += len(batch)
+            if shard < completed:
                 continue
-                
-            # Get system message if present
-            system_message = next((msg['content'] for msg in messages if msg['role'] == 'system'), None)
-            
-            # Process user-assistant pairs
-            for i in range(1, len(messages)):
-                if messages[i]['role'] == 'user' and i + 1 < len(messages) and messages[i + 1]['role'] == 'assistant':
-                    example = {
-                        'input': messages[i]['content'],
-                        'output': messages[i + 1]['content'],
-                        'system_message': system_message
-                    }
-                    training_examples.append(example)
-        
-        return training_examples
+            start = time.perf_counter()
+            self._embed_shard(shard, batch)
+            print(f"Shard {shard}: {len(batch)} examples embedded in {time.perf_counter() - start:.1f}s "
+                  f"({examples} so far)")
+
+        if not shards:
+            raise ValueError(f"No training examples found in {self.training_data_path}")
+        print(f"Prepared {examples} training examples in {shards} shards")
+        return self._merge_shards(shards)
 
-    def train(self) -> None:
+    def train(self, fresh: bool = False) -> None:
         """Train the model using the conversation data."""
         print("Starting training process...")
-        
-        # Prepare training data
-        training_examples = self._prepare_training_data()
-        print(f"Prepared {len(training_examples)} training examples")
-        
-        # Create vector store for training data
-        texts = [f"Input: {ex['input']}\nOutput: {ex['output']}" for ex in training_examples]
-        metadatas = [{'system_message': ex['system_message']} for ex in training_examples]
-        
-        vector_store = FAISS.from_texts(
-            texts=texts,
-            metadatas=metadatas,
-            embedding=self.embeddings
-        )
-        
-        # Create training prompt template
-        template = """You are a helpful property rental assistant. Use the following training examples to learn how to respond to guest inquiries.
-
-        System Message: {system_message}
-
-        Previous conversation:
-        {chat_history}
-
-        Context:
-        {context}
 
-        Question: {question}
-        Answer:"""
-
-        QA_CHAIN_PROMPT = PromptTemplate(
-            input_variables=["context", "question", "chat_history", "system_message"],
-            template=template
-        )
+        vector_store = self.build_vector_store(fresh)
+        self._save_model(vector_store)
+        print("Training completed successfully!")
 
-        # Initialize memory and chain
-        memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
+    def _build_example_index(self, vector_store: FAISS) -> ExampleIndex:
+        """Index the merged examples for keyword search, reading them back from the vector store.
 
-        chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=vector_store.as_retriever(),
-            memory=memory,
-            combine_docs_chain_kwargs={"prompt": QA_CHAIN_PROMPT}
+        Nothing is kept while the shards stream through, so memory during
+        embedding stays flat; only the final index is built in memory.
+        """
+        example_index = ExampleIndex([])
+        example_index.add(
+            dict(parse_example_text(doc.page_content), system_message=doc.metadata.get('system_message'))
+            for doc in vector_store.docstore._dict.values()
         )
+        return example_index
 
-        # Save the trained model
-        self._save_model(chain, vector_store)
-        print("Training completed successfully!")
-
-    def _save_model(self, chain: ConversationalRetrievalChain, vector_store: FAISS) -> None:
+    def _save_model(self, vector_store: FAISS) -> None:
         """Save the trained model and vector store."""
         # Create models directory if it doesn't exist
         os.makedirs('models', exist_ok=True)
         
-        # Save vector store
+        # Save vector store and the keyword index over the same examples
         vector_store.save_local('models/vector_store')
+        self._build_example_index(vector_store).save()
         
         # Save chain configuration
         chain_config = {
             'model_name': settings.openai_model,
             'temperature': 0.7,
-            'system_message': "You are a helpful property rental assistant."
+            'system_message': "You are a helpful property rental assistant.",
+            'embedding_model': self.model_name
         }
         
         with open('models/chain_config.json', 'w') as f:
@@ -134,11 +188,16 @@ class PropertyChatbotTrainer:
 
 def main():
     """Main function to run the training process."""
+    parser = argparse.ArgumentParser(description="Build the training example vector store.")
+    parser.add_argument("--data", help="conversations .json or .jsonl file (default: TRAINING_DATA_FILE)")
+    parser.add_argument("--fresh", action="store_true", help="discard checkpointed shards and start over")
+    args = parser.parse_args()
     try:
-        trainer = PropertyChatbotTrainer()
-        trainer.train()
+        trainer = PropertyChatbotTrainer(args.data)
+        trainer.train(fresh=args.fresh)
     except Exception as e:
         print(f"Error during training: {str(e)}")
+        print("Completed shards are kept; run again to resume.")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,103 @@
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from .config import settings
+
+# Index types selectable with VECTOR_INDEX_TYPE
+INDEX_TYPES = ("flat", "sq", "ivf", "ivfsq", "ivfpq", "hnsw", "hnswsq")
+
+# Types whose ids shift down on remove_ids like a flat index, so the live store
+# can be patched in place through LangChain; IVF indexes are patched by id, and
+# the others are rebuilt from the stored vectors.
+IN_PLACE_TYPES = ("flat", "sq")
+
+# k-means needs roughly this many training points per IVF list
+MIN_POINTS_PER_LIST = 39
+PQ_MIN_TRAINING_POINTS = 256
+
+
+def _nlist(count: int) -> int:
+    nlist = settings.vector_index_nlist or int(4 * math.sqrt(count))
+    return max(1, min(nlist, count // MIN_POINTS_PER_LIST))
+
+
+def _pq_m(dimensions: int) -> int:
+    """Pick the number of PQ sub-quantizers: the largest divisor of the dimension up to 64."""
+    if settings.vector_index_pq_m:
+        return settings.vector_index_pq_m
+    return max(m for m in range(1, min(64, dimensions) + 1) if dimensions % m == 0)
+
+
+def factory_string(index_type: str, count: int, dimensions: int) -> str:
+    """Get the faiss index_factory description for an index type and catalog size.
+
+    Types that need training fall back to a flat index when there are too few
+    vectors to train them.
+    """
+    index_type = index_type.lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {index_type}")
+    if index_type.startswith("ivf") and count < MIN_POINTS_PER_LIST:
+        return "Flat"
+    if index_type == "ivfpq" and count < PQ_MIN_TRAINING_POINTS:
+        return "Flat"
+    return {
+        "flat": "Flat",
+        "sq": "SQ8",
+        "ivf": f"IVF{_nlist(count)},Flat",
+        "ivfsq": f"IVF{_nlist(count)},SQ8",
+        "ivfpq": f"IVF{_nlist(count)},PQ{_pq_m(dimensions)}np",
+        "hnsw": f"HNSW{settings.vector_index_hnsw_m}",
+        "hnswsq": f"HNSW{settings.vector_index_hnsw_m},SQ8",
+    }[index_type]
+
+
+def configure_search(index: faiss.Index) -> None:
+    """Apply the configured nprobe / efSearch to an index's default search."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(settings.vector_index_nprobe, ivf.nlist)
+    if hasattr(index, 'hnsw'):
+        index.hnsw.efSearch = settings.vector_index_ef_search
+
+
+def train_index(vectors: np.ndarray, index_type: str = None) -> faiss.Index:
+    """Create an empty index of the configured type, trained on ``vectors`` if it needs it."""
+    index_type = index_type or settings.vector_index_type
+    index = faiss.index_factory(vectors.shape[1],
+                                factory_string(index_type, len(vectors), vectors.shape[1]))
+    if not index.is_trained:
+        index.train(vectors)
+    configure_search(index)
+    return index
+
+
+def build_index(vectors: np.ndarray, index_type: str = None,
+                trained: Optional[faiss.Index] = None) -> faiss.Index:
+    """Build a searchable index over ``vectors``, reusing an already ``trained`` empty index if given."""
+    if trained is not None and trained.d == vectors.shape[1]:
+        index = faiss.clone_index(trained)
+        index.reset()
+        configure_search(index)
+    else:
+        index = train_index(vectors, index_type)
+    index.add(vectors)
+    return index
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """Get search parameters restricting ``index`` to ``selector``, keeping nprobe / efSearch."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    if hasattr(index, 'hnsw'):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def index_bytes(index: faiss.Index) -> int:
+    """Get the serialized size of an index, a proxy for its resident memory."""
+    return int(faiss.serialize_index(index).size)